@@ -6,11 +6,17 @@
     * multi_population_ea() for invoking an EA using sub-populations
     * random_search() for a more naive strategy
 """
+import multiprocessing
+import queue
+import random
+
+import numpy as np
 from leap_ec import util
 from toolz import pipe
 
 from leap_ec.context import context
 from leap_ec.individual import Individual
+from leap_ec.population import IndividualView, PopulationArray
 
 
 ##############################
@@ -42,7 +48,9 @@ def generational_ea(generations, pop_size, problem, representation, pipeline, co
     :param initialize: a function that creates a new genome every time it is
         called
     :param list pipeline: a list of operators that are applied (in order) to
-        create the offspring population at each generation
+        create the offspring population at each generation; see
+        :py:func:`leap_ec.compiler.compile_pipeline` for a way to run
+        reproductive operators a batch at a time
 
     :return: a generator of `(int, individual_cls)` pairs representing the
         best individual at each generation.
@@ -109,15 +117,22 @@ def generational_ea(generations, pop_size, problem, representation, pipeline, co
     generation_counter = util.inc_generation(context=context)
 
     # Output the best individual in the initial population
-    bsf = max(parents)
+    bsf = max(parents, key=Individual.sort_key_for(parents))
     yield (0, bsf)
 
     while generation_counter.generation() < generations:
         # Execute the operators to create a new offspring population
         offspring = pipe(parents, *pipeline)
 
-        if max(offspring) > bsf:  # Update the best-so-far individual
-            bsf = max(offspring)
+        # Keep array-backed populations array-backed across generations
+        if isinstance(parents, PopulationArray) \
+                and not isinstance(offspring, PopulationArray):
+            offspring = PopulationArray.from_individuals(
+                offspring, individual_cls=parents.individual_cls)
+
+        best = max(offspring, key=Individual.sort_key_for(offspring))
+        if best > bsf:  # Update the best-so-far individual
+            bsf = best
 
         parents = offspring  # Replace parents with offspring
         generation_counter()  # Increment to the next generation
@@ -132,7 +147,8 @@ def generational_ea(generations, pop_size, problem, representation, pipeline, co
 def multi_population_ea(generations, num_populations, pop_size, problem,
                         representation, shared_pipeline,
                         subpop_pipelines=None,
-                        init_evaluate=Individual.evaluate_population, context=context):
+                        init_evaluate=Individual.evaluate_population, context=context,
+                        parallel=False, mp_context=None):
     """
     An EA that maintains multiple (interacting) subpopulations, i.e. for
     implementing island models.
@@ -158,6 +174,11 @@ def multi_population_ea(generations, num_populations, pop_size, problem,
     :param list subpop_pipelines: a list of population-specific operator
         lists, the ith of which will only be applied to the ith population (after
         the `shared_pipeline`).  Ignored if `None`.
+    :param bool parallel: if True, run each population in its own worker
+        process (see below)
+    :param mp_context: an optional `multiprocessing` context for the worker
+        processes when `parallel` is True; it must use the 'fork' start
+        method
 
     :return: a generator of `(int, [individual_cls])` pairs representing the
         best individual in each population at each generation.
@@ -228,11 +249,34 @@ def multi_population_ea(generations, num_populations, pop_size, problem,
     :py:func:`leap.ops.migrate`) have the option of accessing the share
     context to learn which subpopulation they are currently working with.
 
+    With `parallel=True`, each population instead lives in its own worker
+    process and runs through its generations independently of the others,
+    so that an island model can use as many cores as it has islands.
+    :py:func:`leap_ec.ops.migrate` then sends emigrants to their destination
+    island through a queue, and they join it at its next migration step.
+    The generator still yields the best-so-far individual of each
+    population at each generation (as copies sent back from the workers), but
+    since the islands no longer run in lockstep, `context['leap'][
+    'subpopulations']` isn't available to operators.  The workers inherit
+    the pipelines and representation by being forked from the parent
+    process, since pipelines usually hold objects that can't be pickled
+    (such as lambdas, or the closure that `migrate()` returns), so this
+    requires a platform that supports the 'fork' start method; passing an
+    `mp_context` that uses another start method raises a `ValueError`.  Each
+    worker's random number generators are seeded from the parent's.
+
     """
     
     if not hasattr(problem, '__len__'):
         problem = [ problem for _ in range(num_populations)]
 
+    if parallel:
+        yield from _parallel_multi_population_ea(
+            generations, num_populations, pop_size, problem, representation,
+            shared_pipeline, subpop_pipelines, init_evaluate, context,
+            mp_context)
+        return
+
     # Initialize populations of pop_size individuals of the same type as
     # individual_cls
     pops = [representation.create_population(pop_size, problem=problem[i])
@@ -248,7 +292,7 @@ def multi_population_ea(generations, num_populations, pop_size, problem,
     generation_counter = util.inc_generation(context=context)
 
     # Output the best individual in the initial population
-    bsf = [max(p) for p in pops]
+    bsf = [max(p, key=Individual.sort_key_for(p)) for p in pops]
     yield (0, bsf)
 
     while generation_counter.generation() < generations:
@@ -263,8 +307,9 @@ def multi_population_ea(generations, num_populations, pop_size, problem,
                 (list(subpop_pipelines[i]) if subpop_pipelines else [])
             offspring = pipe(parents, *operators)
 
-            if max(offspring) > bsf[i]:  # Update the best-so-far individual
-                bsf[i] = max(offspring)
+            best = max(offspring, key=Individual.sort_key_for(offspring))
+            if best > bsf[i]:  # Update the best-so-far individual
+                bsf[i] = best
 
             pops[i] = offspring  # Replace parents with offspring
 
@@ -274,6 +319,131 @@ def multi_population_ea(generations, num_populations, pop_size, problem,
         yield (generation_counter.generation(), bsf)
 
 
+def _detached(individual):
+    """:return: `individual`, or a stand-alone copy of it if it is a view of a
+    `PopulationArray`.
+
+    Queues pickle what they're given in a background thread, so a view could
+    otherwise be read after its population has moved on."""
+    if isinstance(individual, IndividualView):
+        return individual.detach()
+    return individual
+
+
+def _run_island(island, generations, pop_size, problem, representation,
+                operators, init_evaluate, context, seed, mailboxes, reports):
+    """Evolve one population of a parallel `multi_population_ea()`, in a
+    worker process, sending its best-so-far individual to `reports` after
+    each generation."""
+    try:
+        random.seed(seed)
+        np.random.seed(seed % 2**32)
+        context['leap']['current_subpopulation'] = island
+        context['leap']['subpopulations'] = None
+        context['leap']['mailboxes'] = mailboxes
+
+        parents = representation.create_population(pop_size, problem=problem)
+        parents = init_evaluate(parents)
+        generation_counter = util.inc_generation(context=context)
+
+        bsf = _detached(max(parents, key=Individual.sort_key_for(parents)))
+        reports.put((island, 0, bsf, None))
+
+        while generation_counter.generation() < generations:
+            offspring = pipe(parents, *operators)
+
+            # Keep array-backed populations array-backed across generations
+            if isinstance(parents, PopulationArray) \
+                    and not isinstance(offspring, PopulationArray):
+                offspring = PopulationArray.from_individuals(
+                    offspring, individual_cls=parents.individual_cls)
+
+            best = max(offspring, key=Individual.sort_key_for(offspring))
+            if best > bsf:  # Update the best-so-far individual
+                bsf = _detached(best)
+
+            parents = offspring
+            generation_counter()
+            reports.put((island, generation_counter.generation(), bsf, None))
+    except Exception as e:
+        reports.put((island, None, None, e))
+    finally:
+        # Emigrants sent to islands that have already finished are never
+        # received, so don't wait to flush them before exiting
+        for mailbox in mailboxes:
+            mailbox.cancel_join_thread()
+
+
+def _parallel_multi_population_ea(generations, num_populations, pop_size,
+                                  problem, representation, shared_pipeline,
+                                  subpop_pipelines, init_evaluate, context,
+                                  mp_context):
+    """Run each population of a `multi_population_ea()` in its own worker
+    process, and gather their best-so-far individuals generation by
+    generation."""
+    start_method = 'fork' if mp_context is None \
+        else mp_context.get_start_method()
+    if start_method != 'fork' \
+            or 'fork' not in multiprocessing.get_all_start_methods():
+        raise ValueError(
+            f"multi_population_ea(parallel=True) needs to fork its worker "
+            f"processes, because pipelines generally can't be pickled, but "
+            f"the '{start_method}' start method was requested and this "
+            f"platform supports {multiprocessing.get_all_start_methods()}.")
+    if mp_context is None:
+        mp_context = multiprocessing.get_context('fork')
+
+    mailboxes = [mp_context.Queue() for _ in range(num_populations)]
+    reports = mp_context.Queue()
+    workers = []
+    for i in range(num_populations):
+        operators = list(shared_pipeline) + \
+            (list(subpop_pipelines[i]) if subpop_pipelines else [])
+        seed = random.randrange(2**63)
+        workers.append(mp_context.Process(
+            target=_run_island, daemon=True,
+            args=(i, generations, pop_size, problem[i], representation,
+                  operators, init_evaluate, context, seed, mailboxes,
+                  reports)))
+
+    for worker in workers:
+        worker.start()
+    try:
+        # Islands run ahead of each other, so hold on to their reports until
+        # every island has finished the same generation
+        received = {}
+        for generation in range(generations + 1):
+            while len(received.get(generation, {})) < num_populations:
+                # If a worker is gone (ex. it crashed, or couldn't pickle its
+                # report), its reports will never come, so check on them
+                # whenever we're kept waiting
+                gone = any(w.exitcode not in (None, 0) for w in workers) \
+                    or all(w.exitcode is not None for w in workers)
+                try:
+                    island, g, bsf, exception = reports.get(timeout=0.1)
+                except queue.Empty:
+                    if gone:
+                        raise RuntimeError(
+                            "An island's worker process exited without "
+                            "reporting all of its generations.")
+                    continue
+                if exception is not None:
+                    raise exception
+                received.setdefault(g, {})[island] = bsf
+
+            bsf = received.pop(generation)
+            context['leap']['generation'] = generation
+            yield (generation, [bsf[i] for i in range(num_populations)])
+
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+
 ##############################
 # Function random_search
 ##############################
@@ -335,8 +505,9 @@ def random_search(evaluations, problem, representation, pipeline=(), context=con
         # For example, we'd put probes here.
         population = pipe(population, *pipeline)
 
-        if max(population) > bsf:  # Update the best-so-far individual
-            bsf = max(population)
+        best = max(population, key=Individual.sort_key_for(population))
+        if best > bsf:  # Update the best-so-far individual
+            bsf = best
 
         evaluation_counter()  # Increment to the next evaluation
 
@@ -2,9 +2,11 @@
 """
     Decoders for binary representations.
 """
+import numpy as np
 from toolz.itertoolz import pluck
 
 from .. decoder import Decoder
+from .packed import PackedBits
 
 ##############################
 # Class BinaryToIntDecoder
@@ -12,6 +14,7 @@ from .. decoder import Decoder
 class BinaryToIntDecoder(Decoder):
     """A decoder that converts a Boolean-vector genome into an integer-vector
     phenome. """
+    memoize = True
 
     def __init__(self, *descriptors):
         """Constructs a decoder that will convert a binary representation
@@ -37,6 +40,7 @@ class BinaryToIntDecoder(Decoder):
         """
         super().__init__()
         self.descriptors = descriptors
+        self._weights = BinaryToIntDecoder._segment_weights(descriptors)
 
     def decode(self, genome, *args, **kwargs):
         """
@@ -54,42 +58,71 @@ class BinaryToIntDecoder(Decoder):
         >>> d = BinaryToIntDecoder(4, 4, 4)
         >>> d.decode([0,0,0,1, 1, 1, 0, 0, 0, 1, 1, 0])
         [1, 12, 6]
-        """
-
-        # TODO the laborious string conversion approach could be replaced
-        #  with something more elegant; but this was a copy-n-paste job from
-        #  some of my code from elsewhere that I knew worked.
 
-        values = []
-        offset = 0  # how far are we into the binary test_sequence
+        `PackedBits` genomes are decoded by reading each segment's bit field
+        straight out of the packed bytes:
 
-        for descriptor in self.descriptors:
-            # snip out the next test_sequence
-            cur_sequence = genome[offset:offset + descriptor]
-            values.append(BinaryToIntDecoder.__binary_to_int(cur_sequence))
-            offset += descriptor
+        >>> d.decode(PackedBits.from_bits('000111000110'))
+        [1, 12, 6]
+        """
+        return self._int_values(genome).tolist()
 
-        return values
+    def decode_batch(self, genomes, *args, **kwargs):
+        """
+        Decode a whole batch of genomes with a single matrix product.
 
-    @staticmethod
-    def __binary_to_int(b):
-        """Convert the given binary string to the equivalent
+        >>> d = BinaryToIntDecoder(2, 3)
+        >>> d.decode_batch([[0, 1, 0, 1, 1],
+        ...                 [1, 1, 1, 0, 0]])
+        array([[1, 3],
+               [3, 4]])
 
-        >>> BinaryToIntDecoder._BinaryToIntDecoder__binary_to_int([0, 1, 0, 1])
-        5
+        :param genomes: an (N, L) array (or list of lists) of 0s and 1s, or a
+            sequence of `PackedBits`
+        :return: an (N, D) array of ints, one column per segment
         """
-        return int(BinaryToIntDecoder.__binary_to_str(b), 2)
+        if len(genomes) > 0 and isinstance(genomes[0], PackedBits):
+            return np.array([self._int_values(g) for g in genomes])
+        return self._int_values(genomes)
+
+    def _int_values(self, genomes):
+        """Decode one genome (or a 2-D batch of them) into an array of
+        unsigned ints, one per segment."""
+        if isinstance(genomes, PackedBits):
+            values = []
+            offset = 0
+            for descriptor in self.descriptors:
+                values.append(genomes.field(offset, offset + descriptor))
+                offset += descriptor
+            return np.array(values, dtype=self._weights.dtype)
+
+        bits = np.asarray(genomes)[..., :self._weights.shape[0]]
+        if self._weights.dtype == object:
+            bits = bits.astype(object)
+        return bits @ self._weights
 
     @staticmethod
-    def __binary_to_str(b):
-        """Convert a vector of binary values into a simple string of binary.
+    def _segment_weights(descriptors):
+        """
+        Build the (L, D) matrix that maps a genome's bits onto its segments'
+        values, with each segment's bits weighted by descending powers of two.
 
-        For example,
+        >>> BinaryToIntDecoder._segment_weights([2, 1])
+        array([[2, 0],
+               [1, 0],
+               [0, 1]])
 
-        >>> BinaryToIntDecoder._BinaryToIntDecoder__binary_to_str([0,1,0,1])
-        '0101'
+        Segments too wide for `np.int64` fall back to Python ints.
         """
-        return "".join([str(x) for x in b])
+        wide = max(descriptors, default=0) > 62
+        weights = np.zeros((sum(descriptors), len(descriptors)),
+                           dtype=object if wide else np.int64)
+        offset = 0
+        for i, descriptor in enumerate(descriptors):
+            for j in range(descriptor):
+                weights[offset + j, i] = 2 ** (descriptor - 1 - j)
+            offset += descriptor
+        return weights
 
 
 ##############################
@@ -104,6 +137,7 @@ class BinaryToRealDecoderCommon(Decoder):
         of the binary integer to real-value decoding is the same, hence this
         class.
     """
+    memoize = True
 
     def __init__(self, *segments):
         """
@@ -148,12 +182,35 @@ class BinaryToRealDecoderCommon(Decoder):
                            zip(self.lower_bounds, self.upper_bounds,
                                cardinalities)]
 
+        self._lower_bounds = np.array(self.lower_bounds, dtype=float)
+        self._increments = np.array(self.increments, dtype=float)
+
     def decode(self, genome, *args, **kwargs):
         """Convert a list of binary values into a real-valued vector."""
-        int_values = self.binary_to_int_decoder.decode(genome)
-        values = [l + i * inc for l, i, inc in
-                  zip(self.lower_bounds, int_values, self.increments)]
-        return values
+        int_values = self.binary_to_int_decoder._int_values(genome)
+        return self._scale(int_values).tolist()
+
+    def decode_batch(self, genomes, *args, **kwargs):
+        """
+        Decode a whole batch of genomes at once.
+
+        >>> d = BinaryToRealDecoder((4, -5.12, 5.12), (4, -5.12, 5.12))
+        >>> d.decode_batch([[0, 0, 0, 0, 1, 1, 1, 1],
+        ...                 [1, 1, 1, 1, 0, 0, 0, 0]])
+        array([[-5.12,  5.12],
+               [ 5.12, -5.12]])
+
+        :param genomes: an (N, L) array (or list of lists) of 0s and 1s, or a
+            sequence of `PackedBits`
+        :return: an (N, D) array of floats
+        """
+        int_values = self.binary_to_int_decoder.decode_batch(genomes)
+        return self._scale(int_values)
+
+    def _scale(self, int_values):
+        """Map integer segment values onto their real-valued ranges."""
+        return self._lower_bounds \
+            + np.asarray(int_values, dtype=float) * self._increments
 
 
 ##############################
@@ -208,31 +265,33 @@ class BinaryToIntGreyDecoder(BinaryToIntDecoder):
     def __init__(self, *descriptors):
         super().__init__(*descriptors)
 
-    @staticmethod
-    def __gray_encode(num):
-        """
-        https://en.wikipedia.org/wiki/Gray_code#Converting_to_and_from_Gray_code
+    def _int_values(self, genomes):
+        # First decode the integers from the binary representation using
+        # regular binary decoding, then convert them from Gray code
+        return BinaryToIntGreyDecoder._gray_to_binary(
+            super()._int_values(genomes), max(self.descriptors, default=0))
 
-        :param value: integer value to be gray encoded
-        :return: gray encoded integer
+    @staticmethod
+    def _gray_to_binary(values, num_bits):
         """
-        mask = num >> 1
+        Convert Gray-coded ints to plain binary by XORing each value with
+        every right-shift of itself.  Doubling the shift each time computes
+        this prefix XOR in log2(num_bits) steps, and works on whole arrays.
 
-        while mask != 0:
-            num = num ^ mask
-            mask = mask >> 1
-
-        return num
-
-    def decode(self, genome, *args, **kwargs):
-        # First decode the integers from the binary representation using
-        # regular binary decoding.
-        values = super().decode(genome)
+        https://en.wikipedia.org/wiki/Gray_code#Converting_to_and_from_Gray_code
 
-        gray_encoded_values = [BinaryToIntGreyDecoder.__gray_encode(v) for v in
-                               values]
+        >>> BinaryToIntGreyDecoder._gray_to_binary(np.array([0b1100, 0b110]), 4)
+        array([8, 4])
 
-        return gray_encoded_values
+        :param values: an array of Gray-coded ints
+        :param num_bits: the width of the widest value
+        :return: the corresponding binary-coded ints
+        """
+        shift = 1
+        while shift < num_bits:
+            values = values ^ (values >> shift)
+            shift *= 2
+        return values
 
 
 ##############################
@@ -4,6 +4,7 @@
 """
 import random
 
+from leap_ec.binary_rep.packed import PackedBits
 from leap_ec.individual import Individual
 
 ##############################
@@ -31,4 +32,29 @@ def create_binary_sequence(length):
     def create():
         return [random.choice([0, 1]) for _ in range(length)]
 
-    return create
\ No newline at end of file
+    return create
+
+
+##############################
+# Closure create_packed_binary_sequence
+##############################
+def create_packed_binary_sequence(length):
+    """
+    A closure for initializing random `PackedBits` genomes, which store their
+    bits eight to a byte.
+
+    :param length: how many genes?
+
+    :return: a function that, when called, generates a `PackedBits` genome
+        of given length
+
+    >>> create = create_packed_binary_sequence(length=1_000_000)
+    >>> genome = create()
+    >>> len(genome), genome.words.nbytes
+    (1000000, 125000)
+    """
+
+    def create():
+        return PackedBits.random(length)
+
+    return create
@@ -4,9 +4,13 @@
 """
 from typing import Iterator
 import random
+
+import numpy as np
 from toolz import curry
 
-from leap_ec.ops import compute_expected_probability, iteriter_op
+from leap_ec.binary_rep.packed import PackedBits, positions_to_mask
+from leap_ec.ops import compute_expected_probability, iteriter_op, \
+    sample_mutation_positions
 
 
 ##############################
@@ -15,7 +19,8 @@ from leap_ec.ops import compute_expected_probability, iteriter_op
 @curry
 @iteriter_op
 def mutate_bitflip(next_individual: Iterator,
-                   expected_num_mutations: float = 1) -> Iterator:
+                   expected_num_mutations: float = 1,
+                   sparse: bool = False) -> Iterator:
     """Perform bit-flip mutation on each individual in an iterator (population).
 
     This assumes that the genomes have a binary representation.
@@ -29,13 +34,16 @@ def mutate_bitflip(next_individual: Iterator,
     :param next_individual: to be mutated
     :param expected_num_mutations: the *expected* number of mutations,
         on average
+    :param sparse: if True, sample just the positions of the genes to flip
+        (see `genome_mutate_bitflip()`)
     :return: mutated individual
     """
     while True:
         individual = next(next_individual)
 
         individual.genome = genome_mutate_bitflip(individual.genome,
-                                                  expected_num_mutations=expected_num_mutations)
+                                                  expected_num_mutations=expected_num_mutations,
+                                                  sparse=sparse)
 
         individual.fitness = None  # invalidate fitness since we have new genome
 
@@ -47,7 +55,8 @@ def mutate_bitflip(next_individual: Iterator,
 ##############################
 @curry
 def genome_mutate_bitflip(genome: list,
-                          expected_num_mutations: float = 1) -> list:
+                          expected_num_mutations: float = 1,
+                          sparse: bool = False) -> list:
     """Perform bitflip mutation on a particular genome.
 
     This function can be used by more complex operators to mutate a full population
@@ -55,8 +64,25 @@ def genome_mutate_bitflip(genome: list,
     `leap_ec.segmented.ops.apply_mutation`), etc.  This way we don't have to
     copy-and-paste the same code for related operators.
 
+    By default we draw a random number for every bit to decide whether to
+    flip it.  With `sparse=True`, we instead sample only the positions of
+    the bits to flip (see `leap_ec.ops.sample_mutation_positions()`), which
+    is much faster for long genomes with low mutation rates.  Both produce
+    the same distribution of offspring:
+
+    >>> genome_mutate_bitflip([0, 0, 0, 0], expected_num_mutations=4, sparse=True)
+    [1, 1, 1, 1]
+
+    `PackedBits` genomes are always mutated sparsely, by XORing them with a
+    mask of the bits to flip:
+
+    >>> from leap_ec.binary_rep.packed import PackedBits
+    >>> genome_mutate_bitflip(PackedBits.from_bits('0000'), expected_num_mutations=4)
+    PackedBits.from_bits('1111')
+
     :param genome: of binary digits that we will be mutating
     :param expected_num_mutations: on average how many mutations are we expecting?
+    :param sparse: if True, sample just the positions of the bits to flip
     :return: mutated genome
     """
     def bitflip(bit, probability):
@@ -73,6 +99,166 @@ def genome_mutate_bitflip(genome: list,
     probability = compute_expected_probability(expected_num_mutations,
                                                genome)
 
+    if isinstance(genome, PackedBits):
+        positions = sample_mutation_positions(len(genome), probability)
+        mask = positions_to_mask(positions, len(genome))
+        return PackedBits(genome.words ^ mask.words, len(genome))
+
+    if sparse:
+        genome = list(genome)
+        for i in sample_mutation_positions(len(genome), probability):
+            genome[i] = (genome[i] + 1) % 2
+        return genome
+
     genome = [bitflip(gene, probability) for gene in genome]
 
     return genome
+
+
+##############################
+# Function packed_uniform_crossover
+##############################
+@curry
+@iteriter_op
+def packed_uniform_crossover(next_individual: Iterator,
+                             p_swap: float = 0.5) -> Iterator:
+    """ Uniform crossover for individuals with `PackedBits` genomes.
+
+    This does the same thing as `leap_ec.ops.uniform_crossover()`, but swaps
+    bits a whole byte at a time by drawing a random mask of the bits to swap
+    (see `random_bit_mask()`).  For the default `p_swap=0.5`, that mask is
+    just one random byte per 8 bits.
+
+    >>> from leap_ec.individual import Individual
+    >>> first = Individual(PackedBits.from_bits('0000'))
+    >>> second = Individual(PackedBits.from_bits('1111'))
+    >>> result = packed_uniform_crossover(iter([first, second]), p_swap=1.0)
+    >>> next(result).genome, next(result).genome
+    (PackedBits.from_bits('1111'), PackedBits.from_bits('0000'))
+
+    :param next_individual: where we get the next individual
+    :param p_swap: how likely are we to swap each pair of genes
+    :return: two recombined individuals
+    """
+    while True:
+        parent1 = next(next_individual)
+        parent2 = next(next_individual)
+
+        length = len(parent1.genome)
+        if length != len(parent2.genome):
+            raise RuntimeError(
+                'genomes must be same length for uniform crossover')
+
+        _swap_masked(parent1, parent2, random_bit_mask(length, p_swap))
+
+        yield parent1
+        yield parent2
+
+
+def random_bit_mask(length: int, p: float) -> np.ndarray:
+    """ Draw a packed mask of `length` bits, each set with probability `p`.
+
+    When `p` is a multiple of 1/256 (such as 0.5 or 0.25), each binary digit
+    of `p` costs one random byte per 8 bits: the mask is built by combining
+    random bytes with AND (for a 0 digit) and OR (for a 1 digit), starting
+    from the least significant digit.  So `p=0.5` takes a single draw of
+    random bytes, and `p=0.75` takes two.  Any other `p` falls back on
+    drawing one random float per bit.
+
+    >>> mask = random_bit_mask(20, 0.5)
+    >>> mask.dtype, len(mask)
+    (dtype('uint8'), 3)
+    >>> random_bit_mask(12, 1.0)
+    array([255, 240], dtype=uint8)
+
+    :param length: the number of bits in the mask
+    :param p: the probability that each bit is set
+    :return: a `np.uint8` array of the packed bits, big-endian within each
+        byte, with any padding bits in the last byte cleared
+    """
+    num_bytes = (length + 7)//8
+    scaled = p*256
+    if p <= 0.0:
+        mask = np.zeros(num_bytes, dtype=np.uint8)
+    elif p >= 1.0:
+        mask = np.full(num_bytes, 0xFF, dtype=np.uint8)
+    elif scaled != int(scaled):
+        return np.packbits(np.random.random(length) < p)
+    else:
+        digits, num_digits = int(scaled), 8
+        while digits % 2 == 0:  # Trailing zero digits don't change anything
+            digits //= 2
+            num_digits -= 1
+        mask = np.zeros(num_bytes, dtype=np.uint8)
+        for _ in range(num_digits):
+            random_bytes = np.random.randint(0, 256, num_bytes, dtype=np.uint8)
+            if digits & 1:
+                mask |= random_bytes
+            else:
+                mask &= random_bytes
+            digits >>= 1
+
+    if length % 8:
+        mask[-1] &= np.uint8((0xFF << (8 - length % 8)) & 0xFF)
+    return mask
+
+
+##############################
+# Function packed_n_ary_crossover
+##############################
+@curry
+@iteriter_op
+def packed_n_ary_crossover(next_individual: Iterator,
+                           num_points: int = 1,
+                           p: float = 1.0) -> Iterator:
+    """ N-point crossover for individuals with `PackedBits` genomes.
+
+    This does the same thing as `leap_ec.ops.n_ary_crossover()`, but
+    exchanges the segments between crossover points with masked operations
+    on whole bytes, rather than by slicing and concatenating lists.
+
+    >>> from leap_ec.individual import Individual
+    >>> first = Individual(PackedBits.from_bits('0000'))
+    >>> second = Individual(PackedBits.from_bits('1111'))
+    >>> result = packed_n_ary_crossover(iter([first, second]), num_points=2)
+    >>> child1, child2 = next(result), next(result)
+    >>> child1.genome.count(1) + child2.genome.count(1)
+    4
+
+    :param next_individual: where we get the next individual from the pipeline
+    :param num_points: how many crossing points do we allow?
+    :param p: the probability of performing crossover on each pair
+    :return: two recombined individuals
+    """
+    while True:
+        parent1 = next(next_individual)
+        parent2 = next(next_individual)
+
+        # Return the parents unmodified if we're not performing crossover
+        if np.random.uniform() > p:
+            yield parent1
+            yield parent2
+            continue
+
+        length = len(parent1.genome)
+        if length < num_points or len(parent2.genome) < num_points:
+            raise RuntimeError(
+                'Invalid number of crossover points for n_ary_crossover')
+
+        # Every other segment between the crossover points gets swapped;
+        # toggling at each point and taking a running parity marks them
+        toggles = np.zeros(length, dtype=np.uint8)
+        toggles[random.sample(range(length), num_points)] = 1
+        mask = np.packbits(np.cumsum(toggles) % 2)
+        _swap_masked(parent1, parent2, mask)
+
+        yield parent1
+        yield parent2
+
+
+def _swap_masked(ind1, ind2, mask):
+    """Exchange the bits selected by `mask` between two packed genomes."""
+    words1, words2 = ind1.genome.words, ind2.genome.words
+    diff = (words1 ^ words2) & mask
+    ind1.genome = PackedBits(words1 ^ diff, len(ind1.genome))
+    ind2.genome = PackedBits(words2 ^ diff, len(ind2.genome))
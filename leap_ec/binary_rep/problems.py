@@ -4,6 +4,7 @@
 import numpy as np
 from PIL import Image, ImageOps
 
+from leap_ec.binary_rep.packed import PackedBits, popcount
 from leap_ec.problem import ScalarProblem
 
 
@@ -36,6 +37,12 @@ class MaxOnes(ScalarProblem):
         ...                   problem=p)
         >>> p.evaluate(ind.decode())
         5
+
+        `PackedBits` genomes are scored with a byte-wise popcount:
+
+        >>> from leap_ec.binary_rep.packed import PackedBits
+        >>> p.evaluate(PackedBits.from_bits([0, 0, 1, 1, 0, 1, 0, 1, 1]))
+        5
         """
         return phenome.count(1)
 
@@ -45,13 +52,33 @@ class MaxOnes(ScalarProblem):
 ##############################
 class ImageProblem(ScalarProblem):
     """A variation on `max_ones` that uses an external image file to define a
-    binary target pattern. """
+    binary target pattern.
+
+    The fitness of a genome is the number of pixels it gets right.  The
+    target is stored packed eight pixels to a byte, so that a genome can be
+    scored by XORing its packed bits against the target and counting the
+    mismatches a byte at a time.
+
+    >>> from PIL import Image
+    >>> import tempfile, os
+    >>> path = os.path.join(tempfile.mkdtemp(), 'target.png')
+    >>> Image.new('1', (4, 2), color=1).save(path)
+    >>> problem = ImageProblem(path, size=(4, 2))
+    >>> problem.evaluate([1, 1, 1, 1, 0, 0, 1, 1])
+    6
+
+    Genomes may also be NumPy arrays or `PackedBits`:
+
+    >>> problem.evaluate(PackedBits.from_bits('11110011'))
+    6
+    """
 
     def __init__(self, path, maximize=True, size=(100, 100)):
         super().__init__(maximize)
         self.size = size
         self.img = ImageProblem._process_image(path, size)
         self.flat_img = np.ndarray.flatten(np.array(self.img))
+        self.packed_img = np.packbits(self.flat_img)
 
     @staticmethod
     def _process_image(path, size):
@@ -64,5 +91,36 @@ class ImageProblem(ScalarProblem):
         assert (len(phenome) == len(self.flat_img)
                 ), f"Bad genome length: got {len(phenome)}, expected " \
                    f"{len(self.flat_img)} "
-        diff = np.logical_not(phenome ^ self.flat_img)
-        return sum(diff)
+        mismatches = popcount(self._pack(phenome) ^ self.packed_img)
+        return len(self.flat_img) - int(mismatches)
+
+    def evaluate_batch(self, phenomes):
+        """
+        Score a whole population against the image at once.
+
+        :param phenomes: an (N, L) array of bits, or a sequence of bit lists,
+            NumPy arrays, or `PackedBits`
+        :return: an array of N fitnesses
+        """
+        if isinstance(phenomes, np.ndarray):
+            assert (phenomes.ndim == 2
+                    and phenomes.shape[1] == len(self.flat_img)
+                    ), f"Bad genome shape: got {phenomes.shape}, expected " \
+                       f"(N, {len(self.flat_img)})"
+            packed = np.packbits(phenomes.astype(bool), axis=1)
+        else:
+            for phenome in phenomes:
+                assert (len(phenome) == len(self.flat_img)
+                        ), f"Bad genome length: got {len(phenome)}, " \
+                           f"expected {len(self.flat_img)} "
+            packed = np.array([self._pack(p) for p in phenomes],
+                              dtype=np.uint8).reshape(len(phenomes), -1)
+        mismatches = popcount(packed ^ self.packed_img, axis=1)
+        return len(self.flat_img) - mismatches
+
+    @staticmethod
+    def _pack(phenome):
+        """Pack a phenome's bits eight to a byte, as in `packed_img`."""
+        if isinstance(phenome, PackedBits):
+            return phenome.words
+        return np.packbits(np.asarray(phenome).astype(bool))
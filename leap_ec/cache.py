@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+    Defines `FitnessCache`, a bounded, genome-keyed store of previously
+    computed fitnesses.
+
+    With low mutation rates, many offspring come out of `clone` and mutation
+    with exactly the same genome as an individual we've already evaluated.
+    When fitness evaluation is expensive (ex. a simulation), we can skip those
+    evaluations entirely by looking the genome up in a `FitnessCache`, usually
+    via the :py:func:`~leap_ec.ops.cached_evaluate` operator.
+"""
+from collections import OrderedDict
+import pickle
+import sys
+
+import numpy as np
+
+from leap_ec.binary_rep.packed import PackedBits
+from leap_ec.context import context
+
+
+##############################
+# Function genome_key
+##############################
+def genome_key(genome):
+    """
+    Convert a genome into a hashable key that identifies its contents.
+
+    Lists and tuples (including the lists-of-lists used by segmented
+    representations) become tuples:
+
+    >>> genome_key([[0, 1], [1, 1]])
+    ((0, 1), (1, 1))
+
+    NumPy arrays are keyed by their dtype, shape, and raw bytes, so that two
+    arrays only share a key if they are exactly equal:
+
+    >>> genome_key(np.array([0.5, 1.0])) == genome_key(np.array([0.5, 1.0]))
+    True
+    >>> genome_key(np.array([0.5, 1.0])) == genome_key(np.array([0.5, 1.5]))
+    False
+
+    `PackedBits` genomes are keyed by their length and packed bytes:
+
+    >>> genome_key(PackedBits.from_bits('101'))
+    (3, b'\xa0')
+
+    Anything else is assumed to be hashable already, and is used as-is.
+
+    :param genome: the genome to key
+    :return: a hashable key
+    """
+    if isinstance(genome, np.ndarray):
+        return genome.dtype.str, genome.shape, genome.tobytes()
+    if isinstance(genome, PackedBits):
+        return genome.length, genome.words.tobytes()
+    if isinstance(genome, (list, tuple)):
+        return tuple(genome_key(g) for g in genome)
+    return genome
+
+
+def _sizeof(obj):
+    """Roughly estimate the memory used by a key or a fitness, in bytes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(_sizeof(x) for x in obj)
+    return size
+
+
+##############################
+# Class FitnessCache
+##############################
+class FitnessCache:
+    """
+    A least-recently-used cache that maps genomes to fitnesses.
+
+    >>> cache = FitnessCache(max_entries=2)
+    >>> cache.put([0, 1], 1)
+    >>> cache.put([1, 1], 2)
+    >>> cache.get([0, 1])
+    1
+
+    Adding a third entry evicts the least recently used one, which is now
+    `[1, 1]`:
+
+    >>> cache.put([0, 0], 0)
+    >>> [1, 1] in cache, [0, 1] in cache
+    (False, True)
+
+    Lookups that miss return `default`:
+
+    >>> cache.get([1, 1]) is None
+    True
+
+    Every lookup is tallied both on the cache itself and in
+    `context['leap']['cache']`:
+
+    >>> cache.hits, cache.misses
+    (1, 1)
+
+    :param max_entries: the maximum number of entries to keep, or `None` for
+        no limit
+    :param max_bytes: a rough limit on the memory used by the stored keys
+        and fitnesses, or `None` for no limit
+    :param key: a function that converts a genome into a hashable key;
+        defaults to :py:func:`genome_key`
+    :param context: the context in which to record hit and miss counts
+    """
+    def __init__(self, max_entries=None, max_bytes=None, key=genome_key,
+                 context=context):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(
+                f"max_entries must be at least 1, but got {max_entries}.")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(
+                f"max_bytes must be at least 1, but got {max_bytes}.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.key = key
+        self.context = context
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        # Maps key -> (fitness, size); the most recently used entry is last
+        self._entries = OrderedDict()
+
+    def get(self, genome, default=None):
+        """
+        Look up the fitness stored for `genome`, marking it as recently used.
+
+        :param genome: the genome to look up
+        :param default: what to return if there is no entry for `genome`
+        :return: the stored fitness, or `default`
+        """
+        k = self.key(genome)
+        entry = self._entries.get(k)
+        stats = self._stats()
+        if entry is None:
+            self.misses += 1
+            stats['misses'] += 1
+            return default
+
+        self._entries.move_to_end(k)
+        self.hits += 1
+        stats['hits'] += 1
+        return entry[0]
+
+    def put(self, genome, fitness):
+        """
+        Store the fitness of `genome`, evicting least recently used entries if
+        that puts the cache over its limits.
+
+        :param genome: the evaluated genome
+        :param fitness: its fitness
+        """
+        k = self.key(genome)
+        if k in self._entries:
+            self.nbytes -= self._entries.pop(k)[1]
+        size = _sizeof(k) + _sizeof(fitness)
+        self._entries[k] = (fitness, size)
+        self.nbytes += size
+        self._evict()
+
+    def clear(self):
+        """Remove every entry (but keep the hit and miss counts)."""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def save(self, path):
+        """
+        Write the cache's entries to disk, so that a later run can pick up
+        where this one left off with :py:meth:`load`.
+
+        The cache is stored with `pickle`, so the usual caveats apply: only
+        load files you trust.
+
+        :param path: the file to write
+        """
+        with open(path, 'wb') as f:
+            pickle.dump({'max_entries': self.max_entries,
+                         'max_bytes': self.max_bytes,
+                         'entries': self._entries}, f)
+
+    @classmethod
+    def load(cls, path, key=genome_key, context=context):
+        """
+        Read a cache that was written by :py:meth:`save`.
+
+        Caches that use a custom `key` function must be loaded with the same
+        one.
+
+        :param path: the file to read
+        :return: a new `FitnessCache`
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        cache = cls(max_entries=state['max_entries'],
+                    max_bytes=state['max_bytes'], key=key, context=context)
+        cache._entries = state['entries']
+        cache.nbytes = sum(size for _, size in cache._entries.values())
+        return cache
+
+    def _evict(self):
+        while (self.max_entries is not None
+               and len(self._entries) > self.max_entries) \
+                or (self.max_bytes is not None
+                    and self.nbytes > self.max_bytes
+                    and len(self._entries) > 1):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def _stats(self):
+        return self.context['leap'].setdefault('cache',
+                                               {'hits': 0, 'misses': 0})
+
+    def __contains__(self, genome):
+        return self.key(genome) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(max_entries={self.max_entries}, " \
+               f"max_bytes={self.max_bytes})"
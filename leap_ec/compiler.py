@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+    Compiles operator pipelines so that runs of per-individual operators are
+    executed a whole batch at a time.
+
+    In a pipeline such as
+
+    ::
+
+        [ops.tournament_selection,
+         ops.clone,
+         mutate_bitflip(expected_num_mutations=1),
+         ops.evaluate,
+         ops.pool(size=100)]
+
+    every `@iteriter_op` stage is a generator that is resumed once per
+    individual, so each offspring passes through a chain of Python generator
+    frames on its way to `pool()`.  When fitness evaluation is cheap, that
+    overhead dominates the run time.
+
+    `compile_pipeline()` recognizes a selection operator followed by a run of
+    known per-individual operators and a `pool(size=n)`, and replaces them
+    with a single stage that selects all of the parents it needs at once,
+    then applies each operator to the whole batch (evaluating it with
+    :py:meth:`~leap_ec.individual.Individual.evaluate_batch`).  Binary
+    tournaments, for instance, are all run at once as NumPy index operations
+    (see :py:func:`~leap_ec.ops.vectorized_tournament_selection`).  Any other
+    operators are left as they are, and run as the usual generator chain.
+
+    The batched stage produces offspring from the same distribution as the
+    original pipeline, but because it consumes random numbers in a different
+    order, it won't reproduce the exact same offspring for a given seed.
+"""
+import itertools
+
+from toolz import curry
+
+from leap_ec import ops
+from leap_ec.binary_rep import ops as binary_ops
+from leap_ec.individual import Individual
+from leap_ec.int_rep import ops as int_ops
+from leap_ec.real_rep import ops as real_ops
+
+
+# Maps each selection operator that we can draw many parents from at once
+# to a function that does so, or None to just draw from its iterator
+_SELECTORS = {}
+
+# Maps each per-individual operator to its batch implementation, and whether
+# it processes individuals in pairs
+_BATCH_OPERATORS = {}
+
+
+##############################
+# Function register_selector
+##############################
+def register_selector(operator, batch_selector=None):
+    """
+    Tell `compile_pipeline()` that `operator` is a selection operator (i.e. a
+    function that takes a population and returns an iterator of selected
+    individuals), so that it can draw a whole batch of parents from it at
+    once.
+
+    By default the batch is drawn by pulling `n` individuals from the
+    operator's iterator.  If given, `batch_selector(population, n, *args,
+    **kwargs)` is called instead, with any arguments that were bound to
+    `operator` in the pipeline, and must return a list of `n` individuals
+    (or `None`, to fall back on the operator's iterator after all).
+
+    :param operator: a selection operator, possibly curried
+    :param batch_selector: optional function that selects a whole batch
+    """
+    _SELECTORS[_unwrap(operator)[0]] = batch_selector
+
+
+##############################
+# Function register_batch_operator
+##############################
+def register_batch_operator(operator, batch_operator, pairwise=False):
+    """
+    Tell `compile_pipeline()` how to apply a per-individual `@iteriter_op`
+    operator to a whole list of individuals at once.
+
+    `batch_operator(individuals, *args, **kwargs)` receives a list of
+    individuals along with any arguments that were bound to `operator` in
+    the pipeline, and must return a list of the resulting individuals in
+    the same order, just as if they had been pulled through `operator` one
+    at a time.
+
+    :param operator: a per-individual operator, possibly curried
+    :param batch_operator: the function to use instead in compiled pipelines
+    :param pairwise: True if `operator` consumes and produces individuals in
+        pairs (as crossover does), so that batches must have an even length
+    """
+    _BATCH_OPERATORS[_unwrap(operator)[0]] = (batch_operator, pairwise)
+
+
+##############################
+# Function compile_pipeline
+##############################
+def compile_pipeline(pipeline):
+    """
+    Replace each run of a selection operator, known per-individual operators,
+    and `pool(size=n)` in `pipeline` with a single batched stage.
+
+    >>> from leap_ec.binary_rep.ops import mutate_bitflip
+    >>> pipeline = compile_pipeline([ops.tournament_selection,
+    ...                              ops.clone,
+    ...                              mutate_bitflip(expected_num_mutations=1),
+    ...                              ops.evaluate,
+    ...                              ops.pool(size=10)])
+    >>> pipeline
+    [BatchStage(tournament_selection, [clone, mutate_bitflip, evaluate], size=10)]
+
+    The compiled stage is an ordinary list-to-list operator:
+
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+    >>> pop = [Individual([0, 1, 1], IdentityDecoder(), MaxOnes()) for _ in range(4)]
+    >>> pop = Individual.evaluate_population(pop)
+    >>> offspring = pipeline[0](pop)
+    >>> len(offspring), all(ind.fitness is not None for ind in offspring)
+    (10, True)
+
+    Operators that the compiler doesn't recognize (such as probes) split the
+    run, and everything from the selector up to them is left untouched:
+
+    >>> from leap_ec import probe
+    >>> import sys
+    >>> pipeline = compile_pipeline([ops.tournament_selection,
+    ...                              ops.clone,
+    ...                              probe.print_individual(stream=sys.stdout),
+    ...                              ops.evaluate,
+    ...                              ops.pool(size=10)])
+    >>> len(pipeline), pipeline[0] is ops.tournament_selection
+    (5, True)
+
+    :param pipeline: a sequence of operators, as passed to
+        :py:func:`~leap_ec.algorithm.generational_ea`
+    :return: a new list of operators
+    """
+    pipeline = list(pipeline)
+    compiled = []
+    i = 0
+    while i < len(pipeline):
+        stage, length = _match_stage(pipeline, i)
+        if stage is None:
+            compiled.append(pipeline[i])
+            i += 1
+        else:
+            compiled.append(stage)
+            i += length
+
+    return compiled
+
+
+def _match_stage(pipeline, start):
+    """Try to match a selector, known operators, and a pool starting at
+    `pipeline[start]`.
+
+    :return: a `BatchStage` and the number of operators it replaces, or
+        `(None, 0)` if there is no match
+    """
+    selector = pipeline[start]
+    if _unwrap(selector)[0] not in _SELECTORS:
+        return None, 0
+
+    operators = []
+    for end in range(start + 1, len(pipeline)):
+        func, args, kwargs = _unwrap(pipeline[end])
+        if func is ops.pool.func:
+            if args or 'size' not in kwargs:
+                return None, 0
+            stage = BatchStage(selector, operators, kwargs['size'])
+            return stage, end - start + 1
+        if func not in _BATCH_OPERATORS:
+            return None, 0
+        operators.append(pipeline[end])
+
+    return None, 0
+
+
+def _unwrap(operator):
+    """:return: the function underlying a (possibly curried) operator, along
+    with any arguments bound to it"""
+    if isinstance(operator, curry):
+        return operator.func, operator.args, operator.keywords
+    return operator, (), {}
+
+
+def _name(operator):
+    return getattr(_unwrap(operator)[0], '__name__', repr(operator))
+
+
+##############################
+# Class BatchStage
+##############################
+class BatchStage:
+    """
+    A compiled pipeline stage that selects parents and passes them through
+    a sequence of operators a whole batch at a time (see
+    `compile_pipeline()`).
+
+    :param selector: the selection operator to draw parents from; it must
+        have been registered with `register_selector()`
+    :param operators: the per-individual operators to apply, in order; each
+        must have been registered with `register_batch_operator()`
+    :param size: the number of offspring to produce
+    """
+    def __init__(self, selector, operators, size):
+        self.selector = selector
+        self.operators = list(operators)
+        self.size = size
+
+        # Work backwards to find how many individuals each operator needs:
+        # pairwise operators need an even number, and discard the extra one,
+        # just as they would in a generator chain
+        self._counts = [size]
+        for operator in reversed(self.operators):
+            _, pairwise = _BATCH_OPERATORS[_unwrap(operator)[0]]
+            count = self._counts[0]
+            self._counts.insert(0, count + count % 2 if pairwise else count)
+
+    def __call__(self, population):
+        func, args, kwargs = _unwrap(self.selector)
+        batch_selector = _SELECTORS[func]
+        individuals = None
+        if batch_selector is not None:
+            individuals = batch_selector(population, self._counts[0],
+                                         *args, **kwargs)
+        if individuals is None:
+            individuals = list(itertools.islice(self.selector(population),
+                                                self._counts[0]))
+
+        for operator, count in zip(self.operators, self._counts[1:]):
+            func, args, kwargs = _unwrap(operator)
+            batch_operator, _ = _BATCH_OPERATORS[func]
+            individuals = batch_operator(individuals, *args, **kwargs)[:count]
+
+        return individuals
+
+    def __repr__(self):
+        operators = ', '.join(_name(op) for op in self.operators)
+        return f"{type(self).__name__}({_name(self.selector)}, " \
+               f"[{operators}], size={self.size})"
+
+
+##############################
+# Batch implementations of the standard operators
+##############################
+def _batch_tournament_selection(population, n, k=2):
+    """Run all `n` tournaments at once, as index arithmetic on the
+    population's fitness keys, if it has them."""
+    if Individual.sort_key_for(population) is None:
+        return None
+    selector = ops.vectorized_tournament_selection(population, k=k,
+                                                   chunk_size=n)
+    return list(itertools.islice(selector, n))
+
+
+def _batch_clone(individuals, copy_on_write=False):
+    return [individual.clone(copy_on_write=copy_on_write)
+            for individual in individuals]
+
+
+def _batch_evaluate(individuals):
+    return Individual.evaluate_batch(individuals)
+
+
+def _batch_lazy_evaluate(individuals):
+    Individual.evaluate_batch([individual for individual in individuals
+                               if individual.fitness is None])
+    return individuals
+
+
+def _batch_batch_evaluate(individuals, chunk_size=32):
+    for i in range(0, len(individuals), chunk_size):
+        Individual.evaluate_batch(individuals[i:i + chunk_size])
+    return individuals
+
+
+def _genome_mutation(genome_operator):
+    """Build a batch operator that mutates each individual's genome with
+    `genome_operator` and invalidates its fitness."""
+    def batch_operator(individuals, *args, **kwargs):
+        for individual in individuals:
+            individual.genome = genome_operator(individual.genome,
+                                                *args, **kwargs)
+            individual.fitness = None
+        return individuals
+
+    return batch_operator
+
+
+def _drain(operator):
+    """Build a batch operator that runs a list of individuals through
+    `operator`'s own generator, for operators (like crossover) whose
+    per-individual logic lives inside the generator."""
+    def batch_operator(individuals, *args, **kwargs):
+        return list(itertools.islice(
+            operator(iter(individuals), *args, **kwargs), len(individuals)))
+
+    return batch_operator
+
+
+register_selector(ops.tournament_selection, _batch_tournament_selection)
+for _selector in [ops.vectorized_tournament_selection,
+                  ops.proportional_selection,
+                  ops.rank_selection,
+                  ops.naive_cyclic_selection,
+                  ops.cyclic_selection,
+                  ops.random_selection]:
+    register_selector(_selector)
+
+register_batch_operator(ops.clone, _batch_clone)
+register_batch_operator(ops.evaluate, _batch_evaluate)
+register_batch_operator(ops.lazy_evaluate, _batch_lazy_evaluate)
+register_batch_operator(ops.batch_evaluate, _batch_batch_evaluate)
+register_batch_operator(binary_ops.mutate_bitflip,
+                        _genome_mutation(binary_ops.genome_mutate_bitflip))
+register_batch_operator(real_ops.mutate_gaussian,
+                        _genome_mutation(real_ops.genome_mutate_gaussian))
+register_batch_operator(int_ops.mutate_randint,
+                        _genome_mutation(int_ops.individual_mutate_randint))
+for _crossover in [ops.uniform_crossover,
+                   ops.n_ary_crossover,
+                   binary_ops.packed_uniform_crossover,
+                   binary_ops.packed_n_ary_crossover]:
+    register_batch_operator(_crossover, _drain(_unwrap(_crossover)[0]),
+                            pairwise=True)
@@ -71,7 +71,15 @@ class Decoder(abc.ABC):
     >>> ind.fitness
     836.4453949...
 
+    Decoders whose output depends only on the genome can set the class
+    attribute `memoize` to `True`, which lets each :py:class:`~leap.Individual`
+    cache its phenome and reuse it until its genome changes (see
+    :py:meth:`~leap_ec.individual.Individual.decode`).  This is off by
+    default, since some decoders aren't pure functions of the genome.  A
+    memoized phenome is shared by everyone who decodes the individual, so
+    callers must not modify it.
     """
+    memoize = False
 
     @abc.abstractmethod
     def decode(self, genome, *args, **kwargs):
@@ -81,6 +89,20 @@ class Decoder(abc.ABC):
         """
         pass
 
+    def decode_batch(self, genomes, *args, **kwargs):
+        """
+        Decode a whole collection of genomes at once.
+
+        This is used by :py:meth:`~leap_ec.individual.Individual.evaluate_batch`
+        to produce the phenomes it hands to a problem's `evaluate_batch()`.
+        By default we just call `decode()` on each genome, but decoders whose
+        work can be vectorized should over-ride it.
+
+        :param genomes: a sequence (or 2-D array) of genomes
+        :returns: a sequence of the corresponding phenomes
+        """
+        return [self.decode(genome, *args, **kwargs) for genome in genomes]
+
 
 ##############################
 # Class IdentityDecoder
@@ -104,6 +126,11 @@ class IdentityDecoder(Decoder):
         """
         return genome
 
+    def decode_batch(self, genomes, *args, **kwargs):
+        """:return: the input `genomes`, unchanged (so a 2-D genome matrix
+        stays a matrix)."""
+        return genomes
+
     def __repr__(self):
         return type(self).__name__ + "()"
 
@@ -123,7 +123,8 @@ def greedy_insert_into_pop(individual, pop, max_size):
     else:
         # From https://stackoverflow.com/questions/2474015/getting-the-index
         # -of-the-returned-max-or-min-item-using-max-min-on-a-list
-        index_min = min(range(len(pop)), key=pop.__getitem__)
+        key = DistributedIndividual.sort_key_for(pop) or (lambda ind: ind)
+        index_min = min(range(len(pop)), key=lambda i: key(pop[i]))
         replace_if(individual, pop, index_min)
 
 
@@ -3,13 +3,15 @@ from typing import Iterator, List
 
 from matplotlib import pyplot as plt
 import networkx as nx
+import numpy as np
 import toolz
 
 from leap_ec import ops
 from leap_ec.context import context
 from leap_ec.decoder import Decoder
+from leap_ec.individual import Individual
 from leap_ec.int_rep.initializers import create_int_vector
-from leap_ec.int_rep.ops import mutate_randint
+from leap_ec.int_rep.ops import individual_mutate_randint, mutate_randint
 from .executable import Executable
 
 
@@ -17,55 +19,147 @@ from .executable import Executable
 # Class CGPExecutable
 ##############################
 class CGPExecutable(Executable):
-    """Represented a decoded CGP circuit, which can be executed on inputs."""
+    """Represented a decoded CGP circuit, which can be executed on inputs.
+
+    The circuit is executed from a compiled `program`: a topologically ordered
+    list of `(primitive_id, input_slots)` instructions, one per *active* node
+    (i.e. per node that some output depends on).  Slot `i < num_inputs` of the
+    value buffer holds the `i`th input, and each instruction writes its result
+    to the next slot after that.  `output_slots` names the slots that hold
+    the circuit's outputs.
+
+    For example, this program computes `[not (x0 and x1), x0]`:
+
+    >>> nand = lambda x, y: not (x and y)
+    >>> executable = CGPExecutable([nand], num_inputs=2, num_outputs=2,
+    ...                            program=[(0, (0, 1))], output_slots=[2, 0])
+    >>> executable([True, True])
+    [False, True]
+
+    The `graph` view of the circuit (a `networkx.MultiDiGraph`) is only
+    built when something asks for it, such as `CGPGraphProbe`; either pass
+    one in directly, or give a `graph_factory` function that builds it.  If
+    only a `graph` is given, we compile the program from it.
+
+    An executable can also be called on a 2-D batch of inputs, with one row
+    per input vector, and then it returns a 2-D array with one row of outputs
+    per input row:
+
+    >>> executable([[True, True], [True, False]])
+    array([[False,  True],
+           [ True,  True]])
+
+    By default we just execute the circuit on each row in turn.  But if every
+    primitive works element-wise on NumPy arrays (ex. `np.logical_and`), set
+    `vectorized=True`, and we'll push each column of inputs through each node
+    in a single call:
+
+    >>> vectorized = CGPExecutable([lambda x, y: ~(x & y)], num_inputs=2, num_outputs=2,
+    ...                            program=[(0, (0, 1))], output_slots=[2, 0],
+    ...                            vectorized=True)
+    >>> vectorized(np.array([[True, True], [True, False]]))
+    array([[False,  True],
+           [ True,  True]])
+
+    Setting `bitwise=True` further promises that the primitives are bitwise
+    operations on integer words (ex. `np.bitwise_and`), which lets a
+    `TruthTableProblem` evaluate 64 rows of its table per operation.  This
+    implies `vectorized`.
+    """
 
-    def __init__(self, primitives, num_inputs, num_outputs, graph):
+    def __init__(self, primitives, num_inputs, num_outputs, graph=None,
+                 program=None, output_slots=None, graph_factory=None,
+                 vectorized=False, bitwise=False):
         assert(primitives is not None)
         assert(len(primitives) > 0)
         assert(num_inputs > 0)
         assert(num_outputs > 0)
-        assert(graph is not None)
+        assert(graph is not None or program is not None)
         self.primitives = primitives
         self.num_inputs = num_inputs
         self.num_outputs = num_outputs
-        self.graph = graph
+        self.vectorized = vectorized or bitwise
+        self.bitwise = bitwise
+        self._graph = graph
+        self._graph_factory = graph_factory
+
+        if program is None:
+            program, output_slots = CGPExecutable._compile_graph(
+                graph, num_inputs, num_outputs)
+        assert(len(output_slots) == num_outputs)
+        self.program = program
+        self.output_slots = output_slots
+
+        # Resolve the primitives once, rather than on every call
+        self._instructions = [(primitives[p_id], input_slots)
+                              for p_id, input_slots in program]
+        # We reuse the same value buffer on every call
+        self._buffer = [None] * (num_inputs + len(program))
+
+    @property
+    def graph(self):
+        """The circuit as a `networkx.MultiDiGraph`, built on first use."""
+        if self._graph is None:
+            self._graph = self._graph_factory()
+        return self._graph
 
     def __call__(self, input_):
-        assert(len(input_) == self.num_inputs)
+        if np.ndim(input_) == 2:
+            return self._call_batch(input_)
 
-        def get_sorted_input_nodes(node_id):
-            """Pull all the nodes that feed into a given node, ordered by the
-            port they feed into on the target node."""
-            in_edges = list(self.graph.in_edges(node_id, data='order'))
+        assert(len(input_) == self.num_inputs)
+        buffer = self._buffer
+        buffer[:self.num_inputs] = input_
+
+        # Compute the values of active nodes, in order so prerequisites are
+        # computed first
+        slot = self.num_inputs
+        for f, input_slots in self._instructions:
+            buffer[slot] = f(*[buffer[i] for i in input_slots])
+            slot += 1
+
+        return [buffer[i] for i in self.output_slots]
+
+    def _call_batch(self, inputs):
+        """Execute the circuit on each row of a 2-D batch of inputs."""
+        if not self.vectorized:
+            return np.array([self(row) for row in inputs])
+
+        inputs = np.asarray(inputs)
+        assert(inputs.shape[1] == self.num_inputs)
+        buffer = self._buffer
+        buffer[:self.num_inputs] = inputs.T
+
+        slot = self.num_inputs
+        for f, input_slots in self._instructions:
+            buffer[slot] = f(*[buffer[i] for i in input_slots])
+            slot += 1
+
+        # Broadcast in case an output comes from a node that returns a scalar
+        shape = (len(inputs),)
+        return np.stack([np.broadcast_to(buffer[i], shape)
+                         for i in self.output_slots], axis=1)
+
+    @staticmethod
+    def _compile_graph(graph, num_inputs, num_outputs):
+        """Compile a decoded circuit graph into a program, by numbering the
+        hidden nodes' slots in order and listing each node's input sources in
+        port order."""
+        num_hidden = len(graph.nodes) - num_inputs - num_outputs
+        program = []
+        for i in range(num_inputs, num_inputs + num_hidden):
+            p_id = graph.nodes[i]['primitive_id']
             # Sort inputs by which "port" they are supposed to feed into
-            in_edges = sorted(in_edges, key=lambda e: e[2])  # Element 2 is the 'order' attribute
-            in_nodes = [ self.graph.nodes[e[0]] for e in in_edges ]
-            return in_nodes
-
-
-        # Assign the input values
-        for i in range(self.num_inputs):
-            self.graph.nodes[i]['output'] = input_[i]
-
-        # Compute the values of hidden nodes, going in order so preprequisites are computed first
-        num_hidden = len(self.graph.nodes) - self.num_inputs - self.num_outputs
-        for i in range(self.num_inputs, self.num_inputs + num_hidden):
-            f = self.graph.nodes[i]['function']
-            in_nodes = get_sorted_input_nodes(i)
-            node_inputs = [ n['output'] for n in in_nodes ]
-            self.graph.nodes[i]['output'] = f(*node_inputs)
-
-        # Copy the output values into their nodes
-        result = []
-        for i in range(self.num_inputs + num_hidden, self.num_inputs + num_hidden + self.num_outputs):
-            in_edges = list(self.graph.in_edges(i))
-            assert(len(in_edges) == 1), f"CGP output node {i} is connected to {len(in_edges)} nodes, but must be connected to exactly 1."
-            in_node = self.graph.nodes[in_edges[0][0]]
-            oi = in_node['output']
-            self.graph.nodes[i]['output'] = oi
-            result.append(oi)
+            in_edges = sorted(graph.in_edges(i, data='order'),
+                              key=lambda e: e[2])
+            program.append((p_id, tuple(e[0] for e in in_edges)))
 
-        return result
+        output_slots = []
+        for i in range(num_inputs + num_hidden, len(graph.nodes)):
+            in_edges = list(graph.in_edges(i))
+            assert(len(in_edges) == 1), f"CGP output node {i} is connected to {len(in_edges)} nodes, but must be connected to exactly 1."
+            output_slots.append(in_edges[0][0])
+        return program, output_slots
 
 
 ##############################
@@ -83,9 +177,16 @@ class CGPDecoder(Decoder):
 
     The test_sequence `[ 0, 2, 3 ]` indicates an element that computes the 0th primitive
     (as an index of the `primitives` list) and takes its inputs from nodes 2 and 3, respectively.
+
+    If every primitive works element-wise on NumPy arrays, pass `vectorized=True` so that the
+    decoded executables evaluate whole batches of inputs at once (see `CGPExecutable`).  If they
+    are also bitwise operations on integer words, pass `bitwise=True`.
     """
+    # Compiling the circuit depends only on the genome
+    memoize = True
 
-    def __init__(self, primitives, num_inputs, num_outputs, num_layers, nodes_per_layer, max_arity, levels_back=None):
+    def __init__(self, primitives, num_inputs, num_outputs, num_layers, nodes_per_layer, max_arity, levels_back=None,
+                 vectorized=False, bitwise=False):
         assert(primitives is not None)
         assert(len(primitives) > 0)
         assert(num_inputs > 0)
@@ -100,6 +201,8 @@ class CGPDecoder(Decoder):
         self.nodes_per_layer = nodes_per_layer
         self.max_arity = max_arity
         self.levels_back = levels_back if levels_back is not None else num_layers
+        self.vectorized = vectorized
+        self.bitwise = bitwise
 
     def num_genes(self):
         """The number of genes we expect to find in each genome.  This will equal the number of outputs plus the total number
@@ -256,10 +359,118 @@ class CGPDecoder(Decoder):
         """
         return list(zip(self._min_bounds(), self._max_bounds()))
 
+    def active_nodes(self, genome):
+        """Return the IDs of the hidden nodes that at least one output
+        depends on, in ascending (and thus topological) order.
+
+        This is Miller's active-node analysis: mark the outputs' sources, then
+        walk the nodes backwards, marking the sources of each marked node.
+
+        In this 2x2 circuit, node 4 is not connected to the output:
+
+        >>> decoder = CGPDecoder([sum], num_inputs=2, num_outputs=1, num_layers=2, nodes_per_layer=2, max_arity=2)
+        >>> decoder.active_nodes([0, 0, 1,  0, 1, 1,  0, 2, 3,  0, 0, 2,  5])
+        [2, 5]
+        """
+        assert(genome is not None)
+        num_hidden = self.num_layers*self.nodes_per_layer
+        genes_per_node = self.max_arity + 1
+        active = [False]*self.num_cgp_nodes()
+        for source in self.get_output_sources(genome):
+            active[source] = True
+
+        for node_id in reversed(range(self.num_inputs, self.num_inputs + num_hidden)):
+            if active[node_id]:
+                start = (node_id - self.num_inputs)*genes_per_node + 1
+                for source in genome[start:start + self.max_arity]:
+                    active[source] = True
+
+        return [i for i in range(self.num_inputs, self.num_inputs + num_hidden)
+                if active[i]]
+
+    def active_genes(self, genome):
+        """Return the indices of the genes that affect the decoded circuit:
+        the primitive and input genes of every active node, plus the output
+        genes.  Mutating any other gene is neutral.
+
+        >>> decoder = CGPDecoder([sum], num_inputs=2, num_outputs=1, num_layers=2, nodes_per_layer=2, max_arity=2)
+        >>> decoder.active_genes([0, 0, 1,  0, 1, 1,  0, 2, 3,  0, 0, 2,  5])
+        [0, 1, 2, 9, 10, 11, 12]
+        """
+        genes_per_node = self.max_arity + 1
+        genes = []
+        for node_id in self.active_nodes(genome):
+            start = (node_id - self.num_inputs)*genes_per_node
+            genes.extend(range(start, start + genes_per_node))
+        first_output = self.num_layers*self.nodes_per_layer*genes_per_node
+        genes.extend(range(first_output, first_output + self.num_outputs))
+        return genes
+
+    def phenotype_key(self, genome):
+        """Return a hashable key that identifies the circuit a genome decodes
+        to, ignoring its inactive genes and where in the grid its active
+        nodes sit.
+
+        Use this as the `key` of a :py:class:`~leap_ec.cache.FitnessCache` to
+        share fitnesses between genomes that compute the same circuit:
+
+        >>> decoder = CGPDecoder([sum], num_inputs=2, num_outputs=1, num_layers=2, nodes_per_layer=2, max_arity=2)
+        >>> key = decoder.phenotype_key([0, 0, 1,  0, 1, 1,  0, 2, 3,  0, 0, 2,  5])
+        >>> key == decoder.phenotype_key([0, 0, 1,  0, 0, 0,  0, 0, 0,  0, 0, 2,  5])
+        True
+        """
+        program, output_slots = self._compile(genome)
+        return tuple(program), tuple(output_slots)
+
     def decode(self, genome, *args, **kwargs):
-        """Decode a linear CGP genome into an executable circuit."""
+        """Decode a linear CGP genome into an executable circuit.
+
+        Only the active nodes (see `active_nodes()`) are compiled into the
+        executable's program; its `graph` is built lazily, via `build_graph()`.
+
+        >>> nand = lambda x, y: not (x and y)
+        >>> decoder = CGPDecoder([nand], num_inputs=2, num_outputs=1, num_layers=2, nodes_per_layer=2, max_arity=2)
+        >>> executable = decoder.decode([0, 0, 1,  0, 1, 1,  0, 2, 3,  0, 2, 2,  5])
+        >>> executable.program
+        [(0, (0, 1)), (0, (2, 2))]
+        >>> executable([True, True])
+        [True]
+        """
+        program, output_slots = self._compile(genome)
+
+        # Copy the genome, so the graph reflects it even if it's changed later
+        graph_genome = list(genome)
+        return CGPExecutable(self.primitives, self.num_inputs, self.num_outputs,
+                             program=program, output_slots=output_slots,
+                             graph_factory=lambda: self.build_graph(graph_genome),
+                             vectorized=self.vectorized, bitwise=self.bitwise)
+
+    def _compile(self, genome):
+        """Compile the active nodes of a genome into a program for
+        `CGPExecutable`, and find the slots that hold its outputs."""
         assert(genome is not None)
         assert(len(genome) == self.num_genes()), f"Expected a genome of length {self.num_genes()}, but was given one of length {len(genome)}."
+        genes_per_node = self.max_arity + 1
+
+        # Give each active node the next free slot in the value buffer;
+        # the inputs occupy the first slots
+        slots = {i: i for i in range(self.num_inputs)}
+        program = []
+        for node_id in self.active_nodes(genome):
+            start = (node_id - self.num_inputs)*genes_per_node
+            p_id = genome[start]
+            assert(p_id < len(self.primitives)), f"The gene for node {node_id} specifies a primitive function id {p_id}, but that's out of range: we only have {len(self.primitives)} primitive(s)!"
+            inputs = genome[start + 1:start + genes_per_node]
+            program.append((p_id, tuple(slots[i] for i in inputs)))
+            slots[node_id] = self.num_inputs + len(program) - 1
+
+        output_slots = [slots[i] for i in self.get_output_sources(genome)]
+        return program, output_slots
+
+    def build_graph(self, genome):
+        """Build the full circuit of a linear CGP genome (including inactive
+        nodes) as a `networkx.MultiDiGraph`, for visualization and analysis."""
+        assert(genome is not None)
         all_node_ids = [i for i in range(self.num_cgp_nodes())]
 
         graph = nx.MultiDiGraph()
@@ -268,9 +479,9 @@ class CGPDecoder(Decoder):
         # Add edges connecting interior nodes to their sources
         for layer in range(self.num_layers):
             for node in range(self.nodes_per_layer):
-                # TODO Consider using Miller's pre-processing algorithm here to omit nodes that are disconnected from the circuit (making execution more efficient)
                 node_id = self.num_inputs + layer*self.nodes_per_layer + node
                 graph.nodes[node_id]['function'] = self.get_primitive(genome, layer, node)
+                graph.nodes[node_id]['primitive_id'] = genome[(layer*self.nodes_per_layer + node)*(self.max_arity + 1)]
                 inputs = self.get_input_sources(genome, layer, node)
                 # Mark each edge with an 'order' attribute so we know which port they feed into on the target node
                 graph.add_edges_from([(i, node_id, {'order': o}) for o, i in enumerate(inputs)])
@@ -280,19 +491,37 @@ class CGPDecoder(Decoder):
         output_nodes = all_node_ids[-self.num_outputs:]
         graph.add_edges_from(zip(output_sources, output_nodes))
 
-        return CGPExecutable(self.primitives, self.num_inputs, self.num_outputs, graph)
+        return graph
 
 
 ##############################
 # Function cgp_mutate
 ##############################
 def cgp_mutate(cgp_decoder,
-                   expected_num_mutations: float = 1):
+                   expected_num_mutations: float = 1,
+                   neutral: bool = False):
     """A special integer-vector mutation operator that respects the constraints on valid genomes
     that are implied by the parameters of the given CGPDecoder.
+
+    Most CGP mutations only touch inactive genes, and leave the circuit unchanged.  With
+    `neutral=True`, the operator makes its own (copy-on-write) clone of each incoming individual,
+    so use it *in place of* `ops.clone`.  Offspring whose mutations only changed inactive genes
+    (see `CGPDecoder.active_genes()`) then keep their parent's fitness.  Pair it with
+    `ops.lazy_evaluate` to skip evaluating them:
+
+    >>> from leap_ec.individual import Individual
+    >>> decoder = CGPDecoder([sum], num_inputs=2, num_outputs=1, num_layers=2, nodes_per_layer=2, max_arity=2)
+    >>> parent = Individual([0, 0, 1,  0, 1, 1,  0, 2, 3,  0, 0, 2,  5])
+    >>> parent.fitness = 1.0
+    >>> child = next(cgp_mutate(decoder, expected_num_mutations=0, neutral=True)(iter([parent])))
+    >>> child.fitness, child is parent
+    (1.0, False)
     """
     assert(cgp_decoder is not None)
 
+    if neutral:
+        return _neutral_cgp_mutate(cgp_decoder, expected_num_mutations)
+
     mutator = mutate_randint(bounds=cgp_decoder.bounds(), expected_num_mutations=expected_num_mutations)
 
     @ops.iteriter_op
@@ -302,6 +531,32 @@ def cgp_mutate(cgp_decoder,
     return mutate
 
 
+def _neutral_cgp_mutate(cgp_decoder, expected_num_mutations):
+    """Build the `neutral=True` version of `cgp_mutate()`."""
+    bounds = cgp_decoder.bounds()
+
+    @ops.iteriter_op
+    def mutate(next_individual: Iterator):
+        for parent in next_individual:
+            child = parent.clone(copy_on_write=True)
+            child.genome = individual_mutate_randint(child.genome, bounds,
+                                                     expected_num_mutations=expected_num_mutations)
+
+            if parent.fitness is not None:
+                active = set(cgp_decoder.active_genes(parent.genome))
+                if not any(i in active for i, (a, b) in enumerate(zip(parent.genome, child.genome))
+                           if a != b):
+                    # Only inactive genes changed, so the circuit is the same
+                    child.fitness = parent.fitness
+                    for attr in ('is_viable', 'exception'):
+                        if hasattr(parent, attr):
+                            setattr(child, attr, getattr(parent, attr))
+
+            yield child
+
+    return mutate
+
+
 ##############################
 # Function create_cgp_vector
 ##############################
@@ -339,7 +594,7 @@ class CGPGraphProbe():
         step = self.context['leap']['generation']
 
         if step % self.modulo == 0:
-            best = max(population)
+            best = max(population, key=Individual.sort_key_for(population))
             plt.cla()
             # TODO The default network viz is just a jumble of nodes; not helpful
             nx.draw(best.decode().graph, ax=self.ax)
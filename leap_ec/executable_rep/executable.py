@@ -132,6 +132,16 @@ class ArgmaxExecutable(Executable):
 
     >>> wrapped([1, 1])
     2
+
+    Given a 2-D batch of inputs (if the wrapped executable supports them),
+    we return the index of the highest output in each row:
+
+    >>> wrapped = ArgmaxExecutable(lambda x: x)
+    >>> wrapped(np.array([[1, 5, 2], [7, 0, 3]]))
+    array([1, 0])
+
+    If the wrapped executable is a sequence of executables (as a
+    population-level executable from `decode_batch()` is), so is this one.
     """
     def __init__(self, wrapped_executable):
         assert(wrapped_executable is not None)
@@ -142,10 +152,16 @@ class ArgmaxExecutable(Executable):
         #print(f"I: {input_}")
         value = self.wrapped_executable(input_)
         #print(f"V: {value}")
-        converted = np.argmax(value)
+        converted = np.argmax(value, axis=-1)
         #print(f"C: {converted}")
         return converted
 
+    def __len__(self):
+        return len(self.wrapped_executable)
+
+    def __getitem__(self, i):
+        return ArgmaxExecutable(self.wrapped_executable[i])
+
 
 ########################
 # Class WrapperDecoder
@@ -159,14 +175,28 @@ class WrapperDecoder(Decoder):
     whose output is governed by a softmax layer (i.e. a distribution),
     we can use this class to decorate them with an `ArgmaxExecutable` to 
     transform their output into an integer.
+
+    Phenomes are memoized if the wrapped decoder's are (the decorator is
+    assumed not to add any state of its own).
     """
     def __init__(self, wrapped_decoder, decorator):
         assert(wrapped_decoder is not None)
         assert(decorator is not None)
         self.wrapped_decoder = wrapped_decoder
         self.decorator = decorator
+        self.memoize = getattr(wrapped_decoder, 'memoize', False)
 
     def decode(self, genome, *args, **kwargs):
         value = self.wrapped_decoder.decode(genome)
         converted = self.decorator(value)
         return converted
+
+    def decode_batch(self, genomes, *args, **kwargs):
+        """Decode a batch of genomes with the wrapped decoder's
+        `decode_batch()`.  If it returns a single population-level executable
+        (i.e. a callable sequence of executables), we decorate that as a
+        whole; otherwise we decorate each phenome."""
+        values = self.wrapped_decoder.decode_batch(genomes)
+        if callable(values):
+            return self.decorator(values)
+        return [self.decorator(v) for v in values]
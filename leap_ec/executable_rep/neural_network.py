@@ -30,8 +30,18 @@ def relu(x):
 ##############################
 def softmax(x):
     """A softmax activation function.  Accepts array-like input and normalizes
-    each element relative to the others."""
-    return np.exp(x)/np.sum(np.exp(x))
+    each element relative to the others.
+
+    For 2-D (or higher) inputs, each row (i.e. the last axis) is normalized
+    separately, so a whole batch of outputs can be passed at once:
+
+    >>> softmax(np.array([[0.0, 0.0], [0.0, np.log(3)]]))
+    array([[0.5 , 0.5 ],
+           [0.25, 0.75]])
+    """
+    # Shifting by the max doesn't change the result, but avoids overflow
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e/np.sum(e, axis=-1, keepdims=True)
 
 
 ##############################
@@ -59,6 +69,7 @@ class SimpleNeuralNetworkDecoder():
         so the number of weights at each layer will be set to 1 greater
         than the number of inputs you specify for that layer.
     """
+    memoize = True
 
     def __init__(self, shape: Tuple[int], activation=sigmoid):
         assert(shape is not None)
@@ -81,6 +92,7 @@ class SimpleNeuralNetworkDecoder():
         """Decode a genome into a `SimpleNeuralNetworkExecutable`."""
         if len(genome) != self.length:
             raise ValueError(f"Expected a genome of length {self.length}, but received one of {len(genome)}.")
+        genome = np.asarray(genome)
 
         # Extract each layer's weight matrix from the linear genome
         start = 0
@@ -94,6 +106,33 @@ class SimpleNeuralNetworkDecoder():
 
         return SimpleNeuralNetworkExecutable(weight_matrices, self.activation)
 
+    def decode_batch(self, genomes, *args, **kwargs):
+        """Decode a whole population of genomes into one
+        `StackedNeuralNetworkExecutable`, whose weights are stacked into
+        3-D tensors so that every network can be run in a single call.
+
+        >>> dec = SimpleNeuralNetworkDecoder([ 2, 1 ])
+        >>> nets = dec.decode_batch([[1, 1, 0], [1, -1, 0]])
+        >>> len(nets), nets.weight_tensors[0].shape
+        (2, (2, 3, 1))
+
+        :param genomes: a sequence (or 2-D array) of genomes
+        :return: a `StackedNeuralNetworkExecutable`, which also acts as a
+            sequence of the individual networks
+        """
+        genomes = np.asarray(genomes)
+        if genomes.ndim != 2 or genomes.shape[1] != self.length:
+            raise ValueError(f"Expected genomes of length {self.length}, but received an array of shape {genomes.shape}.")
+
+        start = 0
+        weight_tensors = []
+        for num_inputs, num_outputs in self.dimensions:
+            end = start + num_inputs*num_outputs
+            weight_tensors.append(np.reshape(genomes[:, start:end], (len(genomes), num_inputs, num_outputs)))
+            start = end
+
+        return StackedNeuralNetworkExecutable(weight_tensors, self.activation)
+
 
 ##############################
 # Class SimpleNeuralNetworkExecutable
@@ -118,6 +157,18 @@ class SimpleNeuralNetworkExecutable(Executable):
     ...             np.random.uniform((n_hidden2 + 1, n_outputs)) ]
     >>> nn = neural_network.SimpleNeuralNetworkExecutable(weights, neural_network.sigmoid)
 
+    The network can be called on a single input vector, or on a (B, inputs)
+    matrix with one input vector per row, in which case it returns a
+    (B, outputs) matrix:
+
+    >>> nn = neural_network.SimpleNeuralNetworkExecutable([ np.array([[1.0], [2.0], [0.5]]) ],
+    ...                                                   neural_network.relu)
+    >>> nn([1, 1])
+    array([3.5])
+    >>> nn([[1, 1], [0, 1], [-1, -1]])
+    array([[3.5],
+           [2.5],
+           [0. ]])
     """
     def __init__(self, weight_matrices, activation):
         assert(weight_matrices is not None)
@@ -127,13 +178,64 @@ class SimpleNeuralNetworkExecutable(Executable):
 
     def __call__(self, input_):
         assert(input_ is not None)
-        signal = np.array(input_)
-        #print(f"\n\nINPUT\n{signal.tolist()}")
+        signal = np.asarray(input_)
         for W in self.weight_matrices:
-            signal = np.append(signal, 1.0) # Add a constant bias unit to the input
-            #print(f"\n\n\nWEIGHTS\n{W.tolist()}")
-            signal = self.activation(np.dot(signal, W))
-            assert(len(signal) > 0)
-            #print(f"\n\n\nOUTPUT\n{signal.tolist()}")
+            # The last row of each matrix holds the weights of a constant
+            # bias unit, so we add it rather than appending a 1 to the input
+            signal = self.activation(signal @ W[:-1] + W[-1])
+            assert(signal.shape[-1] > 0)
 
         return signal
+
+
+##############################
+# Class StackedNeuralNetworkExecutable
+##############################
+class StackedNeuralNetworkExecutable(Executable):
+    """A whole population of `SimpleNeuralNetworkExecutable`s with the same
+    architecture, whose weight matrices are stacked into 3-D tensors so
+    that every network can be run in one call.
+
+    Call it with a (P, inputs) matrix holding one input vector for each of
+    the P networks (or a (P, B, inputs) tensor holding a batch for each),
+    and it returns a (P, outputs) matrix (or a (P, B, outputs) tensor):
+
+    >>> nets = StackedNeuralNetworkExecutable([ np.array([ [[1.0], [0.0]],
+    ...                                                    [[2.0], [1.0]] ]) ], relu)
+    >>> nets([[3.0], [3.0]])
+    array([[3.],
+           [7.]])
+
+    It also acts as a sequence of the individual networks:
+
+    >>> nets[1]([3.0])
+    array([7.])
+
+    :param weight_tensors: one (P, inputs + 1, outputs) tensor per layer
+    :param activation: the activation function
+    """
+    def __init__(self, weight_tensors, activation):
+        assert(weight_tensors is not None)
+        assert(len(weight_tensors) > 0)
+        assert(activation is not None)
+        self.weight_tensors = weight_tensors
+        self.activation = activation
+
+    def __call__(self, input_):
+        assert(input_ is not None)
+        signal = np.asarray(input_)
+        single = (signal.ndim == 2)
+        if single:
+            signal = signal[:, np.newaxis, :]
+
+        for W in self.weight_tensors:
+            # (P, B, inputs) @ (P, inputs, outputs) -> (P, B, outputs)
+            signal = self.activation(np.matmul(signal, W[:, :-1]) + W[:, np.newaxis, -1])
+
+        return signal[:, 0, :] if single else signal
+
+    def __len__(self):
+        return len(self.weight_tensors[0])
+
+    def __getitem__(self, i):
+        return SimpleNeuralNetworkExecutable([ W[i] for W in self.weight_tensors ], self.activation)
@@ -1,5 +1,9 @@
+from copy import deepcopy
+import itertools
+
 import numpy as np
 
+from leap_ec.binary_rep.packed import popcount
 from leap_ec.real_rep.problems import ScalarProblem
 
 ##############################
@@ -13,14 +17,39 @@ class EnvironmentProblem(ScalarProblem):
     :param int steps: The number of steps to run the simulation for within each run.
     :param environment: A simulation environment corresponding to the OpenAI Gym environment interface.
     :param behavior_fitness: A function 
+    :param bool vectorized: If True, step independent copies of the environment
+        in lockstep, so that all of the runs (see `evaluate()`), or all the runs of
+        a whole population (see `evaluate_batch()`), are simulated together, with
+        one executable call per timestep.
+
+    For example, here's a tiny environment where the agent is rewarded for
+    choosing action 1, and the episode ends after the third step:
+
+    >>> class CountingEnvironment:
+    ...     def reset(self):
+    ...         self.t = 0
+    ...         return [0.0]
+    ...     def step(self, action):
+    ...         self.t += 1
+    ...         return [float(self.t)], float(action), self.t >= 3, {}
+
+    In vectorized mode, the executable receives a 2-D batch of observations
+    (one row per run), and must return one action per row:
+
+    >>> problem = EnvironmentProblem(runs=4, steps=10, environment=CountingEnvironment(),
+    ...                              fitness_type='reward', gui=False, vectorized=True)
+    >>> problem.evaluate(lambda observations: np.ones(len(observations)))
+    3.0
     """
 
     def __init__(self, runs: int, steps: int, environment, fitness_type: str,
-                 gui: bool, stop_on_done=True, maximize=True):
+                 gui: bool, stop_on_done=True, maximize=True, vectorized=False):
         assert(runs > 0)
         assert(steps > 0)
         assert(environment is not None)
         assert(fitness_type is not None)
+        if vectorized and gui:
+            raise ValueError("The GUI can't be used with vectorized=True.")
         super().__init__(maximize)
         self.runs = runs
         self.steps = steps
@@ -28,6 +57,9 @@ class EnvironmentProblem(ScalarProblem):
         self.environment._max_episode_steps = steps
         self.stop_on_done = stop_on_done
         self.gui = gui
+        self.vectorized = vectorized
+        # Copies of the environment for vectorized rollouts, created as needed
+        self._environments = []
         if fitness_type == 'reward':
             self.fitness = EnvironmentProblem._reward_fitness
         elif fitness_type == 'survival':
@@ -49,6 +81,10 @@ class EnvironmentProblem(ScalarProblem):
     def evaluate(self, executable):
         """Run the environmental simulation using `executable` as a controller,
         and use the resulting observations & rewards to compute a fitness value."""
+        if self.vectorized:
+            observations, rewards = self._lockstep_rollouts([executable])
+            return self.fitness(observations, rewards)
+
         observations = []
         rewards = []
         for r in range(self.runs):
@@ -68,6 +104,85 @@ class EnvironmentProblem(ScalarProblem):
             rewards.append(run_rewards)
         return self.fitness(observations, rewards)
 
+    def evaluate_batch(self, executables):
+        """Evaluate a whole population of controllers.
+
+        In vectorized mode, every run of every controller is simulated in
+        lockstep.  `executables` may be a sequence of executables, which are
+        each called on a (runs, ...) batch of observations at every step, or
+        a single population-level executable (such as a
+        :py:class:`~leap_ec.executable_rep.neural_network.StackedNeuralNetworkExecutable`),
+        which is called once per step on a (P, runs, ...) batch.
+
+        :param executables: the controllers to evaluate
+        :return: a list of fitnesses, one per controller
+        """
+        if not self.vectorized:
+            return [self.evaluate(executable) for executable in executables]
+
+        observations, rewards = self._lockstep_rollouts(executables)
+        fitnesses = []
+        for p in range(len(executables)):
+            lanes = slice(p*self.runs, (p + 1)*self.runs)
+            fitnesses.append(self.fitness(observations[lanes], rewards[lanes]))
+        return fitnesses
+
+    def _lockstep_rollouts(self, executables):
+        """Simulate `self.runs` episodes for each controller in
+        `executables`, stepping all of the environments together.
+
+        Episodes that end early (with `stop_on_done`) stop being stepped, but
+        keep their final observation in the batch, so the batch's shape never
+        changes; their actions are ignored.
+
+        :return: the lists of observations and rewards for every episode,
+            controller by controller
+        """
+        num_executables = len(executables)
+        num_lanes = num_executables*self.runs
+        environments = self._get_environments(num_lanes)
+        current = [env.reset() for env in environments]
+        observations = [[o] for o in current]
+        rewards = [[] for _ in range(num_lanes)]
+        active = [True]*num_lanes
+
+        for t in range(self.steps):
+            if not any(active):
+                break
+            batch = np.array(current)
+            if callable(executables):
+                # A population-level controller
+                batch = batch.reshape((num_executables, self.runs) + batch.shape[1:])
+                actions = np.asarray(executables(batch))
+                actions = actions.reshape((num_lanes,) + actions.shape[2:])
+            else:
+                actions = []
+                for p, executable in enumerate(executables):
+                    actions.extend(executable(batch[p*self.runs:(p + 1)*self.runs]))
+
+            for i, env in enumerate(environments):
+                if not active[i]:
+                    continue
+                observation, reward, done, info = env.step(actions[i])
+                current[i] = observation
+                observations[i].append(observation)
+                rewards[i].append(reward)
+                if self.stop_on_done and done:
+                    active[i] = False
+
+        return observations, rewards
+
+    def _get_environments(self, n):
+        """Return `n` independent copies of the environment, creating more as
+        needed.  Each new copy gets its own random seed, if the environment
+        supports seeding, so that the runs don't all play out the same way."""
+        while len(self._environments) < n:
+            env = deepcopy(self.environment)
+            if hasattr(env, 'seed'):
+                env.seed(np.random.randint(2**31))
+            self._environments.append(env)
+        return self._environments[:n]
+
 
 ##############################
 # Class TruthTableProblem
@@ -78,6 +193,15 @@ class TruthTableProblem(ScalarProblem):
 
     Both the executable we receive and the `boolean_function` we compare against should return 
     a list of 1 or more outputs.
+
+    The target function's outputs are computed once, when the problem is
+    created, and stored bit-sliced: each output column is packed into
+    `np.uint64` words, with row `r` of the table in bit `r % 64` of word
+    `r // 64`.  The input columns are stored the same way, so that an
+    executable made of bitwise primitives can compute 64 rows of the table
+    per operation (see `evaluate()`).  Tables for executables that aren't
+    bitwise are only built the first time such an executable is evaluated,
+    so that large bit-sliced tables don't pay for them.
     """
 
     def __init__(self, boolean_function, num_inputs, num_outputs, maximize=True):
@@ -89,6 +213,19 @@ class TruthTableProblem(ScalarProblem):
         self.function = boolean_function
         self.num_inputs = num_inputs
         self.num_outputs = num_outputs
+        self.num_rows = 2**num_inputs
+
+        # A mask of the bits that hold real rows (tables with fewer than 64
+        # rows only fill part of their one word)
+        self._valid_bits = np.uint64((1 << min(self.num_rows, 64)) - 1)
+        self._input_words = np.stack([TruthTableProblem._bitsliced_column(num_inputs, j)
+                                      for j in range(num_inputs)], axis=1)
+        self._expected_words = self._compute_expected_words()
+
+        # Built on first use by the vectorized and row-by-row paths
+        self._input_table_cache = None
+        self._expected_table_cache = None
+        self._expected_outputs_cache = None
 
     def evaluate(self, executable):
         """
@@ -126,32 +263,149 @@ class TruthTableProblem(ScalarProblem):
         >>> problem.evaluate(lambda x: [ x[0] and x[1], x[0] or x[1] ])
         1.0
 
+        Executables that have a `vectorized` attribute set to True (such as
+        those from a vectorized `CGPDecoder`) are called just once, on the
+        whole truth table as a 2-D array with one row per entry, and must
+        return a 2-D array of outputs:
+
+        >>> from leap_ec.executable_rep.cgp import CGPDecoder
+        >>> decoder = CGPDecoder([np.logical_and, np.logical_or], num_inputs=3, num_outputs=1,
+        ...                      num_layers=2, nodes_per_layer=1, max_arity=2, vectorized=True)
+        >>> problem = TruthTableProblem(lambda x: [ (x[0] and x[1]) or x[2] ], num_inputs=3, num_outputs=1)
+        >>> problem.evaluate(decoder.decode([0, 0, 1,  1, 3, 2,  4]))
+        1.0
+
+        Executables with a `bitwise` attribute set to True are instead called
+        on the bit-sliced table: a 2-D `np.uint64` array with one column per
+        input, where each word holds 64 rows.  They must return an array
+        with one column of words per output, and are scored by XORing those
+        against the target and counting the mismatched bits:
+
+        >>> decoder = CGPDecoder([np.bitwise_and, np.bitwise_or], num_inputs=3, num_outputs=1,
+        ...                      num_layers=2, nodes_per_layer=1, max_arity=2, bitwise=True)
+        >>> problem.evaluate(decoder.decode([0, 0, 1,  1, 3, 2,  4]))
+        1.0
+
+        All other executables are called on one row at a time, and their
+        outputs are compared with the target function's outputs as they are
+        (so a target that returns something other than Booleans or 0/1
+        must be matched exactly).
         """
         assert(executable is not None)
         assert(callable(executable))
-        input_samples = self._enumerate_tt(self.num_inputs)
+
+        if getattr(executable, 'bitwise', False):
+            observed = np.asarray(executable(self._input_words), dtype=np.uint64)
+            # A row is wrong if any of its outputs is wrong
+            wrong = np.bitwise_or.reduce(observed ^ self._expected_words, axis=1)
+            wrong[-1] &= self._valid_bits
+            num_wrong = popcount(wrong.view(np.uint8))
+            return float(self.num_rows - num_wrong)/self.num_rows
+
+        if getattr(executable, 'vectorized', False):
+            observed = np.asarray(executable(self._input_table()))
+            return float(np.mean(np.all(observed == self._expected_table(), axis=1)))
 
         score = 0
-        for input_ in input_samples:
-            expected = self.function(input_)
-            assert(hasattr(expected, '__len__')), "The function given to a TruthTableProblem must return a list of outputs with length 1 or greater."
-            assert(len(expected) > 0), f"The function given to TruthTableProblem must return a list of outputs with length 1 or greater, but its length was {len(expected)}."
+        for input_, expected in zip(self._enumerate_tt(self.num_inputs), self._expected_outputs()):
             observed = executable(input_)
             if observed == expected:
                 score += 1
 
-        return score/len(input_samples)
+        return score/self.num_rows
+
+    def _compute_expected_words(self):
+        """Evaluate the Boolean function on every row of the truth table, and
+        pack its outputs into bit-sliced words."""
+        num_words = (self.num_rows + 63)//64
+        bits = np.zeros((self.num_outputs, 64*num_words), dtype=bool)
+        for r, input_ in enumerate(self._enumerate_tt(self.num_inputs)):
+            output = self.function(input_)
+            assert(hasattr(output, '__len__')), "The function given to a TruthTableProblem must return a list of outputs with length 1 or greater."
+            assert(len(output) > 0), f"The function given to TruthTableProblem must return a list of outputs with length 1 or greater, but its length was {len(output)}."
+            assert(len(output) == self.num_outputs), f"The function given to TruthTableProblem returned {len(output)} outputs, but num_outputs is {self.num_outputs}."
+            bits[:, r] = output
+
+        words = np.packbits(bits, axis=1, bitorder='little')
+        return words.view('<u8').astype(np.uint64).T
+
+    def _expected_outputs(self):
+        """Return the Boolean function's outputs for each row of the truth
+        table, exactly as it returned them (built on first use)."""
+        if self._expected_outputs_cache is None:
+            self._expected_outputs_cache = [self.function(input_) for input_
+                                            in self._enumerate_tt(self.num_inputs)]
+        return self._expected_outputs_cache
+
+    def _expected_table(self):
+        """Return the Boolean function's outputs as the rows of a Boolean
+        array, one row per row of the truth table (built on first use)."""
+        if self._expected_table_cache is None:
+            self._expected_table_cache = self._unpack(self._expected_words)
+        return self._expected_table_cache
+
+    def _input_table(self):
+        """Return every input permutation as the rows of a Boolean array, in
+        the same order as `_enumerate_tt()` (built on first use).
+
+        >>> TruthTableProblem(lambda x: x, num_inputs=2, num_outputs=2)._input_table()
+        array([[False, False],
+               [False,  True],
+               [ True, False],
+               [ True,  True]])
+        """
+        if self._input_table_cache is None:
+            self._input_table_cache = self._unpack(self._input_words)
+        return self._input_table_cache
+
+    def _unpack(self, words):
+        """Unpack bit-sliced columns into a Boolean array with one row per
+        row of the truth table, one column at a time so that no temporary is
+        larger than a single column."""
+        table = np.empty((self.num_rows, words.shape[1]), dtype=bool)
+        for j in range(words.shape[1]):
+            column = words[:, j].astype('<u8').view(np.uint8)
+            bits = np.unpackbits(column, bitorder='little')[:self.num_rows]
+            table[:, j] = bits.view(bool)
+        return table
+
+    @staticmethod
+    def _bitsliced_column(num_inputs, j):
+        """Build the `j`th input column of the truth table, bit-sliced into
+        `np.uint64` words.
+
+        Input `j` alternates between runs of `2**(num_inputs - 1 - j)` zeros
+        and ones, so we can build each word directly rather than building
+        the whole table first.  Runs shorter than a word repeat the same
+        pattern in every word:
+
+        >>> hex(TruthTableProblem._bitsliced_column(8, 7)[0])
+        '0xaaaaaaaaaaaaaaaa'
+
+        while longer runs fill whole words with zeros or ones:
+
+        >>> TruthTableProblem._bitsliced_column(8, 0)
+        array([                   0,                    0, 18446744073709551615,
+               18446744073709551615], dtype=uint64)
+        """
+        shift = num_inputs - 1 - j
+        num_words = (2**num_inputs + 63)//64
+        if shift >= 6:
+            first_rows = np.arange(num_words, dtype=np.int64)*64
+            on = ((first_rows >> shift) & 1).astype(bool)
+            return np.where(on, np.uint64(2**64 - 1), np.uint64(0))
+
+        pattern = sum(1 << b for b in range(64) if (b >> shift) & 1)
+        return np.full(num_words, pattern, dtype=np.uint64)
 
     @staticmethod
     def _enumerate_tt(num_inputs):
-        """Generate input permutations for a complex truth table."""
-        # TODO Rewriting this as a generator function would save a lot of memory on big tables.
-        assert(num_inputs > 0)
-        if num_inputs == 1:
-            return [[0], [1]]
-        else:
-            tt_minus_1 = TruthTableProblem._enumerate_tt(num_inputs - 1)
-            zeros = [ [0] + row for row in tt_minus_1 ]
-            ones = [ [1] + row for row in tt_minus_1 ]
-            return zeros + ones
+        """Generate the input permutations of a truth table, one row at a
+        time.
 
+        >>> list(TruthTableProblem._enumerate_tt(2))
+        [[0, 0], [0, 1], [1, 0], [1, 1]]
+        """
+        assert(num_inputs > 0)
+        for row in itertools.product([0, 1], repeat=num_inputs):
+            yield list(row)
@@ -7,6 +7,7 @@ from matplotlib import pyplot as plt
 from matplotlib import patches
 
 from leap_ec.decoder import Decoder
+from leap_ec.individual import Individual
 from leap_ec.executable_rep.executable import Executable
 
 ##############################
@@ -16,6 +17,9 @@ class PittRulesDecoder(Decoder):
     """Construct a Pitt-approach rule system (phenotype) out of a real-valued 
     genome.
     """
+    # The executables we build start with empty memory registers, so they
+    # depend only on the genome
+    memoize = True
     def __init__(self, input_space, output_space, priority_metric,
                  num_memory_registers):
         assert (input_space is not None)
@@ -101,6 +105,15 @@ class PittRulesExecutable(Executable):
         self.priorities = [self.__priority(r, rule, priority_metric) for
                            (r, rule) in enumerate(rules)]
 
+        # Pack each rule's condition bounds into arrays once, so that we can
+        # match every rule against an input at once
+        packed = np.asarray(rules, dtype=float)
+        num_conditions = self.num_inputs + self.num_memory
+        self._low = packed[:, 0:2*num_conditions:2]
+        self._high = packed[:, 1:2*num_conditions:2]
+        # Treat an inconsistent condition like a "wildcard": it matches anything
+        self._wildcard = self._low > self._high
+
     def __priority(self, rule_order, rule, priority_metric):
         """Compute the priority value to a given rule."""
         if priority_metric == PittRulesExecutable.PriorityMetric.RULE_ORDER:
@@ -113,32 +126,27 @@ class PittRulesExecutable(Executable):
             raise ValueError(
                 'Unrecognized priority_metric "{0}".'.format(priority_metric))
 
+    def __match_scores(self, all_input):
+        """Compute every rule's match score for an input (or for each row of
+        a 2-D batch of inputs): the squared distance from the input to the
+        region the rule covers, where wildcard conditions match anything.
+
+        :return: an array of scores with one entry per rule (or a 2-D array
+            with one row of scores per input)
+        """
+        # TODO Normalize this, in case the possible ranges differ greatly
+        x = np.asarray(all_input, dtype=float)[..., np.newaxis, :]
+        within = (x >= self._low) & (x <= self._high)
+        diff = np.minimum(np.abs(self._low - x), np.abs(self._high - x))
+        diff = np.where(within | self._wildcard, 0.0, diff)
+        return np.sum(diff*diff, axis=-1)  # Distance w/o sqrt
+
     def __match_set(self, input):
         """Build the match set for a set of rules."""
-
         all_input = np.append(input, self.memory_registers)
-        best_match_score = -1
-        match_list = []  # indices of matchedrules
-
-        for (r, rule) in enumerate(self.rules):
-            match_score = 0
-            for c in range(len(all_input)):  # Loop through all conditions
-                # TODO Normalize this, in case the possible ranges
-                # differ greatly
-                low, high = (rule[c * 2], rule[c * 2 + 1])
-                if low > high:
-                    diff = 0  # Treat an inconsistent condition like a "wildcard": it matches antyhing
-                elif all_input[c] >= low and all_input[c] <= high:
-                    diff = 0  # Within range
-                else:
-                    diff = min(abs(low - all_input[c]), abs(high - all_input[c]))
-                match_score += diff * diff  # Distance w/o sqrt
-
-            if match_list == [] or match_score < best_match_score:
-                best_match_score = match_score
-                match_list = [r]
-            elif match_score == best_match_score:
-                match_list.append(r)
+        scores = self.__match_scores(all_input)
+        best_match_score = scores.min()
+        match_list = np.flatnonzero(scores == best_match_score).tolist()
         return match_list, best_match_score
 
     def __fire(self, rule_index):
@@ -201,10 +209,39 @@ class PittRulesExecutable(Executable):
         >>> rules([0.1, 0.1])
         [0, 1]
 
+        Given a 2-D batch of inputs, with one input per row, we match every
+        row against every rule at once and return an array of outputs:
+
+        >>> rules(np.array([[0.1, 0.1], [0.9, 0.9], [0.5, 0.5]]))
+        array([[0, 1],
+               [1, 0],
+               [0, 1]])
+
+        (Rule systems with memory registers process the rows in order, since
+        each firing may change the memory the next row is matched with.)
         """
+        if np.ndim(input_) == 2:
+            return self.__call_batch(input_)
+
         # Compute the match set
         match_list, best_match_score = self.__match_set(input_)
-
+        return self.__resolve(match_list, best_match_score)
+
+    def __call_batch(self, inputs):
+        """Compute the outputs for each row of a 2-D batch of inputs."""
+        if self.num_memory > 0:
+            return np.array([self(row) for row in inputs])
+
+        scores = self.__match_scores(inputs)
+        best_match_scores = scores.min(axis=1)
+        outputs = []
+        for row_scores, best_match_score in zip(scores, best_match_scores):
+            match_list = np.flatnonzero(row_scores == best_match_score).tolist()
+            outputs.append(self.__resolve(match_list, best_match_score))
+        return np.array(outputs)
+
+    def __resolve(self, match_list, best_match_score):
+        """Pick a winner from the match set and fire it."""
         # If our best-matching rules are exact matches
         if best_match_score == 0:
             # then cull the matchList based on priority.
@@ -269,7 +306,7 @@ class PlotPittRuleProbe:
             for p in reversed(self.ax.patches):
                 p.remove()
 
-            best = max(population)
+            best = max(population, key=Individual.sort_key_for(population))
             rule_length = (self.num_inputs*2 + self.num_outputs)
             if 0 != len(best.genome) % rule_length:
                 raise ValueError(f"Found the wrong number of genes when trying to run {PlotPittRuleProbe.__name__}.  Are you sure these rules have {self.num_inputs} input(s) and {self.num_outputs} output(s)?")
@@ -6,6 +6,67 @@ from math import nan, isnan
 from copy import deepcopy
 from functools import total_ordering
 
+import numpy as np
+
+
+def _defining_class(cls, name):
+    """:return: the class in `cls`'s MRO that defines attribute `name`"""
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+    return None
+
+
+class _Delegates:
+    """Comparison methods that just call the superclass's, whose bytecode
+    `_delegates_to_super()` compares against."""
+    def worse_than(self, first_fitness, second_fitness):
+        return super().worse_than(first_fitness, second_fitness)
+
+    def equivalent(self, first_fitness, second_fitness):
+        return super().equivalent(first_fitness, second_fitness)
+
+
+def _delegates_to_super(func, name):
+    """:return: True if `func` does nothing but pass its arguments on to the
+    superclass's method `name` (ex. an over-ride that only adds a docstring)
+    """
+    code = getattr(func, '__code__', None)
+    reference = getattr(_Delegates, name).__code__
+    return code is not None \
+        and code.co_code == reference.co_code \
+        and code.co_names == reference.co_names \
+        and code.co_argcount == reference.co_argcount
+
+
+def _has_sort_key(problem):
+    """:return: True if `problem` has a `sort_key()`, and no class below the
+    one that defines it in `problem`'s class hierarchy changes how fitnesses
+    compare (by over-riding `worse_than()` or `equivalent()` with anything
+    more than a call to the superclass's method), so that the key can't be
+    out of step with the comparisons"""
+    if getattr(problem, 'sort_key', None) is None:
+        return False
+    key_cls = _defining_class(type(problem), 'sort_key')
+    if key_cls is None:  # The key was set on the instance itself
+        return True
+    mro = type(problem).__mro__
+    for klass in mro[:mro.index(key_cls)]:
+        for name in ('worse_than', 'equivalent'):
+            if name in vars(klass) \
+                    and not _delegates_to_super(vars(klass)[name], name):
+                return False
+    return True
+
+
+def _check_batch_size(problem, fitnesses, n):
+    """Raise a ValueError unless `problem.evaluate_batch()` returned one
+    fitness for each of the `n` phenomes it was given."""
+    if len(fitnesses) != n:
+        raise ValueError(
+            f"{type(problem).__name__}.evaluate_batch() returned "
+            f"{len(fitnesses)} fitnesses for {n} phenomes")
+
 
 ##############################
 # Class Individual
@@ -90,13 +151,173 @@ class Individual:
 
         return population
 
-    def clone(self):
+    @classmethod
+    def evaluate_batch(cls, individuals):
+        """ Evaluate a collection of individuals, making a single call to
+        `Problem.evaluate_batch()` for each group of individuals that share a
+        problem.
+
+        This gives problems whose fitness function can be vectorized (ex.
+        with NumPy) a chance to evaluate many phenomes in one go:
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.problem import ScalarProblem
+        >>> class SumProblem(ScalarProblem):
+        ...     def evaluate(self, phenome):
+        ...         return sum(phenome)
+        ...     def evaluate_batch(self, phenomes):
+        ...         print(f"Evaluating {len(phenomes)} phenomes")
+        ...         return [sum(p) for p in phenomes]
+        >>> problem = SumProblem(maximize=True)
+        >>> pop = [Individual([i, i], IdentityDecoder(), problem) for i in range(3)]
+        >>> pop = Individual.evaluate_batch(pop)
+        Evaluating 3 phenomes
+        >>> [ind.fitness for ind in pop]
+        [0, 2, 4]
+
+        Individuals fall back to being evaluated one at a time (via their own
+        `evaluate()`) if their problem has no `evaluate_batch()` method, or if
+        their class customizes evaluation in a way that the batch call would
+        skip (see `can_evaluate_batch()`).  If the batch call raises an
+        exception, a group of `RobustIndividual` objects is also re-evaluated
+        one at a time, so that each can record its own exception; for any
+        other class, the exception propagates.
+
+        `Problem.evaluate_batch()` must return exactly one fitness per
+        phenome:
+
+        >>> class BrokenProblem(SumProblem):
+        ...     def evaluate_batch(self, phenomes):
+        ...         return [0]
+        >>> problem = BrokenProblem(maximize=True)
+        >>> pop = [Individual([i, i], IdentityDecoder(), problem) for i in range(3)]
+        >>> Individual.evaluate_batch(pop)
+        Traceback (most recent call last):
+        ...
+        ValueError: BrokenProblem.evaluate_batch() returned 1 fitnesses for 3 phenomes
+
+        If `individuals` is a :py:class:`~leap_ec.population.PopulationArray`,
+        its genome matrix is decoded and evaluated directly.
+
+        :param individuals: to be evaluated
+        :return: the evaluated individuals
+        """
+        # Imported here to avoid a circular import
+        from leap_ec.population import PopulationArray
+        if isinstance(individuals, PopulationArray):
+            return individuals.evaluate()
+
+        # Group by type and problem, preserving order within groups
+        groups = {}
+        for individual in individuals:
+            key = (type(individual), id(individual.problem))
+            groups.setdefault(key, []).append(individual)
+
+        for (ind_cls, _), group in groups.items():
+            problem = group[0].problem
+            if ind_cls.can_evaluate_batch(problem):
+                try:
+                    decoder = group[0].decoder
+                    if all(ind.decoder is decoder for ind in group):
+                        phenomes = decoder.decode_batch(
+                            [individual.genome for individual in group])
+                    else:
+                        phenomes = [individual.decode() for individual in group]
+                    fitnesses = problem.evaluate_batch(phenomes)
+                except Exception:
+                    # Let each individual record its own exception
+                    if not issubclass(ind_cls, RobustIndividual):
+                        raise
+                else:
+                    _check_batch_size(problem, fitnesses, len(group))
+                    for individual, fitness in zip(group, fitnesses):
+                        individual._record_fitness(fitness)
+                    continue
+
+            for individual in group:
+                individual.evaluate()
+
+        return individuals
+
+    @classmethod
+    def can_evaluate_batch(cls, problem):
+        """
+        :return: True if individuals of this class can be evaluated on
+            `problem` in bulk by `evaluate_batch()`.
+
+        This requires that `problem` implements `evaluate_batch()`, and that
+        this class hasn't over-ridden `evaluate_imp()` (which the batch path
+        bypasses), nor `evaluate()` without also over-riding
+        `_record_fitness()` to match.
+        """
+        if not hasattr(problem, 'evaluate_batch'):
+            return False
+        if cls.evaluate_imp is not Individual.evaluate_imp:
+            return False
+        return _defining_class(cls, 'evaluate') is \
+            _defining_class(cls, '_record_fitness')
+
+    @staticmethod
+    def sort_key_for(population):
+        """
+        Find a key function that orders `population` the same way that
+        comparing its individuals would, so that it can be sorted (or its
+        best found) without calling `Problem.worse_than()` for every pair:
+
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = [Individual([0.0], problem=SpheroidProblem()) for _ in range(3)]
+        >>> for ind, f in zip(pop, [3.0, 1.0, 2.0]):
+        ...     ind.fitness = f
+        >>> key = Individual.sort_key_for(pop)
+        >>> [key(ind) for ind in pop]
+        [-3.0, -1.0, -2.0]
+
+        The result can be passed straight to `max()`, `sorted()`, etc.,
+        because it is `None` (i.e. "compare the individuals themselves") if
+        there is no such key: that is, if any of the individuals' problems
+        lacks a `sort_key()` (or changes `worse_than()` or `equivalent()`
+        in a subclass without also over-riding `sort_key()`), if their
+        problems order fitnesses differently, or if an individual's class
+        over-rides the comparison operators.
+
+        >>> max(pop, key=key).fitness
+        1.0
+
+        :param population: a list of individuals or a `PopulationArray`
+        :return: a function from an individual to a number that is larger
+            for better individuals, or `None`
+        """
+        from leap_ec.population import PopulationArray
+
+        if isinstance(population, PopulationArray) \
+                and 'problem' not in population.attributes:
+            classes = {population.individual_cls}
+            problems = {id(population.problem): population.problem}
+        else:
+            classes = {type(ind) for ind in population}
+            problems = {id(ind.problem): ind.problem for ind in population}
+
+        if any(_defining_class(cls, '__lt__') is not Individual
+               for cls in classes):
+            return None
+        if not all(_has_sort_key(p) for p in problems.values()):
+            return None
+        if len(problems) > 1:
+            orders = {(type(p).sort_key, getattr(p, 'maximize', None))
+                      for p in problems.values()}
+            if len(orders) > 1:
+                return None
+
+        return lambda individual: \
+            individual.problem.sort_key(individual.fitness)
+
+    def clone(self, copy_on_write=False):
         """Create a 'clone' of this `Individual`, copying the genome, but not
         fitness.
 
-        A deep copy of the genome will be created, so if your `Individual`
-        has a custom genome type, it's important that it implements the
-        `__deepcopy__()` method.
+        By default, a deep copy of the genome will be created, so if your
+        `Individual` has a custom genome type, it's important that it
+        implements the `__deepcopy__()` method.
 
         >>> from leap_ec.binary_rep.problems import MaxOnes
         >>> from leap_ec.decoder import IdentityDecoder
@@ -108,17 +329,132 @@ class Individual:
         True
         >>> ind_copy.decoder == ind.decoder
         True
+
+        With `copy_on_write=True`, the clone instead shares its parent's
+        genome, and the copy is deferred until an operator asks for
+        `writable_genome()`.  Since most operators build new genomes rather
+        than changing them in place, often the copy never happens at all:
+
+        >>> ind_copy = ind.clone(copy_on_write=True)
+        >>> ind_copy.genome is ind.genome
+        True
+        >>> ind_copy.writable_genome()[0] = 1
+        >>> ind_copy.genome, ind.genome
+        ([1, 1, 1, 0], [0, 1, 1, 0])
+
+        NumPy genomes are shared as read-only views, so writing to one
+        directly (rather than via `writable_genome()`) raises an error
+        instead of silently modifying the parent.  Genomes of other types
+        are shared as-is, which relies on the convention that operators
+        only ever modify clones, and never the parents they came from.
+
+        :param copy_on_write: if True, defer copying the genome until it is
+            about to be modified
+        :return: the cloned individual
         """
-        new_genome = deepcopy(self.genome)
+        if not copy_on_write:
+            new_genome = deepcopy(self.genome)
+            cloned = type(self)(new_genome, self.decoder, self.problem)
+            cloned.fitness = None
+            return cloned
+
+        if isinstance(self.genome, np.ndarray):
+            new_genome = self.genome.view()
+            new_genome.flags.writeable = False
+        else:
+            new_genome = self.genome
         cloned = type(self)(new_genome, self.decoder, self.problem)
         cloned.fitness = None
+        cloned._shared_genome = new_genome
         return cloned
 
+    def writable_genome(self):
+        """
+        Return this individual's genome, ready to be modified in place.
+
+        Operators that change a genome in place (rather than building a new
+        one) must fetch it through this method: if the genome is still shared
+        with a parent from a copy-on-write `clone()`, this is where it gets
+        copied.  It also discards any memoized phenome (see `decode()`), so
+        call it again before each round of edits rather than keeping the
+        genome it returned around.
+
+        :return: the (now unshared) genome
+        """
+        # Any cached phenome is about to go stale
+        vars(self).pop('_phenome', None)
+        shared = vars(self).pop('_shared_genome', None)
+        if self.genome is shared:
+            if isinstance(self.genome, np.ndarray):
+                self.genome = np.array(self.genome)
+            else:
+                self.genome = deepcopy(self.genome)
+        return self.genome
+
     def decode(self, *args, **kwargs):
         """
         :return: the decoded value for this individual
+
+        If the decoder has opted in by setting `memoize = True`, the phenome
+        is cached on the individual, so that decoding it again (ex. in a probe
+        that inspects the best individual every generation) is free:
+
+        >>> from leap_ec.decoder import Decoder
+        >>> class ListDecoder(Decoder):
+        ...     memoize = True
+        ...     def decode(self, genome, *args, **kwargs):
+        ...         print("decoding")
+        ...         return list(genome)
+        >>> ind = Individual((0, 1), decoder=ListDecoder())
+        >>> ind.decode()
+        decoding
+        [0, 1]
+        >>> ind.decode()
+        [0, 1]
+
+        The cached phenome is discarded as soon as a new genome is assigned
+        (or the genome is fetched with `writable_genome()` to be modified in
+        place), and it isn't carried over to clones:
+
+        >>> ind.genome = (1, 1)
+        >>> ind.decode()
+        decoding
+        [1, 1]
+
+        Phenomes are never cached when `decode()` is given extra arguments.
+
+        Since every caller gets the same phenome object back, a memoized
+        phenome must be treated as immutable.  And since the cache is tied to
+        the genome *object*, it can't see a genome being edited in place:
+        operators must call `writable_genome()` again for every round of
+        in-place edits, rather than hanging on to the genome it returned (or
+        writing to `genome` directly), or `decode()` may return a stale
+        phenome:
+
+        >>> ind.genome = [1, 1]
+        >>> genome = ind.writable_genome()
+        >>> ind.decode()
+        decoding
+        [1, 1]
+        >>> genome[0] = 0  # Edited behind the cache's back
+        >>> ind.decode()
+        [1, 1]
+        >>> ind.writable_genome()[0] = 0
+        >>> ind.decode()
+        decoding
+        [0, 1]
         """
-        return self.decoder.decode(self.genome, args, kwargs)
+        if args or kwargs or not getattr(self.decoder, 'memoize', False):
+            return self.decoder.decode(self.genome, args, kwargs)
+
+        cached = self.__dict__.get('_phenome')
+        if cached is not None and cached[0] is self.genome \
+                and cached[1] is self.decoder:
+            return cached[2]
+
+        phenome = self.decoder.decode(self.genome, args, kwargs)
+        self._phenome = (self.genome, self.decoder, phenome)
+        return phenome
 
     def evaluate_imp(self):
         """ This is the evaluate 'implementation' called by
@@ -144,6 +480,51 @@ class Individual:
         self.fitness = self.evaluate_imp()
         return self.fitness
 
+    async def evaluate_async(self):
+        """ A coroutine that determines this individual's fitness.
+
+        If the problem defines a coroutine `evaluate_async(phenome)`, we
+        await it, so that other evaluations can proceed while this one waits
+        (see :py:func:`~leap_ec.ops.async_evaluate`).  Otherwise this just
+        calls `evaluate_imp()`, which blocks.
+
+        >>> import asyncio
+        >>> from leap_ec.binary_rep.problems import MaxOnes
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> ind = Individual([1, 1, 0], IdentityDecoder(), MaxOnes())
+        >>> loop = asyncio.new_event_loop()
+        >>> loop.run_until_complete(ind.evaluate_async())
+        2
+        >>> loop.close()
+
+        :return: the calculated fitness
+        """
+        self.fitness = await self._evaluate_imp_async()
+        return self.fitness
+
+    async def _evaluate_imp_async(self):
+        # Sub-classes that over-ride evaluate_imp() get it called as-is,
+        # since we can't know how they'd want to await the problem
+        if type(self).evaluate_imp is Individual.evaluate_imp \
+                and hasattr(self.problem, 'evaluate_async'):
+            return await self.problem.evaluate_async(self.decode())
+        return self.evaluate_imp()
+
+    def _record_fitness(self, fitness):
+        """ Called by `evaluate_batch()` with the fitness that a batch
+            evaluation computed for this individual, in lieu of `evaluate()`.
+            Sub-classes that over-ride `evaluate()` to record extra state
+            should over-ride this to record the same state.
+        """
+        self.fitness = fitness
+
+    def __getstate__(self):
+        """Leave any cached phenome out when pickling (ex. to send an
+        individual to a worker), since phenomes can be large or unpicklable."""
+        state = self.__dict__.copy()
+        state.pop('_phenome', None)
+        return state
+
     def __iter__(self):
         """
         :raises: exception if self.genome is None
@@ -252,3 +633,23 @@ class RobustIndividual(Individual):
         # newly evaluated fitness.
         return self.fitness
 
+    async def evaluate_async(self):
+        """ A coroutine that determines this individual's fitness, with the
+        same exception handling as `evaluate()`.
+
+        :return: the calculated fitness
+        """
+        try:
+            self.fitness = await self._evaluate_imp_async()
+            self.is_viable = True  # we were able to evaluate
+        except Exception as e:
+            self.fitness = nan
+            self.exception = e
+            self.is_viable = False  # we could not complete an eval
+
+        return self.fitness
+
+    def _record_fitness(self, fitness):
+        self.fitness = fitness
+        self.is_viable = True
+
@@ -3,7 +3,8 @@ from typing import Iterator
 
 from toolz import curry
 
-from leap_ec.ops import compute_expected_probability, iteriter_op
+from leap_ec.ops import compute_expected_probability, iteriter_op, \
+    sample_mutation_positions
 
 
 ##############################
@@ -12,7 +13,8 @@ from leap_ec.ops import compute_expected_probability, iteriter_op
 @curry
 @iteriter_op
 def mutate_randint(next_individual: Iterator, bounds,
-                   expected_num_mutations: float = 1) -> Iterator:
+                   expected_num_mutations: float = 1,
+                   sparse: bool = False) -> Iterator:
     """Perform randint mutation on each individual in an iterator (population).
 
     This operator replaces randomly selected genes with an integer samples
@@ -24,6 +26,9 @@ def mutate_randint(next_individual: Iterator, bounds,
     >>> population = iter([ Individual([1,1]) ])
     >>> operator = mutate_randint(bounds=[(0, 10), (0, 10)])
     >>> mutated = next(operator(population))
+
+    Pass `sparse=True` to sample just the positions of the genes to mutate
+    (see `individual_mutate_randint()`).
     """
     while True:
         try:
@@ -32,7 +37,8 @@ def mutate_randint(next_individual: Iterator, bounds,
             return
 
         individual.genome = individual_mutate_randint(individual.genome, bounds,
-                                                   expected_num_mutations=expected_num_mutations)
+                                                   expected_num_mutations=expected_num_mutations,
+                                                   sparse=sparse)
 
         individual.fitness = None  # invalidate fitness since we have new genome
 
@@ -45,7 +51,8 @@ def mutate_randint(next_individual: Iterator, bounds,
 @curry
 def individual_mutate_randint(genome: list,
                               bounds: list,
-                              expected_num_mutations: float = 1) -> list:
+                              expected_num_mutations: float = 1,
+                              sparse: bool = False) -> list:
     """ Perform random-integer mutation on a particular genome.
 
         >>> genome = [42, 12]
@@ -55,6 +62,10 @@ def individual_mutate_randint(genome: list,
         :param genome: test_sequence of integers to be mutated
         :param bounds: test_sequence of bounds tuples; e.g., [(1,2),(3,4)]
         :param expected_num_mutations: on average how many mutations done
+        :param sparse: if True, sample just the positions of the genes to
+            mutate (see `leap_ec.ops.sample_mutation_positions()`), rather
+            than drawing a random number for every gene; this is much faster
+            for long genomes with low mutation rates
     """
     def randomint_mutate(value, bound, probability):
         """ mutate an integer given a probability
@@ -66,6 +77,12 @@ def individual_mutate_randint(genome: list,
 
     probability = compute_expected_probability(expected_num_mutations, genome)
 
+    if sparse:
+        genome = list(genome)
+        for i in sample_mutation_positions(len(genome), probability):
+            genome[i] = random.randint(*bounds[i])
+        return genome
+
     genome = [randomint_mutate(gene, bound, probability) for gene, bound in zip(genome,bounds)]
 
     return genome
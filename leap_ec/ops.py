@@ -5,20 +5,29 @@ together to create EAs out of operator pipelines. You'll find many
 traditional selection and reproduction strategies here, as well as components
 for classic algorithms like island models and cooperative coevolution. """
 import abc
+import asyncio
 import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import copy
 import csv
 import itertools
 from functools import wraps
+import math
+from math import nan
+import queue
 import random
 from statistics import mean
+import sys
+import threading
 from typing import Iterator, List, Tuple, Callable
 
 import numpy as np
 import toolz
 from toolz import curry
 
-from leap_ec.individual import Individual
+from leap_ec.individual import Individual, RobustIndividual
+from leap_ec.population import PopulationArray
+from leap_ec.problem import ScalarProblem
 
 
 ##############################
@@ -95,8 +104,9 @@ def iteriter_op(f):
 
 def listlist_op(f):
     """This decorator wraps a function with runtime type checking to ensure
-    that it always receives a list as its first argument, and that it returns
-    a list.
+    that it always receives a list (or another sequence, such as a
+    :py:class:`~leap_ec.population.PopulationArray`) as its first argument,
+    and that it returns one.
 
     We use this to make debugging operator pipelines easier in EAs: if you
     accidentally hook up, say an operator that outputs an iterator to an
@@ -108,14 +118,14 @@ def listlist_op(f):
 
     @wraps(f)
     def typecheck_f(population: List, *args, **kwargs) -> List:
-        if not isinstance(population, list):
+        if not isinstance(population, collections.abc.Sequence):
             raise ValueError(
                 f"Operator {f} received a {type(population)} as input, but "
                 f"expected a list.")
 
         result = f(population, *args, **kwargs)
 
-        if not isinstance(result, list):
+        if not isinstance(result, collections.abc.Sequence):
             raise ValueError(
                 f"Operator {f} produced a {type(result)} as output, but "
                 f"expected a list.")
@@ -127,8 +137,9 @@ def listlist_op(f):
 
 def listiter_op(f):
     """This decorator wraps a function with runtime type checking to ensure
-    that it always receives a list as its first argument, and that it returns
-    an iterator.
+    that it always receives a list (or another sequence, such as a
+    :py:class:`~leap_ec.population.PopulationArray`) as its first argument,
+    and that it returns an iterator.
 
     We use this to make debugging operator pipelines easier in EAs: if you
     accidentally hook up, say an operator that outputs an iterator to an
@@ -140,7 +151,7 @@ def listiter_op(f):
 
     @wraps(f)
     def typecheck_f(population: List, *args, **kwargs) -> Iterator:
-        if not isinstance(population, list):
+        if not isinstance(population, collections.abc.Sequence):
             raise ValueError(
                 f"Operator {f} received a {type(population)} as input, but "
                 f"expected a list.")
@@ -225,6 +236,546 @@ def evaluate(next_individual: Iterator) -> Iterator:
         yield individual
 
 
+##############################
+# lazy_evaluate operator
+##############################
+@curry
+@iteriter_op
+def lazy_evaluate(next_individual: Iterator) -> Iterator:
+    """ Evaluate the next individual in the pipeline, unless it already has a
+    fitness.
+
+    Operators like `clone` and mutation reset fitness to `None`, so this only
+    saves work when an upstream operator knows that an offspring's fitness is
+    still valid, as with :py:func:`leap_ec.executable_rep.cgp.cgp_mutate`'s
+    `neutral` option.
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+    >>> ind = Individual([1, 1], decoder=IdentityDecoder(), problem=MaxOnes())
+    >>> ind.fitness = 0
+    >>> next(lazy_evaluate(iter([ind]))).fitness
+    0
+
+    :param next_individual: iterator pointing to next individual to be evaluated
+    :return: the evaluated individual
+    """
+    for individual in next_individual:
+        if individual.fitness is None:
+            individual.evaluate()
+
+        yield individual
+
+
+##############################
+# batch_evaluate operator
+##############################
+@curry
+@iteriter_op
+def batch_evaluate(next_individual: Iterator,
+                   chunk_size: int = 32) -> Iterator:
+    """ Evaluate individuals in chunks, making one call to the problem's
+    `evaluate_batch()` per chunk.
+
+    This is a drop-in replacement for `evaluate` that lets problems with a
+    vectorized fitness function evaluate `chunk_size` individuals at once.
+    Problems that don't implement `evaluate_batch()` are evaluated one
+    individual at a time, just as with `evaluate`.  See
+    :py:meth:`~leap_ec.individual.Individual.evaluate_batch` for details.
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+
+    >>> pop = [Individual([1, 0, 1], IdentityDecoder(), MaxOnes()) for _ in range(5)]
+    >>> evaluated = list(batch_evaluate(iter(pop), chunk_size=2))
+    >>> [ind.fitness for ind in evaluated]
+    [2, 2, 2, 2, 2]
+
+    Note that each chunk is pulled from upstream before any of its
+    individuals are passed downstream, so an operator like `pool(size=n)`
+    may cause up to `chunk_size - 1` extra individuals to be evaluated
+    (and discarded) when `n` is not a multiple of `chunk_size`.
+
+    :param next_individual: iterator pointing to next individual to be evaluated
+    :param chunk_size: how many individuals to evaluate per batch
+    :return: the evaluated individuals, in their original order
+    """
+    assert (chunk_size > 0), f"chunk_size must be positive, but got {chunk_size}."
+    while True:
+        chunk = list(itertools.islice(next_individual, chunk_size))
+        if not chunk:
+            return
+        Individual.evaluate_batch(chunk)
+        yield from chunk
+
+
+##############################
+# cached_evaluate operator
+##############################
+@curry
+@iteriter_op
+def cached_evaluate(next_individual: Iterator, cache) -> Iterator:
+    """ Evaluate individuals, skipping the evaluation of any individual
+    whose genome is already in `cache`.
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+    >>> from leap_ec.cache import FitnessCache
+
+    >>> cache = FitnessCache(max_entries=1000)
+    >>> pop = [Individual([1, 0, 1], IdentityDecoder(), MaxOnes()) for _ in range(3)]
+    >>> evaluated = list(cached_evaluate(iter(pop), cache=cache))
+    >>> [ind.fitness for ind in evaluated]
+    [2, 2, 2]
+
+    Only the first of the three identical individuals actually needed to be
+    evaluated:
+
+    >>> cache.hits, cache.misses
+    (2, 1)
+
+    Individuals that come out of evaluation non-viable (i.e., a
+    `RobustIndividual` whose evaluation raised an exception) are not cached.
+
+    :param next_individual: iterator pointing to next individual to be evaluated
+    :param cache: a :py:class:`~leap_ec.cache.FitnessCache`
+    :return: the evaluated individual
+    """
+    missing = object()
+    for individual in next_individual:
+        fitness = cache.get(individual.genome, default=missing)
+        if fitness is missing:
+            individual.evaluate()
+            if getattr(individual, 'is_viable', True):
+                cache.put(individual.genome, individual.fitness)
+        else:
+            individual._record_fitness(fitness)
+
+        yield individual
+
+
+##############################
+# parallel_evaluate operator
+##############################
+# The problem and decoder that each worker process evaluates genomes with;
+# these are set once per worker by _init_evaluation_worker()
+_worker_problem = None
+_worker_decoder = None
+
+
+def _init_evaluation_worker(problem, decoder):
+    global _worker_problem, _worker_decoder
+    _worker_problem = problem
+    _worker_decoder = decoder
+
+
+def _call_in_evaluation_worker(problem, decoder, fn, *args, **kwargs):
+    _init_evaluation_worker(problem, decoder)
+    return fn(*args, **kwargs)
+
+
+class _PerTaskEvaluationPool(ProcessPoolExecutor):
+    """A process pool that sends its problem and decoder along with every
+    task, for Pythons older than 3.7, whose `ProcessPoolExecutor` has no
+    `initializer` to send them just once per worker."""
+    def __init__(self, problem, decoder, max_workers=None):
+        super().__init__(max_workers=max_workers)
+        self.problem = problem
+        self.decoder = decoder
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(_call_in_evaluation_worker, self.problem,
+                              self.decoder, fn, *args, **kwargs)
+
+
+def _evaluate_genomes(genomes):
+    """Evaluate a chunk of genomes in a worker process.
+
+    :return: a list of `(fitness, exception)` pairs, one per genome
+    """
+    results = []
+    for genome in genomes:
+        try:
+            phenome = _worker_decoder.decode(genome, (), {})
+            results.append((_worker_problem.evaluate(phenome), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+def evaluation_pool(problem, decoder, max_workers=None, mp_context=None):
+    """ Create a process pool whose workers can evaluate genomes for
+    :py:func:`parallel_evaluate`.
+
+    The problem and decoder are sent to each worker process just once, when
+    it starts up, so that afterwards only genomes and fitnesses need to be
+    passed back and forth.  Both must be picklable.  (Before Python 3.7,
+    `ProcessPoolExecutor` can't run code when a worker starts, so they are
+    sent along with every task instead.)
+
+    The pool is a regular `concurrent.futures.ProcessPoolExecutor`, so it
+    can be used as a context manager to shut it down when you're done:
+
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> with evaluation_pool(MaxOnes(), IdentityDecoder(), max_workers=2) as p:
+    ...     pass
+
+    :param problem: the problem that every individual will be evaluated on
+    :param decoder: the decoder that every individual uses
+    :param max_workers: the number of worker processes; defaults to the
+        number of CPUs
+    :param mp_context: an optional `multiprocessing` context, to control how
+        worker processes are started; requires Python 3.7 or later
+    :return: a `ProcessPoolExecutor`
+    """
+    if sys.version_info < (3, 7):
+        if mp_context is not None:
+            raise ValueError("evaluation_pool() only supports mp_context on "
+                             "Python 3.7 or later.")
+        return _PerTaskEvaluationPool(problem, decoder, max_workers)
+
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                               initializer=_init_evaluation_worker,
+                               initargs=(problem, decoder))
+
+
+@curry
+@iterlist_op
+def parallel_evaluate(next_individual: Iterator, pool, size: int,
+                      chunksize: int = 1) -> List:
+    """ Concurrently evaluate `size` individuals on a local process pool.
+
+    This is a "sink," like `pool()`: it pulls `size` individuals from
+    upstream, evaluates them across the worker processes of `pool`, and
+    returns them as a list.  So it takes the place of `evaluate` followed by
+    `pool(size=...)` in a pipeline:
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+
+    >>> problem, decoder = MaxOnes(), IdentityDecoder()
+    >>> parents = [Individual([1, 0, 1], decoder, problem),
+    ...            Individual([1, 1, 1], decoder, problem)]
+    >>> with evaluation_pool(problem, decoder, max_workers=2) as p:
+    ...     offspring = parallel_evaluate(naive_cyclic_selection(parents),
+    ...                                   pool=p, size=4)
+    >>> [ind.fitness for ind in offspring]
+    [2, 3, 2, 3]
+
+    `pool` must have been created by :py:func:`evaluation_pool` with the same
+    problem and decoder that the individuals use, since only their genomes
+    are sent to the workers.  For the same reason, this doesn't support
+    `Individual` subclasses that over-ride `evaluate_imp()`.
+
+    Fitnesses come back in the same order as the individuals.  If evaluating
+    a `RobustIndividual` raises an exception, its fitness is set to NaN,
+    `is_viable` to False, and `exception` to the exception, just as if it
+    were evaluated locally; for other individuals the exception is re-raised.
+
+    :param next_individual: iterator/generator for individual provider
+    :param pool: a process pool created with :py:func:`evaluation_pool`
+    :param size: how many individuals to evaluate
+    :param chunksize: how many genomes to send to a worker per task; larger
+        chunks cut communication overhead when evaluations are cheap
+    :return: the pool of evaluated individuals
+    """
+    assert (chunksize > 0), f"chunksize must be positive, but got {chunksize}."
+    individuals = [next(next_individual) for _ in range(size)]
+    for individual in individuals:
+        if type(individual).evaluate_imp is not Individual.evaluate_imp:
+            raise ValueError(
+                f"parallel_evaluate() only sends genomes to its workers, so "
+                f"it can't honor the over-ridden evaluate_imp() of "
+                f"{type(individual).__name__}.")
+
+    chunks = [[ind.genome for ind in individuals[i:i + chunksize]]
+              for i in range(0, size, chunksize)]
+    results = itertools.chain.from_iterable(
+        pool.map(_evaluate_genomes, chunks))
+
+    for individual, (fitness, exception) in zip(individuals, results):
+        if exception is None:
+            individual._record_fitness(fitness)
+        elif isinstance(individual, RobustIndividual):
+            individual.fitness = nan
+            individual.exception = exception
+            individual.is_viable = False
+        else:
+            raise exception
+
+    return individuals
+
+
+##############################
+# async_evaluate operator
+##############################
+@curry
+@iteriter_op
+def async_evaluate(next_individual: Iterator, max_concurrent: int = 8,
+                   ordered: bool = True) -> Iterator:
+    """ Evaluate up to `max_concurrent` individuals at a time on an `asyncio`
+    event loop.
+
+    This is meant for problems whose fitness evaluations are I/O-bound: if
+    the problem defines a coroutine `evaluate_async(phenome)`, then while one
+    evaluation waits (say, on a reply from a simulator), the others can make
+    progress.  Problems without one are evaluated with their (blocking)
+    `evaluate()`, so there is no concurrency to be had.
+
+    >>> import asyncio
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.problem import ScalarProblem
+
+    >>> class SlowSum(ScalarProblem):
+    ...     def evaluate(self, phenome):
+    ...         return sum(phenome)
+    ...     async def evaluate_async(self, phenome):
+    ...         await asyncio.sleep(0.02 * sum(phenome))
+    ...         return sum(phenome)
+
+    >>> pop = [Individual([x], IdentityDecoder(), SlowSum(maximize=True))
+    ...        for x in (3, 1, 2)]
+
+    By default, individuals are passed downstream in the order they arrived:
+
+    >>> [ind.fitness for ind in async_evaluate(iter(pop))]
+    [3, 1, 2]
+
+    With `ordered=False`, they are passed on as soon as they are evaluated:
+
+    >>> [ind.fitness for ind in async_evaluate(iter(pop), ordered=False)]
+    [1, 2, 3]
+
+    The operator runs its own event loop, so it can't be used from code that
+    is already running inside one.  It also pulls individuals from upstream
+    eagerly to keep `max_concurrent` evaluations in flight, so an operator
+    like `pool(size=n)` downstream may cause up to `max_concurrent - 1`
+    extra individuals to be evaluated.
+
+    Exceptions follow the usual rules: a `RobustIndividual` records them and
+    is marked non-viable, while other individuals raise them.
+
+    :param next_individual: iterator pointing to next individual to be evaluated
+    :param max_concurrent: the maximum number of evaluations in flight
+    :param ordered: if True, preserve the order of the individuals;
+        otherwise yield each one as soon as its evaluation completes
+    :return: the evaluated individuals
+    """
+    assert (max_concurrent > 0), \
+        f"max_concurrent must be positive, but got {max_concurrent}."
+    loop = asyncio.new_event_loop()
+    in_flight = collections.deque()  # (individual, task), in arrival order
+    exhausted = False
+    try:
+        while True:
+            # Top up the evaluations in flight
+            while not exhausted and len(in_flight) < max_concurrent:
+                try:
+                    individual = next(next_individual)
+                except StopIteration:
+                    exhausted = True
+                    break
+                task = loop.create_task(individual.evaluate_async())
+                in_flight.append((individual, task))
+
+            if not in_flight:
+                return
+
+            if ordered:
+                individual, task = in_flight[0]
+                loop.run_until_complete(asyncio.wait([task]))
+                finished = [in_flight.popleft()]
+            else:
+                done, _ = loop.run_until_complete(
+                    asyncio.wait([task for _, task in in_flight],
+                                 return_when=asyncio.FIRST_COMPLETED))
+                finished = [pair for pair in in_flight if pair[1] in done]
+                for pair in finished:
+                    in_flight.remove(pair)
+
+            for individual, task in finished:
+                task.result()  # Re-raises any exception from the evaluation
+                yield individual
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+        if in_flight:
+            loop.run_until_complete(
+                asyncio.gather(*(task for _, task in in_flight),
+                               return_exceptions=True))
+        loop.close()
+
+
+##############################
+# prefetch operator
+##############################
+@curry
+@iteriter_op
+def prefetch(next_individual: Iterator, size: int = 16) -> Iterator:
+    """ Pull individuals from upstream in a background thread, keeping up to
+    `size` of them ready for the downstream operators.
+
+    This lets the operators upstream of it (ex. selection and variation) run
+    at the same time as those downstream (ex. evaluation), which is useful
+    when one side spends its time in code that releases the GIL, such as
+    NumPy or a native simulator.
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+
+    >>> pop = [Individual([1, 0, 1], IdentityDecoder(), MaxOnes()),
+    ...        Individual([1, 1, 1], IdentityDecoder(), MaxOnes())]
+    >>> offspring = pool(evaluate(prefetch(clone(naive_cyclic_selection(pop)),
+    ...                                    size=2)),
+    ...                  size=5)
+    >>> [ind.fitness for ind in offspring]
+    [2, 3, 2, 3, 2]
+
+    Individuals come out in the same order they went in, and an exception
+    raised upstream is re-raised downstream, when the individual it
+    interrupted would have been passed on.
+
+    All of the upstream operators run in the background thread, so they
+    must not depend on thread-local state.  The thread is stopped when this
+    operator's generator is closed (ex. when `pool(size=n)` is done with
+    it), but since it works ahead, up to `size + 1` extra individuals may be
+    produced and discarded.
+
+    :param next_individual: iterator pointing to the next individual
+    :param size: the maximum number of individuals to buffer
+    :return: the individuals, in order
+    """
+    assert (size > 0), f"size must be positive, but got {size}."
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            while not stop.is_set():
+                buffer.put((next(next_individual), None))
+        except StopIteration:
+            buffer.put((_END_OF_STREAM, None))
+        except BaseException as e:
+            buffer.put((None, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            individual, exception = buffer.get()
+            if exception is not None:
+                raise exception
+            if individual is _END_OF_STREAM:
+                return
+            yield individual
+    finally:
+        stop.set()
+        # Keep making room in the buffer until the producer notices it
+        # should stop, so that it doesn't block forever on a full queue
+        while producer.is_alive():
+            try:
+                while True:
+                    buffer.get_nowait()
+            except queue.Empty:
+                pass
+            producer.join(timeout=0.01)
+
+
+# Marks the end of the upstream iterator in prefetch()'s buffer
+_END_OF_STREAM = object()
+
+
+##############################
+# threaded_evaluate operator
+##############################
+@curry
+@iteriter_op
+def threaded_evaluate(next_individual: Iterator, workers: int = 4,
+                      max_pending: int = None) -> Iterator:
+    """ Evaluate individuals on a pool of `workers` threads.
+
+    Threads share the interpreter's GIL, so this only helps when the
+    problem's fitness function releases it (as NumPy and many native
+    libraries do); in return, there's no need for the problem, decoder, or
+    individuals to be picklable, as with :py:func:`parallel_evaluate`.
+
+    >>> from leap_ec.individual import Individual
+    >>> from leap_ec.decoder import IdentityDecoder
+    >>> from leap_ec.binary_rep.problems import MaxOnes
+
+    >>> pop = [Individual([1, 0, 1], IdentityDecoder(), MaxOnes()),
+    ...        Individual([1, 1, 1], IdentityDecoder(), MaxOnes())]
+    >>> [ind.fitness for ind in threaded_evaluate(iter(pop), workers=2)]
+    [2, 3]
+
+    Individuals are passed downstream in the order they arrived, and each
+    one's `evaluate()` runs in a worker thread, so a `RobustIndividual`
+    records any exception as usual, while for other individuals the
+    exception is re-raised here, in order.
+
+    Combined with :py:func:`prefetch`, this overlaps producing offspring
+    with evaluating them:
+
+    ::
+
+        [ops.tournament_selection,
+         ops.clone,
+         mutate_gaussian(std=0.1),
+         ops.prefetch(size=32),
+         ops.threaded_evaluate(workers=8),
+         ops.pool(size=100)]
+
+    To keep the workers busy, individuals are pulled from upstream eagerly,
+    so an operator like `pool(size=n)` downstream may cause up to
+    `max_pending - 1` extra individuals to be evaluated.
+
+    :param next_individual: iterator pointing to next individual to be evaluated
+    :param workers: the number of worker threads
+    :param max_pending: the maximum number of evaluations submitted but not
+        yet passed downstream; defaults to twice the number of workers
+    :return: the evaluated individuals, in order
+    """
+    assert (workers > 0), f"workers must be positive, but got {workers}."
+    if max_pending is None:
+        max_pending = 2 * workers
+    assert (max_pending > 0), \
+        f"max_pending must be positive, but got {max_pending}."
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = collections.deque()  # (individual, future), in arrival order
+    exhausted = False
+    try:
+        while True:
+            # Top up the evaluations in flight
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    individual = next(next_individual)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((individual,
+                                executor.submit(individual.evaluate)))
+
+            if not pending:
+                return
+
+            individual, future = pending.popleft()
+            future.result()  # Re-raises any exception from the evaluation
+            yield individual
+    finally:
+        # Don't start evaluations that nobody is waiting for anymore
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
 ##############################
 # const_evaluate operator
 ##############################
@@ -248,7 +799,8 @@ def const_evaluate(population: List, value) -> List:
 ##############################
 @curry
 @iteriter_op
-def clone(next_individual: Iterator) -> Iterator:
+def clone(next_individual: Iterator,
+          copy_on_write: bool = False) -> Iterator:
     """ clones and returns the next individual in the pipeline
 
     >>> from leap_ec.individual import Individual
@@ -259,14 +811,27 @@ def clone(next_individual: Iterator) -> Iterator:
 
     >>> cloned_generator = clone(iter([original]))
 
+    Pass `copy_on_write=True` to share each parent's genome with its clone
+    until an operator needs to modify it in place (see
+    :py:meth:`~leap_ec.individual.Individual.clone`):
+
+    >>> cloned = next(clone(iter([original]), copy_on_write=True))
+    >>> cloned.genome is original.genome
+    True
+
     :param next_individual: iterator for next individual to be cloned
+    :param copy_on_write: if True, defer copying genomes until they are
+        written to
     :return: copy of next_individual
     """
 
     while True:
         individual = next(next_individual)
 
-        yield individual.clone()
+        if copy_on_write:
+            yield individual.clone(copy_on_write=True)
+        else:
+            yield individual.clone()
 
 
 ##############################
@@ -313,9 +878,14 @@ def uniform_crossover(next_individual: Iterator,
             raise RuntimeError(
                 'genomes must be same length for uniform crossover')
 
+        genome1, genome2 = None, None
         for i in range(len(ind1.genome)):
             if random.random() < p_swap:
-                ind1.genome[i], ind2.genome[i] = ind2.genome[i], ind1.genome[i]
+                if genome1 is None:
+                    # Copy any copy-on-write genomes, now that we need to
+                    genome1 = ind1.writable_genome()
+                    genome2 = ind2.writable_genome()
+                genome1[i], genome2[i] = genome2[i], genome1[i]
 
         return ind1, ind2
 
@@ -450,10 +1020,11 @@ def truncation_selection(offspring: List, size: int,
         :return: truncated population
     """
     if parents is not None:
-        return list(toolz.itertoolz.topk(
-            size, itertools.chain(offspring, parents)))
+        candidates = list(itertools.chain(offspring, parents))
     else:
-        return list(toolz.itertoolz.topk(size, offspring))
+        candidates = offspring
+    return list(toolz.itertoolz.topk(
+        size, candidates, key=Individual.sort_key_for(candidates)))
 
 
 ##############################
@@ -487,14 +1058,327 @@ def tournament_selection(population: List, k: int = 2) -> Iterator:
 
         :return: the best of k individuals drawn from population
     """
+    key = Individual.sort_key_for(population)
     while True:
         #randomly choose k individuals (2 at a time) and select the best one
         choices = random.choices(population, k=k)
-        best = max(choices)
+        best = max(choices, key=key)
         
         yield best
 
 
+##############################
+# Function _fitness_keys
+##############################
+def _fitness_keys(population) -> np.ndarray:
+    """ Gather a population's fitnesses into a float array in which larger is
+        always better, so that selection can be done with NumPy index
+        operations instead of pairwise `Individual` comparisons.
+
+        The keys come from the problems' `sort_key()` (see
+        `Individual.sort_key_for()`), so for a `ScalarProblem` fitnesses are
+        negated for minimization, and NaN (i.e., non-viable or unevaluated)
+        fitnesses map to `-inf` so that they rank as the worst.
+
+        >>> from leap_ec.individual import Individual
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = [Individual([0.0], problem=SpheroidProblem()) for _ in range(3)]
+        >>> for ind, f in zip(pop, [3.0, nan, 1.0]):
+        ...     ind.fitness = f
+        >>> _fitness_keys(pop)
+        array([ -3., -inf,  -1.])
+
+        :param population: a list of individuals or a `PopulationArray`
+        :return: a 1-D array of keys, one per individual
+        :raises ValueError: if the population has no sort key
+    """
+    if len(population) == 0:
+        return np.empty(0)
+
+    key = Individual.sort_key_for(population)
+    if key is None:
+        raise ValueError(f"Index-based selection requires problems with a "
+                         f"total order on fitnesses (i.e. a sort_key()), "
+                         f"but got {population[0].problem}; use the "
+                         f"comparison-based selection operators instead.")
+
+    if isinstance(population, PopulationArray) \
+            and 'problem' not in population.attributes \
+            and type(population.problem).sort_key is ScalarProblem.sort_key:
+        # Apply the default ScalarProblem key to the whole fitness column
+        keys = population.fitness.astype(float)
+        if not population.problem.maximize:
+            keys = -keys
+        keys[np.isnan(keys)] = -np.inf
+        return keys
+
+    return np.array([key(ind) for ind in population], dtype=float)
+
+
+##############################
+# Function vectorized_tournament_selection
+##############################
+@curry
+@listiter_op
+def vectorized_tournament_selection(population: List, k: int = 2,
+                                    chunk_size: int = None) -> Iterator:
+    """ Tournament selection that draws whole blocks of tournaments at once.
+
+        This selects the same way as `tournament_selection()`, but instead of
+        comparing individuals pairwise, it draws an `(n, k)` matrix of
+        contestant indices and picks each row's winner with `np.argmax()` over
+        the population's fitness keys (see `_fitness_keys()`).  It requires
+        scalar fitnesses, which are read once, when the first individual is
+        requested.
+
+        >>> from leap_ec.individual import Individual
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.binary_rep.problems import MaxOnes
+        >>> from leap_ec.ops import vectorized_tournament_selection
+
+        >>> pop = [Individual([0, 0, 0], IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([0, 0, 1], IdentityDecoder(), problem=MaxOnes())]
+        >>> pop = Individual.evaluate_population(pop)
+
+        A tournament as large as the population is all but certain to
+        include the best individual:
+
+        >>> best = next(vectorized_tournament_selection(pop, k=50))
+        >>> best.genome
+        [0, 0, 1]
+
+        :param population: from which to select
+        :param k: the number of individuals drawn for each tournament
+        :param chunk_size: how many tournaments to draw at a time; defaults
+            to the size of the population
+        :return: the winner of each tournament, one at a time
+    """
+    keys = _fitness_keys(population)
+    n = len(population)
+    if chunk_size is None:
+        chunk_size = n
+
+    while True:
+        contestants = np.random.randint(0, n, size=(chunk_size, k))
+        winners = contestants[np.arange(chunk_size),
+                              np.argmax(keys[contestants], axis=1)]
+        for i in winners:
+            yield population[int(i)]
+
+
+##############################
+# Function vectorized_truncation_selection
+##############################
+@curry
+@listlist_op
+def vectorized_truncation_selection(offspring: List, size: int,
+                                    parents: List = None) -> List:
+    """ Return the `size` best individuals, like `truncation_selection()`,
+        but find them with `np.argpartition()` over the fitness keys (see
+        `_fitness_keys()`) instead of comparing individuals.
+
+        >>> from leap_ec.individual import Individual
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.binary_rep.problems import MaxOnes
+        >>> from leap_ec.ops import vectorized_truncation_selection
+
+        >>> pop = [Individual([0, 0, 0], decoder=IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([0, 0, 1], decoder=IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([1, 1, 0], decoder=IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([1, 1, 1], decoder=IdentityDecoder(), problem=MaxOnes())]
+        >>> pop = Individual.evaluate_population(pop)
+
+        As with `truncation_selection()`, the survivors are returned
+        best-first:
+
+        >>> [ind.genome for ind in vectorized_truncation_selection(pop, 2)]
+        [[1, 1, 1], [1, 1, 0]]
+
+        :param offspring: offspring to truncate down to a smaller population
+        :param size: is what to resize population to
+        :param parents: is optional parent population to include with
+            the offspring for downsizing
+        :return: truncated population
+    """
+    keys = _fitness_keys(offspring)
+    candidates = offspring
+    if parents is not None:
+        keys = np.concatenate([keys, _fitness_keys(parents)])
+        candidates = list(itertools.chain(offspring, parents))
+
+    size = min(size, len(keys))
+    if size <= 0:
+        return []
+    best = np.argpartition(-keys, size - 1)[:size]
+    best = best[np.argsort(-keys[best], kind='stable')]
+    return [candidates[int(i)] for i in best]
+
+
+##############################
+# Function _alias_table
+##############################
+def _alias_table(weights):
+    """ Build Vose's alias table for sampling indices in proportion to
+        `weights` in constant time per sample.
+
+        >>> prob, alias = _alias_table([1.0, 3.0])
+        >>> prob, alias
+        (array([0.5, 1. ]), array([1, 1]))
+
+        :param weights: non-negative weights, not all zero
+        :return: a tuple of the acceptance probability and alias of each index
+    """
+    weights = np.asarray(weights, dtype=float)
+    n = len(weights)
+    scaled = weights * n / weights.sum()
+    prob = np.ones(n)
+    alias = np.arange(n)
+
+    small = list(np.flatnonzero(scaled < 1.0))
+    large = list(np.flatnonzero(scaled >= 1.0))
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    # Whatever is left over is only off from 1.0 by round-off error
+
+    return prob, alias
+
+
+def _alias_sample(prob, alias, size):
+    """Draw `size` indices from an alias table built by `_alias_table()`."""
+    i = np.random.randint(0, len(prob), size=size)
+    return np.where(np.random.uniform(size=size) < prob[i], i, alias[i])
+
+
+##############################
+# Function proportional_selection
+##############################
+@curry
+@listiter_op
+def proportional_selection(population: List, windowing: bool = False,
+                           chunk_size: int = None) -> Iterator:
+    """ Fitness-proportional ("roulette wheel") selection, sampled with the
+        alias method.
+
+        Each individual is selected with probability proportional to its
+        fitness key (see `_fitness_keys()`), which must be non-negative
+        unless `windowing` is set.  Non-viable individuals are never
+        selected.
+
+        >>> from leap_ec.individual import Individual
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.binary_rep.problems import MaxOnes
+        >>> from leap_ec.ops import proportional_selection
+
+        >>> pop = [Individual([0, 0, 0], IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([0, 1, 1], IdentityDecoder(), problem=MaxOnes())]
+        >>> pop = Individual.evaluate_population(pop)
+
+        An individual with zero fitness has no slice of the wheel:
+
+        >>> selector = proportional_selection(pop)
+        >>> {tuple(next(selector).genome) for _ in range(20)}
+        {(0, 1, 1)}
+
+        With `windowing`, the worst key is subtracted from every key first,
+        which also makes this usable for minimization problems (whose keys
+        are negated fitnesses).
+
+        :param population: from which to select
+        :param windowing: if True, shift the keys so that the worst viable
+            individual has a weight of zero
+        :param chunk_size: how many selections to draw at a time; defaults
+            to the size of the population
+        :return: the selected individuals, one at a time
+    """
+    keys = _fitness_keys(population)
+    viable = np.isfinite(keys)
+    if not viable.any():
+        raise ValueError("Cannot do proportional selection on a population "
+                         "with no viable individuals.")
+    if windowing:
+        keys = keys - keys[viable].min()
+    elif (keys[viable] < 0).any():
+        raise ValueError("Proportional selection requires non-negative "
+                         "fitness keys; use windowing=True to shift them.")
+
+    weights = np.where(viable, keys, 0.0)
+    if weights.sum() == 0:
+        # Every viable individual is equally (un)fit
+        weights = viable.astype(float)
+
+    yield from _indexed_selection(population, _alias_table(weights),
+                                  chunk_size)
+
+
+##############################
+# Function rank_selection
+##############################
+@curry
+@listiter_op
+def rank_selection(population: List, pressure: float = 2.0,
+                   chunk_size: int = None) -> Iterator:
+    """ Linear ranking selection, sampled with the alias method.
+
+        Individuals are sorted by their fitness keys (see `_fitness_keys()`),
+        and the individual of rank `i` (where the worst has rank 0) is chosen
+        with probability `(2 - pressure)/n + 2*i*(pressure - 1)/(n*(n - 1))`.
+
+        >>> from leap_ec.individual import Individual
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.binary_rep.problems import MaxOnes
+        >>> from leap_ec.ops import rank_selection
+
+        >>> pop = [Individual([0, 0, 0], IdentityDecoder(), problem=MaxOnes()),
+        ...        Individual([1, 1, 1], IdentityDecoder(), problem=MaxOnes())]
+        >>> pop = Individual.evaluate_population(pop)
+
+        With the maximum selection pressure of 2, the worst individual is
+        never selected:
+
+        >>> selector = rank_selection(pop, pressure=2.0)
+        >>> {tuple(next(selector).genome) for _ in range(20)}
+        {(1, 1, 1)}
+
+        :param population: from which to select
+        :param pressure: the expected number of times the best individual is
+            selected per `n` selections, between 1 (uniform) and 2
+        :param chunk_size: how many selections to draw at a time; defaults
+            to the size of the population
+        :return: the selected individuals, one at a time
+    """
+    assert (1.0 <= pressure <= 2.0), \
+        f"Selection pressure must be between 1 and 2, but got {pressure}."
+    keys = _fitness_keys(population)
+    n = len(keys)
+    if n == 1:
+        weights = np.ones(1)
+    else:
+        ranks = np.empty(n)
+        ranks[np.argsort(keys, kind='stable')] = np.arange(n)
+        weights = (2 - pressure) / n + 2 * ranks * (pressure - 1) / (n * (n - 1))
+
+    yield from _indexed_selection(population, _alias_table(weights),
+                                  chunk_size)
+
+
+def _indexed_selection(population, table, chunk_size):
+    """Yield individuals forever, drawing their indices from an alias table
+    a chunk at a time."""
+    prob, alias = table
+    if chunk_size is None:
+        chunk_size = len(population)
+    while True:
+        for i in _alias_sample(prob, alias, chunk_size):
+            yield population[int(i)]
+
+
 ##############################
 # Function insertion_selection
 ##############################
@@ -652,9 +1536,17 @@ def migrate(context, topology, emigrant_selector,
     @listlist_op
     def do_migrate(population: List) -> List:
         current_subpop = context['leap']['current_subpopulation']
+        # When islands run in separate processes (see
+        # multi_population_ea(parallel=True)), emigrants are sent through
+        # queues instead
+        mailboxes = context['leap'].get('mailboxes')
 
         # Immigration
-        for imm in immigrants[current_subpop]:
+        if mailboxes is not None:
+            arrivals = _receive_all(mailboxes[current_subpop])
+        else:
+            arrivals = immigrants[current_subpop]
+        for imm in arrivals:
             # Do island-specific transformation
             # For example, this callback might update the individuals 'problem'
             # field to point to a new fitness function for the island, and
@@ -663,6 +1555,10 @@ def migrate(context, topology, emigrant_selector,
             # Compete for a place in the new population
             contestant = next(replacement_selector(population))
             if imm > contestant:
+                if isinstance(population, PopulationArray):
+                    # Rows can't be removed, so overwrite the contestant's
+                    population[contestant._index] = imm
+                    continue
                 # FIXME This is fishy!  What if there are two copies of
                 # contestant?  What if contestant.__eq()__ is not properly
                 # implemented?
@@ -683,7 +1579,10 @@ def migrate(context, topology, emigrant_selector,
             # Randomly select a neighboring island
             dest = random.choice(list(neighbors))
             # Add the emigrant to its immigration list
-            immigrants[dest].append(emi)
+            if mailboxes is not None:
+                mailboxes[dest].put(emi)
+            else:
+                immigrants[dest].append(emi)
             # FIXME In a heterogeneous island model, we also need to
             # set the emigrant's decoder and/or problem to match the
             # new islan'ds decoder and/or problem.
@@ -693,6 +1592,16 @@ def migrate(context, topology, emigrant_selector,
     return do_migrate
 
 
+def _receive_all(mailbox):
+    """Take everything that is currently waiting in a queue."""
+    received = []
+    while True:
+        try:
+            received.append(mailbox.get_nowait())
+        except queue.Empty:
+            return received
+
+
 ##############################
 # Class coop_evaluate
 ##############################
@@ -829,3 +1738,44 @@ def compute_expected_probability(expected_num_mutations: float,
     :return: the corresponding probability of mutation
     """
     return 1.0 / len(individual_genome) * expected_num_mutations
+
+
+##############################
+# function sample_mutation_positions
+##############################
+def sample_mutation_positions(genome_length: int, probability: float) \
+        -> List[int]:
+    """ Choose which positions of a genome to mutate, where each position is
+    chosen independently with the given probability.
+
+    This gives the same result (in distribution) as flipping a biased coin
+    for every gene, but instead of drawing one random number per gene, we
+    draw the gap until the next mutated gene from a geometric distribution.
+    So the cost is proportional to the number of mutations rather than the
+    length of the genome, which makes a big difference for long genomes with
+    low mutation rates.
+
+    >>> positions = sample_mutation_positions(100_000, 1/100_000)
+    >>> all(0 <= i < 100_000 for i in positions)
+    True
+
+    :param genome_length: the number of genes
+    :param probability: the probability of mutating each gene
+    :return: the sorted positions of the genes to mutate
+    """
+    if probability <= 0.0:
+        return []
+    if probability >= 1.0:
+        return list(range(genome_length))
+
+    log_q = math.log1p(-probability)
+    positions = []
+    i = -1
+    while True:
+        # The number of genes we skip over before the next mutation is
+        # geometrically distributed; 1 - random() is on (0, 1], so the log
+        # is always finite
+        i += 1 + int(math.log(1.0 - random.random()) / log_q)
+        if i >= genome_length:
+            return positions
+        positions.append(i)
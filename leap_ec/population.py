@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+    Defines `PopulationArray`, an array-backed alternative to representing a
+    population as a `list` of `Individual` objects.
+
+    A `PopulationArray` stores every genome as a row of a single 2-D NumPy
+    matrix and every fitness in a 1-D NumPy array, so large real-valued
+    populations don't pay for millions of boxed Python floats and per-object
+    overhead.  It hands out lightweight, `Individual`-compatible views on
+    demand, so existing operators and pipelines keep working unmodified.
+"""
+from collections.abc import Sequence
+from copy import copy
+from functools import lru_cache
+from math import nan, isnan
+
+import numpy as np
+
+from leap_ec.individual import Individual, RobustIndividual, \
+    _check_batch_size
+
+
+# Marks entries of an object-valued attribute column that have never been set
+_UNSET = object()
+
+
+##############################
+# Class IndividualView
+##############################
+class IndividualView(Individual):
+    """
+        A lightweight `Individual` that reads and writes its state directly
+        from one row of a `PopulationArray`.
+
+        Views are created on the fly by `PopulationArray.__getitem__()`, so
+        they hold no data of their own: the `genome` is a view into the
+        population's genome matrix, `fitness` is read from and written to the
+        population's fitness array, and any other attribute that gets set
+        (e.g., `is_viable` or `birth`) is stored in an attribute column of the
+        population.
+
+        You'll rarely need to create these yourself.  `PopulationArray` builds
+        a subclass of this for its `individual_cls`, so that views inherit any
+        overridden behavior (such as the exception handling in
+        `RobustIndividual`).
+    """
+
+    def __init__(self, population, index):
+        # Bypass __setattr__ so that these end up on the view itself
+        object.__setattr__(self, '_population', population)
+        object.__setattr__(self, '_index', index)
+
+    @property
+    def genome(self):
+        return self._population.genomes[self._index]
+
+    @genome.setter
+    def genome(self, value):
+        self._population.genomes[self._index] = value
+
+    @property
+    def fitness(self):
+        if not self._population.evaluated[self._index]:
+            return None
+        value = float(self._population.fitness[self._index])
+        # ScalarProblem compares against math.nan by identity
+        return nan if isnan(value) else value
+
+    @fitness.setter
+    def fitness(self, value):
+        if value is None:
+            self._population.evaluated[self._index] = False
+        else:
+            self._population.fitness[self._index] = value
+            self._population.evaluated[self._index] = True
+
+    def __getattr__(self, name):
+        # Only called when normal attribute lookup fails
+        if name.startswith('__'):
+            raise AttributeError(name)
+        population = object.__getattribute__(self, '_population')
+        column = population.attributes.get(name)
+        if column is not None:
+            value = column[object.__getattribute__(self, '_index')]
+            if value is not _UNSET:
+                return value
+        if name in ('decoder', 'problem'):
+            return getattr(population, name)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def writable_genome(self):
+        # Views never share their row with a clone
+        return self.genome
+
+    def decode(self, *args, **kwargs):
+        # Views are short-lived, so there's no point caching phenomes on them
+        return self.decoder.decode(self.genome, args, kwargs)
+
+    def __setattr__(self, name, value):
+        if isinstance(getattr(type(self), name, None), property):
+            object.__setattr__(self, name, value)
+        else:
+            column = self._population.add_attribute(name)
+            column[self._index] = value
+
+    def __delattr__(self, name):
+        column = self._population.attributes.get(name)
+        if column is None or column[self._index] is _UNSET:
+            raise AttributeError(name)
+        column[self._index] = _UNSET
+
+    def clone(self, copy_on_write=False):
+        """Create a stand-alone `individual_cls` instance with a copy of this
+        view's genome (but not its fitness).
+
+        Since a view's genome is a row of the population's genome matrix, it
+        is always copied, even if `copy_on_write` is set.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = PopulationArray([[0.0, 1.0], [2.0, 3.0]], IdentityDecoder(), SpheroidProblem())
+        >>> c = pop[1].clone()
+        >>> type(c).__name__, c.genome
+        ('Individual', array([2., 3.]))
+        """
+        cls = self._population.individual_cls
+        return cls(np.array(self.genome), self.decoder, self.problem)
+
+    def detach(self):
+        """Create a stand-alone `individual_cls` instance with a copy of this
+        view's whole state: its genome, fitness, and any other attributes.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = PopulationArray([[0.0, 1.0]], IdentityDecoder(), SpheroidProblem(), fitness=[1.0])
+        >>> pop[0].birth = 3
+        >>> ind = pop[0].detach()
+        >>> type(ind).__name__, ind.genome, ind.fitness, ind.birth
+        ('Individual', array([0., 1.]), 1.0, 3)
+
+        Views are pickled as detached copies, since they can't take their
+        population along with them:
+
+        >>> import pickle
+        >>> type(pickle.loads(pickle.dumps(pop[0]))).__name__
+        'Individual'
+        """
+        population, index = self._population, self._index
+        individual = self.clone()
+        individual.fitness = self.fitness
+        for name, column in population.attributes.items():
+            if name not in ('decoder', 'problem') \
+                    and column[index] is not _UNSET:
+                setattr(individual, name, column[index])
+        return individual
+
+    def __reduce__(self):
+        return _unpickle_view, (self.detach(),)
+
+    def __repr__(self):
+        return f"{self._population.individual_cls.__name__}(" \
+               f"{self.genome.__repr__()}, {self.decoder.__repr__()}, " \
+               f"{self.problem.__repr__()})"
+
+
+def _unpickle_view(individual):
+    """Views are pickled as the detached individual itself."""
+    return individual
+
+
+@lru_cache(maxsize=None)
+def _view_class(individual_cls):
+    """Build (once) an `IndividualView` subclass that also inherits from the
+    given `Individual` subclass."""
+    if issubclass(individual_cls, IndividualView):
+        return individual_cls
+    return type(f"{individual_cls.__name__}View",
+                (IndividualView, individual_cls), {})
+
+
+##############################
+# Class PopulationArray
+##############################
+class PopulationArray(Sequence):
+    """
+        A population whose genomes are stored as a 2-D NumPy matrix (one row
+        per individual) and whose fitnesses are stored in a 1-D NumPy array.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = PopulationArray([[0.0, 1.0], [2.0, 3.0], [1.0, 1.0]],
+        ...                       decoder=IdentityDecoder(), problem=SpheroidProblem())
+        >>> pop.genomes.shape
+        (3, 2)
+
+        Indexing or iterating over the population yields `Individual`-compatible
+        views, so anything that works on a list of individuals works here too:
+
+        >>> pop = Individual.evaluate_population(pop)
+        >>> pop.fitness
+        array([ 1., 13.,  2.])
+        >>> best = max(pop)
+        >>> best.genome, best.fitness
+        (array([0., 1.]), 1.0)
+
+        Changes made through a view are written straight to the arrays:
+
+        >>> best.genome = [5.0, 5.0]
+        >>> best.fitness = 50.0
+        >>> pop.genomes[0], pop.fitness[0]
+        (array([5., 5.]), 50.0)
+
+        Other attributes are stored as optional attribute columns, which you
+        can also pre-allocate with a specific dtype:
+
+        >>> pop.add_attribute('age', dtype=int)
+        array([0, 0, 0])
+        >>> pop[2].age = 7
+        >>> pop.attributes['age']
+        array([0, 0, 7])
+
+        :param genomes: a sequence of equal-length genomes (or a 2-D array)
+        :param decoder: the `Decoder` shared by every individual
+        :param problem: the `Problem` shared by every individual
+        :param individual_cls: the `Individual` subclass whose behavior views
+            should inherit
+        :param fitness: optional sequence of initial fitness values
+        :param attributes: optional `dict` mapping attribute names to
+            per-individual value columns
+    """
+
+    def __init__(self, genomes, decoder=None, problem=None,
+                 individual_cls=Individual, fitness=None, attributes=None):
+        if isinstance(decoder, type):
+            raise ValueError(
+                f"Got the type '{decoder}' as a decoder, but expected an instance.")
+        if isinstance(problem, type):
+            raise ValueError(
+                f"Got the type '{problem}' as a problem, but expected an instance.")
+        genomes = np.asarray(genomes)
+        if genomes.ndim != 2:
+            raise ValueError(
+                f"Expected a 2-D collection of genomes, but got an array of "
+                f"shape {genomes.shape}.  A PopulationArray requires that "
+                f"every genome have the same length.")
+        self.genomes = genomes
+        self.decoder = decoder
+        self.problem = problem
+        self.individual_cls = individual_cls
+        self._view_cls = _view_class(individual_cls)
+
+        n = len(genomes)
+        if fitness is None:
+            self.fitness = np.full(n, nan)
+            self.evaluated = np.zeros(n, dtype=bool)
+        else:
+            self.fitness = np.array([nan if f is None else f for f in fitness],
+                                    dtype=float)
+            self.evaluated = np.array([f is not None for f in fitness],
+                                      dtype=bool)
+
+        self.attributes = {}
+        if attributes is not None:
+            for name, values in attributes.items():
+                assert (len(values) == n), \
+                    f"Attribute column '{name}' has {len(values)} values, " \
+                    f"but the population has {n} individuals."
+                self.attributes[name] = np.asarray(values)
+
+    @classmethod
+    def create(cls, n, initialize, decoder, problem,
+               individual_cls=Individual):
+        """
+        Array-backed counterpart to `Individual.create_population()`.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.initializers import create_real_vector
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = PopulationArray.create(10, create_real_vector([(-1, 1)]*3),
+        ...                              IdentityDecoder(), SpheroidProblem())
+        >>> len(pop), pop.genomes.shape
+        (10, (10, 3))
+
+        :param n: the size of the population to generate
+        :param initialize: a function f() that initializes a genome
+        :param decoder: the decoder to attach individuals to
+        :param problem: the problem to attach individuals to
+        :param individual_cls: the `Individual` subclass to emulate
+        :return: a `PopulationArray` of n individuals
+        """
+        return cls([initialize() for _ in range(n)], decoder=decoder,
+                   problem=problem, individual_cls=individual_cls)
+
+    @classmethod
+    def from_individuals(cls, individuals, decoder=None, problem=None,
+                         individual_cls=None):
+        """
+        Pack a list of individuals into a `PopulationArray`.
+
+        The decoder, problem, and individual class default to those of the
+        first individual.  Any extra attributes the individuals carry (ex.
+        `is_viable`) are packed into attribute columns.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> inds = [Individual([0.0, 1.0], IdentityDecoder(), SpheroidProblem()),
+        ...         Individual([3.0, 4.0], IdentityDecoder(), SpheroidProblem())]
+        >>> inds[1].fitness = 25.0
+        >>> pop = PopulationArray.from_individuals(inds)
+        >>> pop.genomes
+        array([[0., 1.],
+               [3., 4.]])
+        >>> [ind.fitness for ind in pop]
+        [None, 25.0]
+        """
+        if isinstance(individuals, PopulationArray):
+            return copy(individuals)
+        individuals = list(individuals)
+        assert (len(individuals) > 0), \
+            "Cannot infer the shape of a PopulationArray from zero individuals."
+        first = individuals[0]
+        if decoder is None:
+            decoder = first.decoder
+        if problem is None:
+            problem = first.problem
+        if individual_cls is None:
+            individual_cls = type(first)
+            if issubclass(individual_cls, IndividualView):
+                individual_cls = first._population.individual_cls
+
+        population = cls([ind.genome for ind in individuals], decoder=decoder,
+                         problem=problem, individual_cls=individual_cls,
+                         fitness=[ind.fitness for ind in individuals])
+
+        # Pack any extra state the individuals were carrying
+        core = {'genome', 'fitness', 'decoder', 'problem'}
+        for i, ind in enumerate(individuals):
+            if isinstance(ind, IndividualView):
+                extras = {name: getattr(ind, name)
+                          for name, column in ind._population.attributes.items()
+                          if column[ind._index] is not _UNSET}
+            else:
+                extras = vars(ind)
+            for name, value in extras.items():
+                if name not in core and not name.startswith('_'):
+                    population.add_attribute(name)[i] = value
+
+        return population
+
+    def to_individuals(self):
+        """
+        Unpack this population into a list of independent `individual_cls`
+        objects.
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.real_rep.problems import SpheroidProblem
+        >>> pop = PopulationArray([[0.0, 1.0]], IdentityDecoder(), SpheroidProblem(), fitness=[1.0])
+        >>> inds = pop.to_individuals()
+        >>> type(inds[0]).__name__, inds[0].genome, inds[0].fitness
+        ('Individual', [0.0, 1.0], 1.0)
+        """
+        individuals = []
+        for i, view in enumerate(self):
+            ind = self.individual_cls(self.genomes[i].tolist(), view.decoder,
+                                      view.problem)
+            ind.fitness = view.fitness
+            for name, column in self.attributes.items():
+                if name not in ('decoder', 'problem') and column[i] is not _UNSET:
+                    setattr(ind, name, column[i])
+            individuals.append(ind)
+        return individuals
+
+    def evaluate(self):
+        """
+        Evaluate every individual in the population.
+
+        When the problem implements `evaluate_batch()`, we hand it the whole
+        genome matrix (via the decoder's `decode_batch()`) in a single call
+        and store the results straight into the fitness array:
+
+        >>> from leap_ec.decoder import IdentityDecoder
+        >>> from leap_ec.problem import ScalarProblem
+        >>> class SumProblem(ScalarProblem):
+        ...     def evaluate(self, phenome):
+        ...         return float(np.sum(phenome))
+        ...     def evaluate_batch(self, phenomes):
+        ...         return np.sum(phenomes, axis=1)
+        >>> pop = PopulationArray([[0.0, 1.0], [2.0, 3.0]], IdentityDecoder(),
+        ...                       SumProblem(maximize=True))
+        >>> pop.evaluate().fitness
+        array([1., 5.])
+
+        Otherwise (or if some individuals have their own decoder or problem)
+        this falls back to :py:meth:`Individual.evaluate_batch()` over views
+        of the individuals.  As there, if the batch call raises an exception,
+        `RobustIndividual` views are evaluated one at a time so that each can
+        record its own exception, and the exception propagates otherwise.
+
+        :return: this population
+        """
+        overridden = any(name in self.attributes
+                         for name in ('decoder', 'problem'))
+        if not overridden \
+                and self.individual_cls.can_evaluate_batch(self.problem):
+            try:
+                phenomes = self.decoder.decode_batch(self.genomes)
+                fitness = self.problem.evaluate_batch(phenomes)
+            except Exception:
+                # Let each individual record its own exception
+                if not issubclass(self.individual_cls, RobustIndividual):
+                    raise
+                for view in self:
+                    view.evaluate()
+                return self
+            else:
+                _check_batch_size(self.problem, fitness, len(self))
+                fitness = np.asarray(fitness, dtype=float)
+                if self.individual_cls._record_fitness \
+                        is Individual._record_fitness:
+                    self.fitness[:] = fitness
+                    self.evaluated[:] = True
+                else:
+                    for view, f in zip(self, fitness):
+                        view._record_fitness(float(f))
+                return self
+
+        Individual.evaluate_batch(list(self))
+        return self
+
+    def add_attribute(self, name, dtype=object):
+        """
+        Return the attribute column for `name`, creating it if necessary.
+
+        Object-valued columns start out with every entry unset (so that
+        `hasattr()` on a view behaves just like it does on an `Individual`),
+        while columns of other dtypes start out as zeros.
+
+        :param name: name of the attribute
+        :param dtype: dtype of the column, if a new one needs to be created
+        :return: the column's array
+        """
+        column = self.attributes.get(name)
+        if column is None:
+            if np.dtype(dtype) == object:
+                column = np.empty(len(self), dtype=object)
+                column[:] = _UNSET
+            else:
+                column = np.zeros(len(self), dtype=dtype)
+            self.attributes[name] = column
+        return column
+
+    def __len__(self):
+        return len(self.genomes)
+
+    def __getitem__(self, index):
+        """Return a view of the individual at `index`, or a new
+        `PopulationArray` if `index` is a slice or an array of indices."""
+        if isinstance(index, (int, np.integer)):
+            n = len(self)
+            if not -n <= index < n:
+                raise IndexError(f"population index {index} out of range")
+            return self._view_cls(self, int(index) % n)
+
+        population = PopulationArray(self.genomes[index], self.decoder,
+                                     self.problem, self.individual_cls)
+        population.fitness = self.fitness[index]
+        population.evaluated = self.evaluated[index]
+        population.attributes = {name: column[index]
+                                 for name, column in self.attributes.items()}
+        return population
+
+    def __setitem__(self, index, individual):
+        """Overwrite the individual at `index` with a copy of another
+        individual's state."""
+        self.genomes[index] = individual.genome
+        view = self[index]
+        view.fitness = individual.fitness
+        for name, column in self.attributes.items():
+            if name in ('decoder', 'problem'):
+                continue
+            value = getattr(individual, name, _UNSET)
+            if value is not _UNSET or column.dtype == object:
+                column[index] = value
+        if individual.decoder is not self.decoder:
+            view.decoder = individual.decoder
+        if individual.problem is not self.problem:
+            view.problem = individual.problem
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._view_cls(self, i)
+
+    def __copy__(self):
+        """Copies are independent: changing one won't affect the other."""
+        population = PopulationArray(self.genomes.copy(), self.decoder,
+                                     self.problem, self.individual_cls)
+        population.fitness = self.fitness.copy()
+        population.evaluated = self.evaluated.copy()
+        population.attributes = {name: column.copy()
+                                 for name, column in self.attributes.items()}
+        return population
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.genomes.__repr__()}, " \
+               f"{self.decoder.__repr__()}, {self.problem.__repr__()})"
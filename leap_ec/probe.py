@@ -11,6 +11,7 @@ import pandas as pd
 from toolz import curry
 
 from leap_ec import ops as op
+from leap_ec.individual import Individual
 from leap_ec.ops import iteriter_op
 
 
@@ -255,7 +256,7 @@ class AttributesCSVProbe(op.Operator):
         assert ('leap' in self.context)
         assert ('generation' in self.context['leap'])
 
-        individuals = [max(population)] if self.best_only else population
+        individuals = [best_of_gen(population)] if self.best_only else population
 
         for ind in individuals:
             row = self.get_row_dict(ind)
@@ -561,4 +562,4 @@ def best_of_gen(population):
     [0, 1, 1, 1, 1]
     """
     assert (len(population) > 0)
-    return max(population)
+    return max(population, key=Individual.sort_key_for(population))
@@ -3,7 +3,7 @@ Defines the abstract-base classes Problem, ScalarProblem,
 and FunctionProblem.
 
 """
-from math import nan, floor
+from math import nan, floor, inf, isnan
 import random
 from abc import ABC, abstractmethod
 
@@ -22,8 +22,33 @@ class Problem(ABC):
          1. Fitness evaluation (the `evaluate()` method)
 
          2. Fitness comparision (the `worse_than()` and `equivalent()` methods)
+
+        Problems may optionally also implement an
+        `evaluate_batch(phenomes)` method that takes a sequence of phenomes
+        (or a 2-D array, when the decoder produces one) and returns a
+        sequence of their fitnesses, in order.  When it is present,
+        :py:meth:`~leap_ec.individual.Individual.evaluate_batch` and
+        :py:func:`~leap_ec.ops.batch_evaluate` will use it to evaluate many
+        individuals with a single call; otherwise they fall back to
+        evaluating individuals one at a time.
+
+        Similarly, problems whose evaluations spend most of their time
+        waiting on I/O (ex. on a simulator behind a socket) may implement a
+        coroutine, `async def evaluate_async(phenome)`, which
+        :py:func:`~leap_ec.ops.async_evaluate` uses to run many evaluations
+        concurrently.
+
+        Problems whose fitnesses have a total order may also provide a
+        `sort_key(fitness)` method that maps a fitness to a number that
+        increases with fitness (see
+        :py:meth:`~leap_ec.problem.ScalarProblem.sort_key`), so that
+        populations can be sorted without calling `worse_than()` for every
+        pair of individuals.  Problems without one set `sort_key` to `None`.
     """
 
+    # Problems without a total order on their fitnesses don't have a sort key
+    sort_key = None
+
     def __init__(self):
         super().__init__()
 
@@ -94,6 +119,35 @@ class ScalarProblem(Problem):
         else:
             return first_fitness > second_fitness
 
+    def sort_key(self, fitness):
+        """
+            Used in Individual.sort_key_for().
+
+            Map a fitness to a number that orders fitnesses the same way as
+            `worse_than()`, with larger numbers being better.  By default
+            this is the fitness itself for a maximization problem, or its
+            negation for a minimization problem, and NaN (as well as an
+            unevaluated `None`) fitness maps to `-inf`:
+
+            >>> p = ConstantProblem(maximize=False)
+            >>> p.sort_key(2.5), p.sort_key(nan)
+            (-2.5, -inf)
+
+            Please over-ride this too if you change `worse_than()` or
+            `equivalent()`, or set it to `None` if there isn't a total order.
+            (`Individual.sort_key_for()` won't trust a key that is inherited
+            from above a class that changes those methods; over-rides that
+            just call the superclass's method are fine.)
+
+            :return: a number that is larger for better fitnesses
+        """
+        if fitness is None or isnan(fitness):
+            return -inf
+        if self.maximize:
+            return fitness
+        else:
+            return -fitness
+
     def equivalent(self, first_fitness, second_fitness):
         """
             Used in Individual.__eq__().
@@ -171,6 +225,18 @@ class ConstantProblem(ScalarProblem):
         """
         return self.c
 
+    def evaluate_batch(self, phenomes, *args, **kwargs):
+        """
+        Return the constant value for every phenome in a batch:
+
+        >>> ConstantProblem(c=2.0).evaluate_batch([[0.5, 0.8], [1.0, 1.5]])
+        [2.0, 2.0]
+
+        :param phenomes: a sequence of phenomes
+        :return: a list containing the constant once per phenome
+        """
+        return [self.c] * len(phenomes)
+
     def __str__(self):
         return ConstantProblem.__name__
 
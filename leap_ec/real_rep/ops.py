@@ -10,7 +10,8 @@ from typing import Iterator, List, Tuple
 from toolz import curry
 
 from leap_ec import util
-from leap_ec.ops import compute_expected_probability, iteriter_op
+from leap_ec.ops import compute_expected_probability, iteriter_op, \
+    sample_mutation_positions
 
 
 ##############################
@@ -22,7 +23,8 @@ def mutate_gaussian(next_individual: Iterator,
                     std: float,
                     expected_num_mutations: float = None,
                     hard_bounds: Tuple[float, float] =
-                       (-math.inf, math.inf)) -> Iterator:
+                       (-math.inf, math.inf),
+                    sparse: bool = False) -> Iterator:
     """Mutate and return an individual with a real-valued representation.
 
     >>> from leap_ec.individual import Individual
@@ -39,6 +41,8 @@ def mutate_gaussian(next_individual: Iterator,
     :param expected_num_mutations: the *expected* number of mutations per
         individual, on average.  If None, all genes will be mutated.
     :param hard_bounds: to clip for mutations; defaults to (- ∞, ∞)
+    :param sparse: if True, sample just the positions of the genes to mutate
+        (see `genome_mutate_gaussian()`)
     :return: a generator of mutated individuals.
     """
     while True:
@@ -47,7 +51,8 @@ def mutate_gaussian(next_individual: Iterator,
         individual.genome = genome_mutate_gaussian(individual.genome,
                                                    std,
                                                    expected_num_mutations,
-                                                   hard_bounds)
+                                                   hard_bounds,
+                                                   sparse)
         # invalidate fitness since we have new genome
         individual.fitness = None
 
@@ -61,7 +66,8 @@ def genome_mutate_gaussian(genome: list,
                            std: float,
                            expected_num_mutations: float = 1,
                            hard_bounds: Tuple[float, float] =
-                             (-math.inf, math.inf)) -> list:
+                             (-math.inf, math.inf),
+                           sparse: bool = False) -> list:
     """ Perform actual Gaussian mutation on real-valued genes
 
     This used to be inside `mutate_gaussian`, but was moved outside it so that
@@ -69,8 +75,17 @@ def genome_mutate_gaussian(genome: list,
     thus saving us from doing a copy-n-paste of the same code to the segmented
     sub-package.
 
+    With `sparse=True`, rather than drawing a random number for every gene
+    to decide whether to mutate it, we sample only the positions of the genes
+    to mutate (see `leap_ec.ops.sample_mutation_positions()`).  This is much
+    faster for long genomes with low mutation rates.  As in the dense mode,
+    every gene is clipped to `hard_bounds`, so that the two modes produce
+    the same distribution of genomes; with the default, infinite bounds we
+    skip clipping the genes that weren't mutated.
+
     :param genome: of real-valued numbers that will potentially be mutated
     :param expected_num_mutations: on average how many mutations are expected
+    :param sparse: if True, sample just the positions of the genes to mutate
     :return: mutated genome
     """
     def add_gauss(x, std, probability):
@@ -90,6 +105,16 @@ def genome_mutate_gaussian(genome: list,
     else:
         p = compute_expected_probability(expected_num_mutations, genome)
 
+    if sparse:
+        if math.isinf(hard_bounds[0]) and math.isinf(hard_bounds[1]):
+            genome = list(genome)
+        else:
+            genome = [clip(x) for x in genome]
+        for i in sample_mutation_positions(len(genome), p):
+            s = std[i] if util.is_sequence(std) else std
+            genome[i] = clip(random.gauss(genome[i], s))
+        return genome
+
     if util.is_sequence(std):
         # We're given a vector of "shadow standard deviations" so apply
         # each sigma individually to each gene
@@ -13,6 +13,15 @@ import numpy as np
 from leap_ec.problem import ScalarProblem
 
 
+def _as_matrix(phenomes):
+    """Convert a batch of phenomes into an (N, D) float matrix."""
+    X = np.asarray(phenomes, dtype=float)
+    if X.ndim != 2:
+        raise ValueError(
+            f"Expected an (N, D) batch of phenomes, but got an array of shape {X.shape}.")
+    return X
+
+
 ##############################
 # Class SpheroidProblem
 ##############################
@@ -57,6 +66,20 @@ class SpheroidProblem(ScalarProblem):
         """
         return sum([x ** 2 for x in phenome])
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes at once:
+
+        >>> SpheroidProblem().evaluate_batch([[0.5, 0.8, 1.5], [1.0, 1.0, 1.0]])
+        array([3.14, 3.  ])
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :return: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        return np.sum(X ** 2, axis=1)
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We minimize by default:
@@ -130,6 +153,18 @@ class RastriginProblem(ScalarProblem):
             len(phenome) + sum([x ** 2 - self.a *
                                 np.cos(2 * np.pi * x) for x in phenome])
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        return self.a * X.shape[1] + \
+            np.sum(X ** 2 - self.a * np.cos(2 * np.pi * X), axis=1)
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We minimize by default:
@@ -202,6 +237,18 @@ class RosenbrockProblem(ScalarProblem):
             sum += 100 * (x_p - x ** 2) ** 2 + (x - 1) ** 2
         return sum
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        x, x_p = X[:, :-1], X[:, 1:]
+        return np.sum(100 * (x_p - x ** 2) ** 2 + (x - 1) ** 2, axis=1)
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We minimize by default:
@@ -271,6 +318,16 @@ class StepProblem(ScalarProblem):
         """
         return np.sum(np.floor(phenome))
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        return np.sum(np.floor(_as_matrix(phenomes)), axis=1)
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We maximize by default:
@@ -340,6 +397,25 @@ class NoisyQuarticProblem(ScalarProblem):
         noise = np.random.normal(0, 1, len(phenome))
         return np.sum(np.dot(indices, np.power(phenome, 4)) + noise)
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        The noise is drawn in one (N, D) block, which consumes NumPy's global
+        random stream in the same order as N successive calls to
+        `evaluate()` would.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        indices = np.arange(X.shape[1])
+        noise = np.random.normal(0, 1, X.shape)
+        # Like evaluate(), which broadcasts the weighted sum over all D noise
+        # terms before summing, so that it's counted D times
+        return X.shape[1] * (np.power(X, 4) @ indices) + np.sum(noise, axis=1)
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We minimize by default:
@@ -434,6 +510,20 @@ class ShekelProblem(ScalarProblem):
 
         return 1 / (1 / self.k + np.sum([1 / f(j) for j in range(25)]))
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, 2) matrix of
+        phenomes, evaluating all 25 foxholes at once.
+
+        :param phenomes: (N, 2) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        assert (X.shape[1] == 2)
+        f = self.c[:25] + (X[:, [0]] - self.points[0]) ** 6 \
+            + (X[:, [1]] - self.points[1]) ** 6
+        return 1 / (1 / self.k + np.sum(1 / f, axis=1))
+
     def worse_than(self, first_fitness, second_fitness):
         """
         We minimize by default:
@@ -506,6 +596,20 @@ class GriewankProblem(ScalarProblem):
         t2 = np.prod(np.cos(phenome / i_vector))
         return t1 - t2 + 1
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        t1 = np.sum(np.power(X, 2) / 4000, axis=1)
+        i_vector = np.sqrt(np.arange(1, X.shape[1] + 1))
+        t2 = np.prod(np.cos(X / i_vector), axis=1)
+        return t1 - t2 + 1
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -563,6 +667,21 @@ class AckleyProblem(ScalarProblem):
         t2 = np.exp(1.0 / d * np.sum(np.cos(self.c * phenome)))
         return t1 - t2 + self.a + np.e
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        d = X.shape[1]
+        t1 = -self.a * np.exp(-self.b * np.sqrt(
+            1.0 / d * np.sum(np.power(X, 2), axis=1)))
+        t2 = np.exp(1.0 / d * np.sum(np.cos(self.c * X), axis=1))
+        return t1 - t2 + self.a + np.e
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -627,6 +746,26 @@ class WeierstrassProblem(ScalarProblem):
             result += t1 - (d + 1) * t2
         return result
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes, with the sum over `k` done as one more array axis.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        k = np.arange(self.kmax)
+        a_k = float(self.a) ** k
+        b_k = float(self.b) ** k
+        # t1 has shape (N, D); t2 is the same constant for every dimension
+        t1 = np.sum(a_k * np.cos(2 * np.pi * b_k * (X[:, :, None] + 0.5)),
+                    axis=2)
+        t2 = np.sum(a_k * np.cos(np.pi * b_k))
+        # As in evaluate(), the t2 term for dimension d is weighted by (d + 1)
+        weights = np.arange(1, X.shape[1] + 1)
+        return np.sum(t1, axis=1) - t2 * np.sum(weights)
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -719,6 +858,23 @@ class LangermannProblem(ScalarProblem):
                       * np.cos(np.pi * np.sum((phenome - self.a[i]) ** 2))
         return result
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        if X.shape[1] != self.a.shape[1]:
+            raise ValueError(
+                f"Received {X.shape[1]}-dimensional phenomes, but this is a {self.a.shape[1]}-dimensional Langerman function.")
+        # Squared distance from every phenome to every a_i, shape (N, m)
+        sq = np.sum((X[:, None, :] - self.a[None, :self.m, :]) ** 2, axis=2)
+        return -np.sum(self.c[:self.m] * np.exp(-1.0 / np.pi * sq)
+                       * np.cos(np.pi * sq), axis=1)
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -813,6 +969,24 @@ class LunacekProblem(ScalarProblem):
         sinusoid = 10 * np.sum(1 - np.cos(2 * np.pi * (phenome - self.mu_1)))
         return min(sphere1, sphere2) + sinusoid
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        if X.shape[1] != self.N:
+            warnings.warn(
+                f"Phenomes have length {X.shape[1]}, but this function expected {self.N}-dimensional input.")
+        sphere1 = np.sum((X - self.mu_1) ** 2, axis=1)
+        sphere2 = self.d * X.shape[1] + self.s * \
+            np.sum((X - self.mu_2) ** 2, axis=1)
+        sinusoid = 10 * np.sum(1 - np.cos(2 * np.pi * (X - self.mu_1)), axis=1)
+        return np.minimum(sphere1, sphere2) + sinusoid
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -869,6 +1043,18 @@ class SchwefelProblem(ScalarProblem):
         return np.sum(-phenome * np.sin(np.sqrt(np.abs(phenome)))
                       ) + self.alpha * len(phenome)
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        return np.sum(-X * np.sin(np.sqrt(np.abs(X))), axis=1) \
+            + self.alpha * X.shape[1]
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -913,6 +1099,18 @@ class GaussianProblem(ScalarProblem):
 
         return self.height * np.exp(-np.sum(np.power(phenome/self.width, 2)))
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        return self.height * np.exp(
+            -np.sum(np.power(X / self.width, 2), axis=1))
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -999,6 +1197,22 @@ class CosineFamilyProblem(ScalarProblem):
         # 1
         return -2 / (self.alpha + 1) * value
 
+    def evaluate_batch(self, phenomes):
+        """
+        Computes the function value of every row of an (N, D) matrix of
+        phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :returns: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        term1 = -np.cos((self.global_optima_counts - 1) * 2 * np.pi * X)
+        term2 = - self.alpha * \
+            np.cos((self.global_optima_counts - 1) * 2 *
+                   np.pi * self.local_optima_counts * X)
+        value = np.sum(term1 + term2, axis=1) / (2 * self.dimensions)
+        return -2 / (self.alpha + 1) * value
+
     def __str__(self):
         """Returns the name of the class.
 
@@ -1008,10 +1222,150 @@ class CosineFamilyProblem(ScalarProblem):
         return CosineFamilyProblem.__name__
 
 
+##############################
+# Class AffineTransformedProblem
+##############################
+class AffineTransformedProblem(ScalarProblem):
+    """
+    Base class for problems that evaluate a wrapped problem at an affine
+    transformation of the input point, :math:`f(A\\vec{x} + \\vec{b})`.
+
+    The linear part `linear` may be `None` (the identity), a scalar or
+    vector (a diagonal matrix), or a full matrix; `shift` may be `None` (no
+    shift) or a vector.
+
+    When the wrapped problem is itself an `AffineTransformedProblem`, the two
+    maps are composed into one when this problem is constructed, so a stack
+    of wrappers such as
+
+    >>> p = TranslatedProblem(ScaledProblem(SpheroidProblem(), new_bounds=(0, 1)),
+    ...                       offset=[0.1, 0.2])
+
+    applies a single precomputed map before calling the innermost problem,
+    rather than allocating a new point at every layer:
+
+    >>> str(p.base_problem)
+    'SpheroidProblem'
+    >>> round(p.evaluate([0.6, 0.7]), 5)
+    0.0
+
+    Batches of points are transformed with a single matrix product, and then
+    handed to the base problem's `evaluate_batch()` (if it has one):
+
+    >>> p.evaluate_batch([[0.6, 0.7], [0.1, 0.2]]).round(5)
+    array([ 0.    , 52.4288])
+
+    Note that the fused map is computed once, at construction: modifying the
+    `offset`, `matrix`, or `bounds` of a wrapper (or of a wrapper nested
+    inside it) afterwards will not change how it evaluates points.
+
+    :param problem: the problem to wrap
+    :param linear: the linear part of this layer's map
+    :param shift: the translation part of this layer's map
+    :param bool maximize: defaults to `problem.maximize`
+    """
+    def __init__(self, problem, linear=None, shift=None, maximize=None):
+        assert (problem is not None)
+        if maximize is None:
+            maximize = problem.maximize
+        super().__init__(maximize=maximize)
+        self.problem = problem
+
+        # The number of dimensions this layer's map requires, if it has any
+        self._dimensions = None
+        for part in (linear, shift):
+            if part is not None and np.ndim(part) > 0:
+                self._dimensions = len(part)
+
+        if isinstance(problem, AffineTransformedProblem):
+            # f_inner(A_i y + b_i) with y = A x + b
+            # is f_base((A_i A) x + (A_i b + b_i))
+            self._linear = _compose_linear(problem._linear, linear)
+            self._shift = _add_shift(_apply_linear(problem._linear, shift),
+                                     problem._shift)
+            self.base_problem = problem.base_problem
+        else:
+            self._linear = linear
+            self._shift = shift
+            self.base_problem = problem
+
+    def transform(self, phenomes):
+        """
+        Map a point (or an (N, D) matrix of points) into the base problem's
+        coordinate system.
+
+        :param phenomes: a real-valued vector or matrix of row vectors
+        :return: the transformed point(s), as an array
+        """
+        X = _apply_linear(self._linear, np.asarray(phenomes))
+        if self._shift is not None:
+            X = X + self._shift
+        return X
+
+    def evaluate(self, phenome):
+        if self._dimensions is not None:
+            assert (len(phenome) == self._dimensions), \
+                f"Tried to evalute a {len(phenome)}-D genome in a " \
+                f"{self._dimensions}-D fitness function. "
+        return self.base_problem.evaluate(self.transform(phenome))
+
+    def evaluate_batch(self, phenomes):
+        """
+        Evaluate every row of an (N, D) matrix of phenomes.
+
+        :param phenomes: (N, D) real-valued matrix of phenomes
+        :return: a length-N array of fitnesses
+        """
+        X = _as_matrix(phenomes)
+        if self._dimensions is not None:
+            assert (X.shape[1] == self._dimensions), \
+                f"Tried to evalute {X.shape[1]}-D genomes in a " \
+                f"{self._dimensions}-D fitness function. "
+        Y = self.transform(X)
+        if hasattr(self.base_problem, 'evaluate_batch'):
+            return np.asarray(self.base_problem.evaluate_batch(Y))
+        return np.array([self.base_problem.evaluate(y) for y in Y])
+
+
+def _apply_linear(linear, X):
+    """Apply a linear map (identity, diagonal, or matrix) to a vector or to
+    the rows of a matrix."""
+    if linear is None or X is None:
+        return X
+    if np.ndim(linear) < 2:
+        return X * linear
+    return X @ np.transpose(linear)
+
+
+def _compose_linear(inner, outer):
+    """:return: the linear map that applies `outer` and then `inner`"""
+    if inner is None:
+        return outer
+    if outer is None:
+        return inner
+    if np.ndim(inner) < 2 and np.ndim(outer) < 2:
+        return inner * outer
+    if np.ndim(inner) < 2:
+        # diag(inner) @ outer scales the rows of outer
+        return np.reshape(inner, (-1, 1)) * outer
+    if np.ndim(outer) < 2:
+        # inner @ diag(outer) scales the columns of inner
+        return inner * outer
+    return inner @ outer
+
+
+def _add_shift(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
 ##############################
 # Class TranslatedProblem
 ##############################
-class TranslatedProblem(ScalarProblem):
+class TranslatedProblem(AffineTransformedProblem):
     """
     Takes an existing fitness function and translates it by applying a fixed
     offset vector.
@@ -1044,12 +1398,11 @@ class TranslatedProblem(ScalarProblem):
        plot_2d_problem(translated_problem, kind='contour', xlim=bounds, ylim=bounds, ax=plt.gca(), granularity=0.025)
     """
     def __init__(self, problem, offset, maximize=None):
-        if maximize is None:
-            maximize = problem.maximize
-        super().__init__(maximize=maximize)
-        assert (problem is not None)
-        self.problem = problem
         self.offset = np.array(offset)
+        # Substract the offset so that we are moving the origin *to* the offset.
+        # This way we can think of it as offsetting the fitness function,
+        # rather than the input points.
+        super().__init__(problem, shift=-self.offset, maximize=maximize)
         if hasattr(problem, 'bounds'):
             self.bounds = problem.bounds
 
@@ -1085,14 +1438,7 @@ class TranslatedProblem(ScalarProblem):
         >>> t_sphere.evaluate(genome)
         90.86
         """
-        assert (len(phenome) == len(self.offset)), \
-            f"Tried to evalute a {len(phenome)}-D genome in a " \
-            f"{len(self.offset)}-D fitness function. "
-        # Substract the offset so that we are moving the origin *to* the offset.
-        # This way we can think of it as offsetting the fitness function,
-        # rather than the input points.
-        new_phenome = np.array(phenome) - self.offset
-        return self.problem.evaluate(new_phenome)
+        return super().evaluate(phenome)
 
     def __str__(self):
         """Returns the name of this class, followed by the `__str__ of the wrapped class
@@ -1107,29 +1453,33 @@ class TranslatedProblem(ScalarProblem):
 ################################
 # Class ScaledProblem
 ################################
-class ScaledProblem(ScalarProblem):
-    """ Scale the search space of a fitness function up or down."""
+class ScaledProblem(AffineTransformedProblem):
+    """ Scale the search space of a fitness function up or down.
+
+    Points in `new_bounds` are mapped linearly onto the wrapped problem's
+    original `bounds`:
+
+    >>> s = ScaledProblem(SpheroidProblem(), new_bounds=(0, 1))
+    >>> round(s.evaluate([0.5, 1.0]), 5)
+    26.2144
+    """
 
     def __init__(self, problem, new_bounds, maximize=None):
-        if maximize is None:
-            maximize = problem.maximize
-        super().__init__(maximize=maximize)
-        self.problem = problem
         if not hasattr(problem, 'bounds'):
             raise ValueError(f"Problem {problem} has no 'bounds' attribute.  "
                              f"The original bounds must be defined before "
                              f"we can scale them with this method.")
         self.old_bounds = problem.bounds
         self.bounds = new_bounds
-
-    def evaluate(self, phenome):
-        phenome = np.array(phenome)
-        transformed_phenome = self.old_bounds[0] + (
-                    phenome - self.bounds[0]) / (
-                                          self.bounds[1] - self.bounds[0]) \
-                              * (self.old_bounds[1] - self.old_bounds[0])
-        assert (len(transformed_phenome) == len(phenome))
-        return self.problem.evaluate(transformed_phenome)
+        old_low, old_high = (np.asarray(b, dtype=float)
+                             for b in self.old_bounds[:2])
+        low, high = (np.asarray(b, dtype=float) for b in new_bounds[:2])
+        # old_low + (x - low) / (high - low) * (old_high - old_low); degenerate
+        # bounds only become a problem if we actually evaluate something
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = (old_high - old_low) / (high - low)
+            shift = old_low - low * scale
+        super().__init__(problem, linear=scale, shift=shift, maximize=maximize)
 
     def __str__(self):
         """Returns the name of this class, followed by the `__str__ of the wrapped class
@@ -1144,7 +1494,7 @@ class ScaledProblem(ScalarProblem):
 ################################
 # Class MatrixTransformedProblem
 ################################
-class MatrixTransformedProblem(ScalarProblem):
+class MatrixTransformedProblem(AffineTransformedProblem):
     """ Apply a linear transformation to a fitness function.
 
     :param matrix: an nxn matrix, where n is the genome length.
@@ -1185,13 +1535,9 @@ class MatrixTransformedProblem(ScalarProblem):
 
     """
     def __init__(self, problem, matrix, maximize=None):
-        if maximize is None:
-            maximize = problem.maximize
-        super().__init__(maximize=maximize)
-        assert (problem is not None)
         assert (len(matrix) == len(matrix[0]))
         self.matrix = np.array(matrix)
-        self.problem = problem
+        super().__init__(problem, linear=self.matrix, maximize=maximize)
         if hasattr(problem, 'bounds'):
             self.bounds = problem.bounds
 
@@ -1292,11 +1638,7 @@ class MatrixTransformedProblem(ScalarProblem):
         >>> round(r.evaluate([0, 1]), 5)
         2.0
         """
-        assert (len(phenome) == len(
-            self.matrix)), f"Tried to evalute a {len(phenome)}-D genome in a " \
-                           f"{len(self.matrix)}-D fitness function. "
-        new_point = np.matmul(self.matrix, phenome)
-        return self.problem.evaluate(new_point)
+        return super().evaluate(phenome)
 
     def __str__(self):
         """Returns the name of this class, followed by the `__str__ of the wrapped class
@@ -8,6 +8,7 @@ algorithms---so that representation-related components are grouped
 together and clearly labeled `Representation`.
 """
 from leap_ec.individual import Individual
+from leap_ec.population import PopulationArray
 
 ##############################
 # Class Representation
@@ -17,12 +18,19 @@ class Representation():
         conveniently combines a decoder, initializer, and an Individual
         class since those always work in tandem, but can still be loosely
         coupled.
+
+        If `population_array` is set, `create_population()` will store the
+        population in a :py:class:`~leap_ec.population.PopulationArray`
+        instead of a `list`.  This requires an initializer that produces
+        fixed-length, numeric genomes.
      """
 
-    def __init__(self, decoder, initialize, individual_cls=Individual):
+    def __init__(self, decoder, initialize, individual_cls=Individual,
+                 population_array=False):
         self.decoder = decoder
         self.initialize = initialize
         self.individual_cls = individual_cls
+        self.population_array = population_array
 
     def create_population(self, pop_size, problem):
         """ make a new population
@@ -31,6 +39,13 @@ class Representation():
         :param problem: to be solved
         :return: a population of `individual_cls` individuals
         """
+        if self.population_array:
+            return PopulationArray.create(pop_size,
+                                          initialize=self.initialize,
+                                          decoder=self.decoder,
+                                          problem=problem,
+                                          individual_cls=self.individual_cls)
+
         return self.individual_cls.create_population(pop_size,
                                                      initialize=self.initialize,
                                                      decoder=self.decoder,
@@ -29,6 +29,8 @@ class SegmentedDecoder(Decoder):
         super().__init__()
 
         self.segment_decoder = segment_decoder
+        # We're exactly as pure as the decoder we apply to each segment
+        self.memoize = getattr(segment_decoder, 'memoize', False)
 
     def decode(self, genome, *args, **kwargs):
         """
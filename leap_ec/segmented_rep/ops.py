@@ -90,13 +90,14 @@ def add_segment(next_individual: Iterator,
 
         if random.random() < probability:
             new_segment = seq_initializer()
+            genome = individual.writable_genome()
 
             if append:
-                individual.genome.append(new_segment)
+                genome.append(new_segment)
             else:
                 # + 1 to allow for appending new segment
-                insertion_point = random.randrange(len(individual.genome) + 1)
-                individual.genome.insert(insertion_point, new_segment)
+                insertion_point = random.randrange(len(genome) + 1)
+                genome.insert(insertion_point, new_segment)
 
             # invalidate the fitness since we have a modified genome
             individual.fitness = None
@@ -133,7 +134,7 @@ def remove_segment(next_individual: Iterator,
 
             if random.random() < probability:
                 removed_segment = random.randrange(len(individual.genome))
-                del individual.genome[removed_segment]
+                del individual.writable_genome()[removed_segment]
 
                 # invalidate the fitness since we have a modified genome
                 individual.fitness = None
@@ -165,15 +166,15 @@ def copy_segment(next_individual: Iterator,
         individual = next(next_individual)
 
         if random.random() < probability:
-            copied_segment = \
-                individual.genome[random.randrange(len(individual.genome))]
+            genome = individual.writable_genome()
+            copied_segment = genome[random.randrange(len(genome))]
 
             if append:
-                individual.genome.insert(len(individual.genome), copied_segment)
+                genome.insert(len(genome), copied_segment)
             else:
                 # + 1 to allow for appending new segment
-                insertion_point = random.randrange(len(individual.genome) + 1)
-                individual.genome.insert(insertion_point, copied_segment)
+                insertion_point = random.randrange(len(genome) + 1)
+                genome.insert(insertion_point, copied_segment)
 
             # invalidate the fitness since we have a modified genome
             individual.fitness = None
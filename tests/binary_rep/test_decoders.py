@@ -0,0 +1,67 @@
+"""
+    Unit tests for the binary decoders
+"""
+import numpy as np
+
+from leap_ec.binary_rep.decoders import BinaryToIntDecoder, \
+    BinaryToIntGreyDecoder, BinaryToRealDecoder, BinaryToRealGreyDecoder
+from leap_ec.binary_rep.packed import PackedBits
+
+
+def _reference_ints(genome, descriptors, gray=False):
+    """Decode the slow, obvious way, via strings of bits."""
+    values = []
+    offset = 0
+    for d in descriptors:
+        bits = genome[offset:offset + d]
+        if gray:
+            # Each binary bit is the XOR of the Gray bits up to it
+            bits = list(np.cumsum(bits) % 2)
+        values.append(int(''.join(str(b) for b in bits), 2))
+        offset += d
+    return values
+
+
+def test_int_decoders_match_reference():
+    descriptors = (1, 5, 16, 33)
+    for gray, decoder in [(False, BinaryToIntDecoder(*descriptors)),
+                          (True, BinaryToIntGreyDecoder(*descriptors))]:
+        for _ in range(50):
+            genome = list(np.random.randint(0, 2, sum(descriptors)))
+            expected = _reference_ints(genome, descriptors, gray)
+            assert decoder.decode(genome) == expected
+            assert decoder.decode(np.array(genome)) == expected
+            assert decoder.decode(PackedBits.from_bits(genome)) == expected
+
+
+def test_wide_segments():
+    """Segments wider than 62 bits should still decode exactly."""
+    descriptors = (100, 3)
+    for gray, decoder in [(False, BinaryToIntDecoder(*descriptors)),
+                          (True, BinaryToIntGreyDecoder(*descriptors))]:
+        genome = list(np.random.randint(0, 2, 103))
+        assert decoder.decode(genome) == \
+            _reference_ints(genome, descriptors, gray)
+
+
+def test_decode_batch_matches_decode():
+    decoders = [BinaryToIntDecoder(4, 7, 2),
+                BinaryToIntGreyDecoder(4, 7, 2),
+                BinaryToRealDecoder((4, -1, 1), (7, 0, 10), (2, 5, 6)),
+                BinaryToRealGreyDecoder((4, -1, 1), (7, 0, 10), (2, 5, 6))]
+    genomes = np.random.randint(0, 2, (20, 13))
+    for decoder in decoders:
+        expected = [decoder.decode(list(g)) for g in genomes]
+        batch = decoder.decode_batch(genomes)
+        assert batch.shape == (20, 3)
+        assert np.allclose(batch, expected)
+        packed = decoder.decode_batch([PackedBits.from_bits(g)
+                                       for g in genomes])
+        assert np.allclose(packed, expected)
+
+
+def test_real_bounds():
+    """All zeros and all ones should map onto the segment bounds."""
+    decoder = BinaryToRealDecoder((10, -3, 7), (3, 0, 1))
+    assert decoder.decode([0] * 13) == [-3, 0]
+    assert np.allclose(decoder.decode([1] * 13), [7, 1])
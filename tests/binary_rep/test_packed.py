@@ -0,0 +1,163 @@
+"""
+    Unit tests for the packed-bit binary representation
+"""
+from collections import Counter
+import itertools
+from math import factorial
+
+import numpy as np
+import pytest
+
+from leap_ec import ops
+from leap_ec.algorithm import generational_ea
+from leap_ec.binary_rep import ops as binary_ops
+from leap_ec.binary_rep.decoders import BinaryToIntDecoder, \
+    BinaryToIntGreyDecoder, BinaryToRealDecoder
+from leap_ec.binary_rep.initializers import create_packed_binary_sequence
+from leap_ec.binary_rep.packed import PackedBits
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.cache import FitnessCache
+from leap_ec.context import context
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual
+from leap_ec.representation import Representation
+from leap_ec import statistical_helpers as stat
+
+
+def test_roundtrip():
+    """Packing and unpacking should preserve bits of any length."""
+    for length in [0, 1, 7, 8, 9, 63, 64, 65]:
+        bits = list(np.random.randint(0, 2, length))
+        genome = PackedBits.from_bits(bits)
+        assert len(genome) == length
+        assert genome.to_bits() == bits
+        assert list(genome) == bits
+
+
+def test_random_pads_with_zeros():
+    """The unused bits at the end of the last byte should always be zero,
+    so that popcount and equality don't depend on them."""
+    for _ in range(20):
+        genome = PackedBits.random(13)
+        assert genome.words[-1] & 0b00000111 == 0
+
+
+def test_popcount():
+    bits = list(np.random.randint(0, 2, 1001))
+    genome = PackedBits.from_bits(bits)
+    assert genome.popcount() == sum(bits)
+    assert MaxOnes().evaluate(genome) == sum(bits)
+
+
+def test_bitflip_all():
+    genome = PackedBits.from_bits([0, 1] * 10)
+    mutated = binary_ops.genome_mutate_bitflip(genome,
+                                               expected_num_mutations=20)
+    assert mutated.to_bits() == [1, 0] * 10
+    # The original is left alone
+    assert genome.to_bits() == [0, 1] * 10
+
+
+def test_bitflip_count():
+    """Mutation should flip bits only within the genome, and about the
+    expected number of them."""
+    genome = PackedBits.zeros(10_001)
+    flips = [binary_ops.genome_mutate_bitflip(genome, 5).popcount()
+             for _ in range(500)]
+    assert 4 < np.mean(flips) < 6
+    assert all(binary_ops.genome_mutate_bitflip(genome, 5).words[-1] & 0x7F
+               == 0 for _ in range(100))
+
+
+def test_packed_uniform_crossover():
+    pop = [Individual(PackedBits.from_bits('0' * 11)),
+           Individual(PackedBits.from_bits('1' * 11))]
+    i = ops.naive_cyclic_selection(pop)
+    new_pop = list(itertools.islice(
+        binary_ops.packed_uniform_crossover(i, p_swap=1.0), 2))
+
+    assert str(new_pop[0].genome) == '1' * 11
+    assert str(new_pop[1].genome) == '0' * 11
+
+
+@pytest.mark.stochastic
+def test_random_bit_mask():
+    """Each bit of a mask should be set with probability p, whether the mask
+    is built from random bytes or from random floats."""
+    N = 2000
+    for p in [0.5, 0.75, 0.3]:
+        counts = Counter(int(np.unpackbits(binary_ops.random_bit_mask(8, p)).sum())
+                         for _ in range(N))
+        expected = {k: N * factorial(8) // (factorial(k) * factorial(8 - k))
+                       * p**k * (1 - p)**(8 - k)
+                    for k in range(8)}
+        # Fill in the last count so that the totals match exactly
+        expected[8] = N - sum(expected.values())
+        assert stat.stochastic_equals(expected, counts, p=0.001)
+
+
+def test_packed_n_ary_crossover():
+    """One-point crossover should produce complementary prefix/suffix
+    children."""
+    for _ in range(20):
+        pop = [Individual(PackedBits.from_bits('0' * 20)),
+               Individual(PackedBits.from_bits('1' * 20))]
+        child1, child2 = list(itertools.islice(
+            binary_ops.packed_n_ary_crossover(iter(pop), num_points=1), 2))
+        bits = str(child1.genome)
+
+        # At most one switch between the parents' segments
+        assert sum(a != b for a, b in zip(bits, bits[1:])) <= 1
+        assert str(child2.genome) == ''.join('1' if b == '0' else '0'
+                                             for b in bits)
+
+
+def test_decoders_match_lists():
+    """The decoders should give the same phenome for packed and list
+    genomes."""
+    decoders = [BinaryToIntDecoder(3, 10, 1, 30),
+                BinaryToIntGreyDecoder(5, 9),
+                BinaryToRealDecoder((7, -5.12, 5.12), (9, 0, 1))]
+    for decoder in decoders:
+        length = sum(getattr(decoder, 'descriptors', None)
+                     or decoder.len_segments)
+        for _ in range(20):
+            bits = list(np.random.randint(0, 2, length))
+            assert decoder.decode(PackedBits.from_bits(bits)) == \
+                decoder.decode(bits)
+
+
+def test_field_out_of_range():
+    with pytest.raises(IndexError):
+        PackedBits.zeros(8).field(4, 9)
+
+
+def test_cache_key():
+    """Equal packed genomes should share a cache entry."""
+    cache = FitnessCache()
+    cache.put(PackedBits.from_bits('1011'), 3)
+    assert cache.get(PackedBits.from_bits('1011')) == 3
+    assert PackedBits.from_bits('1010') not in cache
+
+
+def test_generational_ea():
+    """A standard binary EA should run end to end on packed genomes."""
+    context['leap']['generation'] = 0
+    representation = Representation(
+        decoder=IdentityDecoder(),
+        initialize=create_packed_binary_sequence(length=100))
+
+    results = list(generational_ea(
+        generations=5, pop_size=10, problem=MaxOnes(),
+        representation=representation,
+        pipeline=[ops.tournament_selection,
+                  ops.clone(copy_on_write=True),
+                  binary_ops.packed_uniform_crossover,
+                  binary_ops.mutate_bitflip(expected_num_mutations=1),
+                  ops.evaluate,
+                  ops.pool(size=10)]))
+
+    assert len(results) == 6
+    best = results[-1][1]
+    assert isinstance(best.genome, PackedBits)
+    assert best.fitness == best.genome.count(1)
@@ -0,0 +1,51 @@
+"""
+    Unit tests for the binary benchmark problems
+"""
+import numpy as np
+from PIL import Image
+import pytest
+
+from leap_ec.binary_rep.packed import PackedBits
+from leap_ec.binary_rep.problems import ImageProblem
+
+
+@pytest.fixture
+def image_problem(tmp_path):
+    """An ImageProblem for a random 13x7 black-and-white image (so that the
+    number of pixels isn't a multiple of 8)."""
+    pixels = np.random.randint(0, 2, (7, 13)).astype(bool)
+    path = tmp_path / 'target.png'
+    Image.fromarray(pixels).save(path)
+    return ImageProblem(str(path), size=(13, 7))
+
+
+def test_image_problem_matches_pixel_count(image_problem):
+    """Fitness should be the number of pixels that match the target, for
+    every kind of genome."""
+    target = image_problem.flat_img.astype(int)
+    for _ in range(20):
+        genome = np.random.randint(0, 2, len(target))
+        expected = int(np.sum(genome == target))
+
+        assert image_problem.evaluate(list(genome)) == expected
+        assert image_problem.evaluate(genome) == expected
+        assert image_problem.evaluate(PackedBits.from_bits(genome)) == expected
+
+
+def test_image_problem_perfect(image_problem):
+    assert image_problem.evaluate(list(image_problem.flat_img.astype(int))) \
+        == len(image_problem.flat_img)
+
+
+def test_image_problem_batch(image_problem):
+    genomes = np.random.randint(0, 2, (10, len(image_problem.flat_img)))
+    expected = [image_problem.evaluate(list(g)) for g in genomes]
+
+    assert list(image_problem.evaluate_batch(genomes)) == expected
+    assert list(image_problem.evaluate_batch(
+        [PackedBits.from_bits(g) for g in genomes])) == expected
+
+
+def test_image_problem_bad_length(image_problem):
+    with pytest.raises(AssertionError):
+        image_problem.evaluate([0, 1])
@@ -3,10 +3,12 @@ import itertools
 from math import floor, ceil
 
 import networkx as nx
+import numpy as np
 import pytest
 
 from leap_ec.individual import Individual
 from leap_ec.executable_rep import cgp
+from leap_ec.executable_rep.problems import TruthTableProblem
 import leap_ec.statistical_helpers as stat
 
 
@@ -138,6 +140,141 @@ def test_call2(tt_inputs):
 
 
 
+def _graph_call(graph, num_inputs, num_outputs, input_):
+    """Execute a circuit by walking its full graph, the slow way."""
+    values = dict(enumerate(input_))
+    num_hidden = len(graph.nodes) - num_inputs - num_outputs
+    for i in range(num_inputs, num_inputs + num_hidden):
+        in_edges = sorted(graph.in_edges(i, data='order'), key=lambda e: e[2])
+        values[i] = graph.nodes[i]['function'](*[values[e[0]] for e in in_edges])
+    return [values[list(graph.in_edges(i))[0][0]]
+            for i in range(num_inputs + num_hidden, len(graph.nodes))]
+
+
+def test_compiled_matches_graph(tt_inputs):
+    """The compiled program should compute the same outputs as walking the
+    full graph, for random circuits."""
+    decoder = cgp.CGPDecoder(
+                        primitives=[
+                            lambda x, y: not (x and y),  # NAND
+                            lambda x, y: not x,  # NOT (ignoring y)
+                            lambda x, y: x or y  # OR
+                        ],
+                        num_inputs=2,
+                        num_outputs=2,
+                        num_layers=4,
+                        nodes_per_layer=3,
+                        max_arity=2,
+                        levels_back=2
+                    )
+    create = cgp.create_cgp_vector(decoder)
+    for _ in range(50):
+        genome = create()
+        phenome = decoder.decode(genome)
+        graph = decoder.build_graph(genome)
+        for in_vals in tt_inputs:
+            assert(phenome(in_vals) == _graph_call(graph, 2, 2, in_vals))
+
+
+def test_inactive_nodes_skipped(test_2layer_circuit):
+    """Node 4 doesn't feed into the output, so it shouldn't be compiled."""
+    genome, phenome, decoder = test_2layer_circuit
+    assert(decoder.active_nodes(genome) == [2, 3, 5])
+    assert(len(phenome.program) == 3)
+
+
+def test_graph_is_lazy(test_2layer_circuit):
+    """The graph shouldn't be built until something asks for it."""
+    genome, _, decoder = test_2layer_circuit
+    phenome = decoder.decode(genome)
+    assert(phenome._graph is None)
+    assert(7 == phenome.graph.number_of_nodes())
+
+
+def test_executable_from_graph(test_2layer_circuit, tt_inputs):
+    """An executable constructed from just a graph should compile it."""
+    genome, _, decoder = test_2layer_circuit
+    phenome = cgp.CGPExecutable(decoder.primitives, 2, 1,
+                                decoder.build_graph(genome))
+    assert([ phenome(in_vals) for in_vals in tt_inputs ] ==
+           [ [True], [False], [False], [False] ])
+
+
+def test_vectorized_matches_scalar():
+    """A vectorized circuit should compute the same outputs, on a whole
+    truth table at once, as the same circuit executed row by row."""
+    scalar_primitives = [ lambda x, y: not (x and y), lambda x, y: x != y ]
+    vector_primitives = [ lambda x, y: ~(x & y), np.logical_xor ]
+    params = dict(num_inputs=4, num_outputs=2, num_layers=5,
+                  nodes_per_layer=2, max_arity=2)
+    scalar_decoder = cgp.CGPDecoder(scalar_primitives, **params)
+    vector_decoder = cgp.CGPDecoder(vector_primitives, vectorized=True, **params)
+
+    problem = TruthTableProblem(lambda x: [ x[0] ^ x[1], x[2] and x[3] ],
+                                num_inputs=4, num_outputs=2)
+    table = problem._input_table()
+    create = cgp.create_cgp_vector(scalar_decoder)
+    for _ in range(50):
+        genome = create()
+        scalar = scalar_decoder.decode(genome)
+        vector = vector_decoder.decode(genome)
+
+        expected = np.array([ scalar(list(row)) for row in table ])
+        assert(np.array_equal(vector(table), expected))
+        assert(np.array_equal(scalar(table), expected))
+        assert(problem.evaluate(vector) == problem.evaluate(scalar))
+
+
+@pytest.mark.parametrize('num_inputs', [3, 7])
+def test_bitwise_matches_scalar(num_inputs):
+    """Bit-sliced evaluation should give the same fitness as evaluating one
+    row at a time, including for tables smaller than one word."""
+    scalar_primitives = [ lambda x, y: not (x and y), lambda x, y: x != y ]
+    bitwise_primitives = [ lambda x, y: ~(x & y), np.bitwise_xor ]
+    params = dict(num_inputs=num_inputs, num_outputs=2, num_layers=5,
+                  nodes_per_layer=2, max_arity=2)
+    scalar_decoder = cgp.CGPDecoder(scalar_primitives, **params)
+    bitwise_decoder = cgp.CGPDecoder(bitwise_primitives, bitwise=True, **params)
+
+    problem = TruthTableProblem(lambda x: [ x[0] ^ x[1], x[-1] and not x[0] ],
+                                num_inputs=num_inputs, num_outputs=2)
+    create = cgp.create_cgp_vector(scalar_decoder)
+    for _ in range(50):
+        genome = create()
+        assert(problem.evaluate(bitwise_decoder.decode(genome)) ==
+               problem.evaluate(scalar_decoder.decode(genome)))
+
+
+def test_bitwise_16_inputs():
+    """A 16-input parity circuit should score perfectly on its 65,536-row
+    truth table."""
+    num_inputs = 16
+    problem = TruthTableProblem(lambda x: [ sum(x) % 2 ],
+                                num_inputs=num_inputs, num_outputs=1)
+    decoder = cgp.CGPDecoder([np.bitwise_xor], num_inputs=num_inputs, num_outputs=1,
+                             num_layers=num_inputs - 1, nodes_per_layer=1, max_arity=2,
+                             bitwise=True)
+    # Chain XORs: node i XORs the previous node with input i
+    genome = [0, 0, 1]
+    for i in range(2, num_inputs):
+        genome += [0, num_inputs + i - 2, i]
+    genome += [2*num_inputs - 2]
+
+    assert(problem.evaluate(decoder.decode(genome)) == 1.0)
+    # Only the bit-sliced table is needed to score bitwise executables
+    assert(problem._input_table_cache is None)
+    assert(problem._expected_table_cache is None)
+
+
+def test_truth_table_raw_outputs():
+    """Executables called one row at a time are compared with the target
+    function's outputs exactly as it returns them."""
+    problem = TruthTableProblem(lambda x: [ 2*x[0] ], num_inputs=2, num_outputs=1)
+
+    assert(problem.evaluate(lambda x: [ 2*x[0] ]) == 1.0)
+    assert(problem.evaluate(lambda x: [ x[0] ]) == 0.5)
+
+
 ##############################
 # Tests for cgp_mutate
 ##############################
@@ -183,3 +320,50 @@ def test_cgp_mutate1(test_2layer_circuit):
     for i in range(7):
         print(f"Gene {i}, expected={expected[i]}, observed={observed[i]}")
         assert(stat.stochastic_equals(expected[i], observed[i], p=p))
+
+
+##############################
+# Tests for neutral mutation
+##############################
+def test_neutral_mutate(test_2layer_circuit):
+    """Offspring should keep their parent's fitness exactly when their
+    mutations only touched inactive genes."""
+    genome, _, decoder = test_2layer_circuit
+    active = set(decoder.active_genes(genome))
+    # Node 4 (genes 6-8) isn't connected to the output
+    assert(active == {0, 1, 2, 3, 4, 5, 9, 10, 11, 12})
+
+    parent = Individual(genome[:])
+    parent.fitness = 1.0
+    mutator = cgp.cgp_mutate(decoder, expected_num_mutations=2, neutral=True)
+    offspring = list(mutator(iter([parent]*200)))
+
+    assert(parent.genome == genome)  # The parent is left alone
+    for child in offspring:
+        changed = {i for i, (a, b) in enumerate(zip(genome, child.genome)) if a != b}
+        if changed & active:
+            assert(child.fitness is None)
+        else:
+            assert(child.fitness == 1.0)
+    assert(any(child.fitness == 1.0 for child in offspring))
+    assert(any(child.fitness is None for child in offspring))
+
+
+def test_phenotype_key(test_2layer_circuit):
+    """Genomes that differ only in inactive genes should share a key, and a
+    FitnessCache keyed on it should treat them as the same."""
+    from leap_ec.cache import FitnessCache
+
+    genome, _, decoder = test_2layer_circuit
+    neutral = genome[:]
+    neutral[7] = 0  # An input of inactive node 4
+    rewired = genome[:]
+    rewired[12] = 4  # Connect the output to node 4 instead
+
+    assert(decoder.phenotype_key(genome) == decoder.phenotype_key(neutral))
+    assert(decoder.phenotype_key(genome) != decoder.phenotype_key(rewired))
+
+    cache = FitnessCache(key=decoder.phenotype_key)
+    cache.put(genome, 1.0)
+    assert(cache.get(neutral) == 1.0)
+    assert(rewired not in cache)
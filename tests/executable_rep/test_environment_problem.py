@@ -0,0 +1,93 @@
+"""Unit tests for EnvironmentProblem's vectorized rollouts."""
+import numpy as np
+import pytest
+
+from leap_ec.executable_rep.executable import ArgmaxExecutable, WrapperDecoder
+from leap_ec.executable_rep.neural_network import SimpleNeuralNetworkDecoder
+from leap_ec.executable_rep.problems import EnvironmentProblem
+from leap_ec.individual import Individual
+
+
+class TargetEnvironment:
+    """A pure-Python environment: the observation is a position on a line,
+    the actions 0 and 1 move left and right, and each step that ends closer
+    to the target at +3 is rewarded.  The episode ends at the target, or at
+    -3.
+
+    Each copy can be started at a different position with `seed()`.
+    """
+    def __init__(self, start=0):
+        self.start = start
+
+    def seed(self, seed):
+        self.start = seed % 3 - 1
+
+    def reset(self):
+        self.x = self.start
+        return [float(self.x)]
+
+    def step(self, action):
+        self.x += 1 if action == 1 else -1
+        reward = 1.0 if action == 1 else 0.0
+        done = abs(self.x) >= 3
+        return [float(self.x)], reward, done, {}
+
+
+def policy(observation):
+    """Move right when left of the origin, and left otherwise; works on one
+    observation or a batch."""
+    return (np.asarray(observation)[..., 0] < 0).astype(int)
+
+
+@pytest.mark.parametrize('fitness_type', ['reward', 'survival'])
+def test_vectorized_matches_sequential(fitness_type):
+    """With identical environment copies, lockstep rollouts should give
+    exactly the same fitness as running the episodes one at a time."""
+    for start in [-2, 0, 2]:
+        params = dict(runs=3, steps=8, fitness_type=fitness_type, gui=False)
+        sequential = EnvironmentProblem(environment=TargetEnvironment(start), **params)
+        vectorized = EnvironmentProblem(environment=TargetEnvironment(start),
+                                        vectorized=True, **params)
+        # Keep the copies identical to the original
+        vectorized._environments = [TargetEnvironment(start) for _ in range(3)]
+
+        assert(vectorized.evaluate(policy) == sequential.evaluate(policy))
+
+
+def test_done_masking():
+    """Episodes that end early shouldn't be stepped any further."""
+    always_right = lambda observations: np.ones(len(observations), dtype=int)
+    problem = EnvironmentProblem(runs=3, steps=10, environment=TargetEnvironment(),
+                                 fitness_type='survival', gui=False, vectorized=True)
+    problem._environments = [TargetEnvironment(s) for s in [-1, 0, 2]]
+
+    # Runs starting at -1, 0, and 2 reach +3 after 4, 3, and 1 steps; the
+    # survival fitness counts the initial observation too
+    assert(problem.evaluate(always_right) == np.mean([5, 4, 2]))
+
+
+def test_evaluate_batch_population():
+    """A stacked population of networks should get the same fitnesses as the
+    networks evaluated one by one."""
+    decoder = WrapperDecoder(SimpleNeuralNetworkDecoder([1, 2]), ArgmaxExecutable)
+    genomes = np.random.uniform(-1, 1, (5, decoder.wrapped_decoder.length))
+    problem = EnvironmentProblem(runs=2, steps=6, environment=TargetEnvironment(),
+                                 fitness_type='reward', gui=False, vectorized=True)
+    # Start every run in the same place, so the fitnesses are comparable
+    problem._environments = [TargetEnvironment() for _ in range(10)]
+
+    phenomes = decoder.decode_batch(genomes)
+    assert(len(phenomes) == 5)
+    expected = [problem.evaluate(decoder.decode(g)) for g in genomes]
+    assert(problem.evaluate_batch(phenomes) == expected)
+    assert(problem.evaluate_batch([decoder.decode(g) for g in genomes]) == expected)
+
+    population = [Individual(g, decoder=decoder, problem=problem) for g in genomes]
+    Individual.evaluate_batch(population)
+    assert([ind.fitness for ind in population] == expected)
+
+
+def test_gui_not_vectorized():
+    with pytest.raises(ValueError):
+        EnvironmentProblem(runs=1, steps=1, environment=TargetEnvironment(),
+                           fitness_type='reward', gui=True, vectorized=True)
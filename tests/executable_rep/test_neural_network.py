@@ -195,3 +195,53 @@ def test_softmax1():
 
     for e, o in zip(expected, output):
         assert(approx(e) == o)
+
+
+##############################
+# Tests for batched execution
+##############################
+def test_batch_input():
+    """Calling a network on a matrix of inputs should give the same result
+    as calling it on each row."""
+    dec = neural_network.SimpleNeuralNetworkDecoder([ 4, 3, 2 ])
+    nn = dec.decode(np.random.uniform(-1, 1, dec.length))
+    inputs = np.random.uniform(-1, 1, (10, 4))
+
+    result = nn(inputs)
+    assert(result.shape == (10, 2))
+    for x, r in zip(inputs, result):
+        assert(nn(x) == approx(r))
+
+
+def test_decode_batch():
+    """A stacked population of networks should compute the same outputs as
+    the networks decoded one at a time."""
+    dec = neural_network.SimpleNeuralNetworkDecoder([ 4, 3, 2 ], activation=neural_network.softmax)
+    genomes = np.random.uniform(-1, 1, (6, dec.length))
+    nets = dec.decode_batch(genomes)
+    assert(len(nets) == 6)
+
+    inputs = np.random.uniform(-1, 1, (6, 4))
+    result = nets(inputs)
+    assert(result.shape == (6, 2))
+    for genome, x, r in zip(genomes, inputs, result):
+        assert(dec.decode(genome)(x) == approx(r))
+
+    # Each network can also take a batch of its own
+    batches = np.random.uniform(-1, 1, (6, 5, 4))
+    result = nets(batches)
+    assert(result.shape == (6, 5, 2))
+    for net, x, r in zip(nets, batches, result):
+        assert(net(x) == approx(r))
+
+
+def test_decode_batch_bad_length():
+    dec = neural_network.SimpleNeuralNetworkDecoder((4, 2))
+    with pytest.raises(ValueError):
+        dec.decode_batch(np.zeros((3, dec.length + 1)))
+
+
+def test_softmax_batch():
+    """Softmax should normalize each row of a batch separately."""
+    output = neural_network.softmax(np.random.uniform(-5, 5, (4, 3)))
+    assert(np.sum(output, axis=1) == approx(np.ones(4)))
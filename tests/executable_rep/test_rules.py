@@ -0,0 +1,74 @@
+"""Unit tests for Pitt-approach rule systems."""
+from gym import spaces
+import numpy as np
+
+from leap_ec.executable_rep.rules import PittRulesDecoder, PittRulesExecutable
+
+
+def _reference_match_set(rules, all_input):
+    """Build the match set one rule and one condition at a time."""
+    best_match_score = -1
+    match_list = []
+    for r, rule in enumerate(rules):
+        match_score = 0
+        for c in range(len(all_input)):
+            low, high = rule[c*2], rule[c*2 + 1]
+            if low > high:
+                diff = 0
+            elif low <= all_input[c] <= high:
+                diff = 0
+            else:
+                diff = min(abs(low - all_input[c]), abs(high - all_input[c]))
+            match_score += diff*diff
+        if match_list == [] or match_score < best_match_score:
+            best_match_score = match_score
+            match_list = [r]
+        elif match_score == best_match_score:
+            match_list.append(r)
+    return match_list, best_match_score
+
+
+def _random_executable(num_rules, num_inputs, num_outputs):
+    input_space = spaces.Box(low=np.zeros(num_inputs), high=np.ones(num_inputs), dtype=np.float32)
+    output_space = spaces.MultiBinary(num_outputs)
+    decoder = PittRulesDecoder(input_space, output_space,
+                               priority_metric=PittRulesExecutable.PriorityMetric.RULE_ORDER,
+                               num_memory_registers=0)
+    # Conditions are random intervals, some of them inverted (wildcards)
+    genome = np.random.uniform(0, 1, (num_rules, 2*num_inputs + num_outputs))
+    return decoder.decode(genome.flatten())
+
+
+def test_match_set_matches_reference():
+    """The vectorized match set should agree with the rule-by-rule loop."""
+    executable = _random_executable(num_rules=50, num_inputs=3, num_outputs=1)
+    for _ in range(100):
+        x = np.random.uniform(-0.5, 1.5, 3)
+        match_list, score = executable._PittRulesExecutable__match_set(x)
+        expected_list, expected_score = _reference_match_set(executable.rules, x)
+
+        assert(match_list == expected_list)
+        assert(np.isclose(score, expected_score))
+
+
+def test_batch_matches_single():
+    """Calling on a batch of inputs should give the same outputs as calling
+    on each input in turn."""
+    executable = _random_executable(num_rules=20, num_inputs=2, num_outputs=2)
+    inputs = np.random.uniform(0, 1, (30, 2))
+
+    result = executable(inputs)
+    assert(result.shape == (30, 2))
+    for x, r in zip(inputs, result):
+        assert(executable(x) == r.tolist())
+
+
+def test_wildcards():
+    """A rule whose bounds are inverted should match any input."""
+    input_space = spaces.Box(low=np.zeros(1), high=np.ones(1), dtype=np.float32)
+    rules = [[0.9, 0.1, 1],  # Wildcard
+             [0.0, 0.5, 0]]
+    executable = PittRulesExecutable(input_space, spaces.Discrete(2), rules,
+                                     priority_metric=PittRulesExecutable.PriorityMetric.RULE_ORDER)
+    assert(executable([0.2]) == 1)
+    assert(executable([0.8]) == 1)
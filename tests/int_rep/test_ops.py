@@ -112,3 +112,24 @@ def test_mutate_randint2():
     assert(stat.stochastic_equals(expected, ind0_gene1_counts, p=p))
     assert(stat.stochastic_equals(expected, ind1_gene0_counts, p=p))
     assert(stat.stochastic_equals(expected, ind1_gene1_counts, p=p))
+
+
+@pytest.mark.stochastic
+def test_mutate_randint_sparse():
+    """Sparse mutation should give each gene the same distribution of
+    values as the dense version (cf. test_mutate_randint1)."""
+    N = 1000
+    gene0_values = []
+    gene1_values = []
+
+    for _ in range(N):
+        population = iter([Individual([0, 0])])
+        result = list(ops.mutate_randint(population, bounds=[(0, 1), (0, 1)],
+                                         sparse=True))
+        gene0_values.append(result[0].genome[0])
+        gene1_values.append(result[0].genome[1])
+
+    expected = {0: 0.5*N + 0.25*N, 1: 0.25*N}
+    p = 0.001
+    assert(stat.stochastic_equals(expected, Counter(gene0_values), p=p))
+    assert(stat.stochastic_equals(expected, Counter(gene1_values), p=p))
@@ -1,5 +1,6 @@
 """Unit tests for LEAP's suite of real-valued fitness functions."""
 import numpy as np
+import pytest
 from pytest import approx
 
 from leap_ec.real_rep import problems
@@ -17,4 +18,108 @@ def test_GriewankProblem_eval1():
 
     p = problems.GriewankProblem()
     
-    assert(approx(expected) == p.evaluate(t))
\ No newline at end of file
+    assert(approx(expected) == p.evaluate(t))
+
+########################
+# Tests for evaluate_batch()
+########################
+def _batch_parity_cases():
+    """Problems paired with a batch of points to test them on."""
+    rng = np.random.default_rng(42)
+
+    def points(bounds, d, n=20):
+        return rng.uniform(bounds[0], bounds[1], size=(n, d))
+
+    return [
+        (problems.SpheroidProblem(), points(problems.SpheroidProblem.bounds, 10)),
+        (problems.RastriginProblem(a=10.0), points(problems.RastriginProblem.bounds, 10)),
+        (problems.RosenbrockProblem(), points(problems.RosenbrockProblem.bounds, 10)),
+        (problems.StepProblem(), points(problems.StepProblem.bounds, 10)),
+        (problems.ShekelProblem(), points(problems.ShekelProblem.bounds, 2)),
+        (problems.GriewankProblem(), points(problems.GriewankProblem.bounds, 10)),
+        (problems.AckleyProblem(), points(problems.AckleyProblem.bounds, 10)),
+        (problems.WeierstrassProblem(), points(problems.WeierstrassProblem.bounds, 10)),
+        (problems.LangermannProblem(), points(problems.LangermannProblem.bounds, 2)),
+        (problems.LunacekProblem(N=10), points(problems.LunacekProblem.bounds, 10)),
+        (problems.SchwefelProblem(), points(problems.SchwefelProblem.bounds, 10)),
+        (problems.GaussianProblem(), points(problems.GaussianProblem.bounds, 10)),
+        (problems.CosineFamilyProblem(alpha=3.0, global_optima_counts=[4, 2, 3],
+                                      local_optima_counts=[2, 2, 5]),
+         points(problems.CosineFamilyProblem.bounds, 3)),
+    ]
+
+
+def test_evaluate_batch_parity():
+    """evaluate_batch() should agree with evaluate() applied row by row."""
+    for problem, X in _batch_parity_cases():
+        expected = [problem.evaluate(x) for x in X]
+        result = problem.evaluate_batch(X)
+
+        assert(result.shape == (len(X),)), str(problem)
+        assert(approx(expected, rel=1e-10, abs=1e-10) == list(result)), str(problem)
+
+
+def test_NoisyQuarticProblem_evaluate_batch():
+    """With the same seed, evaluate_batch() should draw the same noise as
+    evaluating each phenome in turn."""
+    p = problems.NoisyQuarticProblem()
+    X = np.random.uniform(-1.28, 1.28, size=(10, 5))
+
+    np.random.seed(123)
+    expected = [p.evaluate(x) for x in X]
+    np.random.seed(123)
+    result = p.evaluate_batch(X)
+
+    assert(approx(expected) == list(result))
+
+
+def test_evaluate_batch_shape():
+    """A 1-D phenome is not a valid batch."""
+    with pytest.raises(ValueError):
+        problems.SpheroidProblem().evaluate_batch([1.0, 2.0])
+
+
+########################
+# Tests for AffineTransformedProblem
+########################
+def _nested_reference(phenome, offset, matrix, old_bounds, new_bounds):
+    """Evaluate Translated(Matrix(Scaled(Rastrigin))) one layer at a time."""
+    x = np.array(phenome) - offset
+    x = np.matmul(matrix, x)
+    x = old_bounds[0] + (x - new_bounds[0]) / (new_bounds[1] - new_bounds[0]) \
+        * (old_bounds[1] - old_bounds[0])
+    return problems.RastriginProblem().evaluate(x)
+
+
+def test_fused_affine_parity():
+    """A stack of wrappers should evaluate the same as applying each
+    transformation in turn, both one point at a time and in a batch."""
+    rng = np.random.default_rng(0)
+    d = 5
+    offset = rng.uniform(-0.5, 0.5, d)
+    matrix = problems.MatrixTransformedProblem.random_orthonormal(
+        problems.SpheroidProblem(), d).matrix
+    new_bounds = (0, 1)
+
+    p = problems.TranslatedProblem(
+        problems.MatrixTransformedProblem(
+            problems.ScaledProblem(problems.RastriginProblem(), new_bounds),
+            matrix),
+        offset)
+
+    assert(isinstance(p.base_problem, problems.RastriginProblem))
+
+    X = rng.uniform(0, 1, size=(15, d))
+    expected = [_nested_reference(x, offset, matrix,
+                                  problems.RastriginProblem.bounds, new_bounds)
+                for x in X]
+
+    assert(approx(expected) == [p.evaluate(x) for x in X])
+    assert(approx(expected) == list(p.evaluate_batch(X)))
+
+
+def test_affine_dimension_check():
+    """Translations and matrices still check the dimension of their input."""
+    p = problems.TranslatedProblem(problems.SpheroidProblem(), [1.0, 2.0])
+    with pytest.raises(AssertionError):
+        p.evaluate([1.0, 2.0, 3.0])
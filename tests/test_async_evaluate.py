@@ -0,0 +1,143 @@
+"""
+    Unit tests for the asyncio-based async_evaluate operator, run against a
+    local stand-in for a simulator service.
+"""
+import asyncio
+from math import nan
+import threading
+
+import pytest
+
+from leap_ec import ops
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual, RobustIndividual
+import leap_ec.problem
+
+
+class StandInServer:
+    """ A TCP server, running on a background thread, that replies to each
+    line of comma-separated numbers with their sum after a delay of
+    `delay * sum` seconds.  It fails on negative sums.  It also tracks
+    the maximum number of requests it handled at once. """
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever,
+                                       daemon=True)
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, '127.0.0.1', 0),
+            self.loop).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            line = await reader.readline()
+            total = sum(float(x) for x in line.decode().split(','))
+            await asyncio.sleep(self.delay * abs(total))
+            reply = 'error' if total < 0 else str(total)
+            writer.write((reply + '\n').encode())
+            await writer.drain()
+        finally:
+            self.active -= 1
+            writer.close()
+
+    def close(self):
+        self.server.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class SimulatorProblem(leap_ec.problem.ScalarProblem):
+    """ Evaluates phenomes by asking the stand-in server """
+
+    def __init__(self, port):
+        super().__init__(maximize=True)
+        self.port = port
+
+    def evaluate(self, phenome):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.evaluate_async(phenome))
+        finally:
+            loop.close()
+
+    async def evaluate_async(self, phenome):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write((','.join(str(x) for x in phenome) + '\n').encode())
+        await writer.drain()
+        reply = (await reader.readline()).decode().strip()
+        writer.close()
+        if reply == 'error':
+            raise RuntimeError('Simulator error')
+        return float(reply)
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+def test_async_evaluate_ordered(server):
+    """Evaluations overlap, but results keep their original order."""
+    problem = SimulatorProblem(server.port)
+    pop = [Individual([x, 1], decoder=IdentityDecoder(), problem=problem)
+           for x in (5, 1, 3, 0, 4, 2)]
+
+    evaluated = list(ops.async_evaluate(iter(pop), max_concurrent=4))
+
+    assert evaluated == pop
+    assert [ind.fitness for ind in evaluated] == [6, 2, 4, 1, 5, 3]
+    assert 1 < server.max_active <= 4
+
+
+def test_async_evaluate_unordered(server):
+    """With ordered=False, individuals come back as they finish."""
+    problem = SimulatorProblem(server.port)
+    pop = [Individual([x], decoder=IdentityDecoder(), problem=problem)
+           for x in (8, 1, 4)]
+
+    evaluated = list(ops.async_evaluate(iter(pop), max_concurrent=3,
+                                        ordered=False))
+
+    assert [ind.fitness for ind in evaluated] == [1, 4, 8]
+
+
+def test_async_evaluate_robust(server):
+    """Robust individuals record failed evaluations."""
+    problem = SimulatorProblem(server.port)
+    pop = [RobustIndividual(g, decoder=IdentityDecoder(), problem=problem)
+           for g in ([1, 1], [-1, -1], [2, 0])]
+
+    evaluated = list(ops.async_evaluate(iter(pop)))
+
+    assert [ind.is_viable for ind in evaluated] == [True, False, True]
+    assert evaluated[1].fitness is nan
+    assert isinstance(evaluated[1].exception, RuntimeError)
+
+
+def test_async_evaluate_raises(server):
+    """Plain individuals raise their exceptions."""
+    problem = SimulatorProblem(server.port)
+    pop = [Individual([-1], decoder=IdentityDecoder(), problem=problem)]
+
+    with pytest.raises(RuntimeError):
+        list(ops.async_evaluate(iter(pop)))
+
+
+def test_async_evaluate_sync_fallback():
+    """Problems without evaluate_async() are evaluated with evaluate()."""
+    pop = [Individual([1, 1, 0], decoder=IdentityDecoder(), problem=MaxOnes())
+           for _ in range(3)]
+
+    evaluated = list(ops.async_evaluate(iter(pop), max_concurrent=2))
+
+    assert [ind.fitness for ind in evaluated] == [2, 2, 2]
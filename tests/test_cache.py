@@ -0,0 +1,136 @@
+"""
+    Unit tests for FitnessCache and the cached_evaluate operator
+"""
+from math import nan
+
+import numpy as np
+
+from leap_ec import ops
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.cache import FitnessCache, genome_key
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual, RobustIndividual
+import leap_ec.problem
+
+
+def test_genome_key_types():
+    """Equal genomes share keys, and different genome types don't collide."""
+    assert genome_key([1, 0, 1]) == genome_key([1, 0, 1])
+    assert genome_key([[1, 0], [1]]) == genome_key([[1, 0], [1]])
+    assert genome_key([[1, 0], [1]]) != genome_key([[1], [0, 1]])
+    assert genome_key(np.array([1, 2])) != genome_key(np.array([1.0, 2.0]))
+    assert genome_key(np.zeros((2, 3))) != genome_key(np.zeros((3, 2)))
+
+    # Keys for segmented genomes of arrays must be hashable
+    hash(genome_key([np.array([1, 2]), np.array([3])]))
+
+
+def test_lru_eviction():
+    """Lookups should refresh an entry, protecting it from eviction."""
+    cache = FitnessCache(max_entries=3)
+    for i in range(3):
+        cache.put([i], i)
+
+    assert cache.get([0]) == 0
+    cache.put([3], 3)
+
+    assert len(cache) == 3
+    assert [1] not in cache
+    assert all(g in cache for g in ([0], [2], [3]))
+    assert cache.evictions == 1
+
+
+def test_max_bytes():
+    """The cache should never (noticeably) exceed its memory limit."""
+    cache = FitnessCache(max_bytes=10_000)
+    for i in range(1000):
+        cache.put(np.full(20, i, dtype=float), float(i))
+
+    assert cache.nbytes <= 10_000
+    assert 0 < len(cache) < 1000
+    # The most recent entry always survives
+    assert cache.get(np.full(20, 999, dtype=float)) == 999.0
+
+
+def test_context_counters():
+    """Hits and misses should be recorded in the context."""
+    context = {'leap': {}}
+    cache = FitnessCache(context=context)
+    cache.put([1], 1)
+    cache.get([1])
+    cache.get([1])
+    cache.get([2])
+
+    assert context['leap']['cache'] == {'hits': 2, 'misses': 1}
+
+
+def test_save_load(tmp_path):
+    """A saved cache should come back with the same entries and limits."""
+    cache = FitnessCache(max_entries=10)
+    cache.put([0, 1], 1)
+    cache.put(np.array([0.5, 0.5]), 0.5)
+    path = tmp_path / 'cache.pkl'
+    cache.save(path)
+
+    loaded = FitnessCache.load(path)
+
+    assert loaded.max_entries == 10
+    assert loaded.get([0, 1]) == 1
+    assert loaded.get(np.array([0.5, 0.5])) == 0.5
+    assert loaded.nbytes == cache.nbytes
+
+
+class CountingProblem(MaxOnes):
+    """ Counts how many times it has been evaluated """
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def evaluate(self, phenome):
+        self.count += 1
+        return super().evaluate(phenome)
+
+
+def test_cached_evaluate():
+    """Duplicate genomes should only be evaluated once."""
+    problem = CountingProblem()
+    cache = FitnessCache()
+    genomes = [[1, 0, 0], [1, 1, 0], [1, 0, 0], [1, 1, 0], [1, 1, 1]]
+    pop = [Individual(g, decoder=IdentityDecoder(), problem=problem)
+           for g in genomes]
+
+    evaluated = list(ops.cached_evaluate(iter(pop), cache=cache))
+
+    assert [ind.fitness for ind in evaluated] == [1, 2, 1, 2, 3]
+    assert problem.count == 3
+
+
+class BrokenProblem(leap_ec.problem.ScalarProblem):
+    """ Simulates a problem that throws an exception """
+
+    def __init__(self):
+        super().__init__(maximize=True)
+
+    def evaluate(self, phenome):
+        raise RuntimeError('Simulated exception')
+
+
+def test_cached_evaluate_non_viable():
+    """Failed evaluations shouldn't be cached, and cache hits on robust
+    individuals should mark them as viable."""
+    cache = FitnessCache()
+    pop = [RobustIndividual([1, 1], decoder=IdentityDecoder(),
+                            problem=BrokenProblem())]
+    evaluated = list(ops.cached_evaluate(iter(pop), cache=cache))
+
+    assert evaluated[0].fitness is nan
+    assert len(cache) == 0
+
+    cache.put([1, 1], 2)
+    pop = [RobustIndividual([1, 1], decoder=IdentityDecoder(),
+                            problem=MaxOnes())]
+    evaluated = list(ops.cached_evaluate(iter(pop), cache=cache))
+
+    assert evaluated[0].fitness == 2
+    assert evaluated[0].is_viable is True
@@ -1,10 +1,16 @@
 """
     Unit tests for cloning
 """
+import numpy as np
+import pytest
+from toolz import pipe
+
 from leap_ec.individual import Individual
 from leap_ec.decoder import IdentityDecoder
+from leap_ec.binary_rep.ops import mutate_bitflip
 from leap_ec.binary_rep.problems import MaxOnes
 import leap_ec.ops as ops
+from leap_ec.segmented_rep import ops as segmented_ops
 
 
 def test_clone():
@@ -25,3 +31,86 @@ def test_clone():
     assert original.decoder == cloned.decoder
     assert original.problem == cloned.problem
     assert original.__dict__ == cloned.__dict__
+
+
+##############################
+# Tests for copy-on-write cloning
+##############################
+def test_copy_on_write_clone():
+    """A copy-on-write clone shares its genome until it's written to."""
+    original = Individual([0, 0, 0, 0], decoder=IdentityDecoder(),
+                          problem=MaxOnes())
+    cloned = next(ops.clone(iter([original]), copy_on_write=True))
+
+    assert cloned.genome is original.genome
+
+    cloned.writable_genome()[1] = 1
+
+    assert cloned.genome == [0, 1, 0, 0]
+    assert original.genome == [0, 0, 0, 0]
+
+    # Once it's been copied, further writes go straight to the genome
+    genome = cloned.genome
+    assert cloned.writable_genome() is genome
+
+
+def test_copy_on_write_numpy():
+    """Shared NumPy genomes are read-only views until they're copied."""
+    original = Individual(np.zeros(4), decoder=IdentityDecoder(),
+                          problem=MaxOnes())
+    cloned = original.clone(copy_on_write=True)
+
+    with pytest.raises(ValueError):
+        cloned.genome[0] = 1.0
+
+    cloned.writable_genome()[0] = 1.0
+
+    assert cloned.genome[0] == 1.0
+    assert original.genome[0] == 0.0
+    assert original.genome.flags.writeable
+
+
+def test_copy_on_write_mutation():
+    """Mutation operators build new genomes, so they never copy the parent's."""
+    original = Individual([0] * 10, decoder=IdentityDecoder(),
+                          problem=MaxOnes())
+    mutated = next(pipe(iter([original]),
+                        ops.clone(copy_on_write=True),
+                        mutate_bitflip(expected_num_mutations=10)))
+
+    assert mutated.genome == [1] * 10
+    assert original.genome == [0] * 10
+
+
+def test_copy_on_write_uniform_crossover():
+    """uniform_crossover must not modify the parents of its clones."""
+    parent1 = Individual([0] * 10, decoder=IdentityDecoder(), problem=MaxOnes())
+    parent2 = Individual([1] * 10, decoder=IdentityDecoder(), problem=MaxOnes())
+
+    result = pipe(iter([parent1, parent2]),
+                  ops.clone(copy_on_write=True),
+                  ops.uniform_crossover(p_swap=1.0))
+    child1, child2 = next(result), next(result)
+
+    assert child1.genome == [1] * 10
+    assert child2.genome == [0] * 10
+    assert parent1.genome == [0] * 10
+    assert parent2.genome == [1] * 10
+
+
+def test_copy_on_write_segments():
+    """Segment operators must not modify the parents of their clones."""
+    original = Individual([[0, 0], [1, 1]], decoder=IdentityDecoder(),
+                          problem=MaxOnes())
+
+    children = pipe(iter([original] * 3),
+                    ops.clone(copy_on_write=True),
+                    segmented_ops.copy_segment(probability=1.0),
+                    segmented_ops.remove_segment(probability=1.0),
+                    segmented_ops.add_segment(seq_initializer=lambda: [2, 2],
+                                              probability=1.0))
+    for _ in range(3):
+        child = next(children)
+        assert len(child.genome) == 3
+
+    assert original.genome == [[0, 0], [1, 1]]
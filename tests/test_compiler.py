@@ -0,0 +1,141 @@
+"""
+    Unit tests for the pipeline compiler.
+"""
+from leap_ec import ops, probe
+from leap_ec.algorithm import generational_ea
+from leap_ec.binary_rep.initializers import create_binary_sequence
+from leap_ec.binary_rep.ops import mutate_bitflip
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.compiler import BatchStage, compile_pipeline, register_batch_operator
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual
+from leap_ec.representation import Representation
+
+
+class CountingMaxOnes(MaxOnes):
+    """MaxOnes that records the size of each batch it evaluates."""
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def evaluate_batch(self, phenomes):
+        self.batch_sizes.append(len(phenomes))
+        return [self.evaluate(p) for p in phenomes]
+
+
+def _population(problem, n=6):
+    pop = [Individual([i % 2, 1, 0, 0], IdentityDecoder(), problem) for i in range(n)]
+    return Individual.evaluate_population(pop)
+
+
+def test_compiled_stage_evaluates_in_one_batch():
+    """A compiled stage should evaluate all of its offspring with a single call."""
+    problem = CountingMaxOnes()
+    pipeline = compile_pipeline([ops.tournament_selection(k=3),
+                                 ops.clone,
+                                 mutate_bitflip(expected_num_mutations=1),
+                                 ops.evaluate,
+                                 ops.pool(size=7)])
+    assert len(pipeline) == 1 and isinstance(pipeline[0], BatchStage)
+
+    offspring = pipeline[0](_population(problem))
+    assert len(offspring) == 7
+    assert problem.batch_sizes == [7]
+    assert all(ind.fitness == sum(ind.genome) for ind in offspring)
+
+
+def test_batched_tournaments_use_bound_arguments():
+    """Batched tournaments should honor the tournament size from the pipeline."""
+    pop = _population(MaxOnes(), n=2)  # Genomes [0, 1, 0, 0] and [1, 1, 0, 0]
+    pipeline = compile_pipeline([ops.tournament_selection(k=64),
+                                 ops.clone,
+                                 ops.pool(size=20)])
+    offspring = pipeline[0](pop)
+    assert all(ind.genome == [1, 1, 0, 0] for ind in offspring)
+
+
+def test_pairwise_operators_with_odd_size():
+    """Crossover consumes parents in pairs, so an odd pool size should still
+    give exactly that many offspring, without evaluating the extra child."""
+    problem = CountingMaxOnes()
+    pipeline = compile_pipeline([ops.random_selection,
+                                 ops.clone,
+                                 ops.uniform_crossover(p_swap=0.5),
+                                 ops.evaluate,
+                                 ops.pool(size=5)])
+    assert isinstance(pipeline[0], BatchStage)
+
+    offspring = pipeline[0](_population(problem))
+    assert len(offspring) == 5
+    assert problem.batch_sizes == [5]
+
+
+def test_clones_are_independent():
+    """Batched cloning and mutation shouldn't touch the parents."""
+    parents = _population(MaxOnes())
+    genomes = [list(ind.genome) for ind in parents]
+    pipeline = compile_pipeline([ops.cyclic_selection,
+                                 ops.clone(copy_on_write=True),
+                                 mutate_bitflip(expected_num_mutations=4),
+                                 ops.pool(size=6)])
+    offspring = pipeline[0](parents)
+
+    assert [ind.genome for ind in parents] == genomes
+    assert all(ind.fitness is None for ind in offspring)
+
+
+def test_unknown_operators_are_left_alone():
+    """Operators the compiler doesn't know about break up a batched stage."""
+    pipeline = [ops.tournament_selection,
+                ops.clone,
+                probe.print_individual(),
+                ops.evaluate,
+                ops.pool(size=10)]
+    assert compile_pipeline(pipeline) == pipeline
+
+    # Nor is there anything to compile without a pool at the end
+    pipeline = [ops.tournament_selection, ops.clone]
+    assert compile_pipeline(pipeline) == pipeline
+
+
+def test_register_batch_operator():
+    """Custom per-individual operators can be taught to the compiler."""
+
+    @ops.iteriter_op
+    def tag(next_individual):
+        for ind in next_individual:
+            ind.tagged = True
+            yield ind
+
+    def batch_tag(individuals):
+        for ind in individuals:
+            ind.tagged = True
+        return individuals
+
+    pipeline = [ops.random_selection, ops.clone, tag, ops.pool(size=3)]
+    assert compile_pipeline(pipeline) == pipeline
+
+    register_batch_operator(tag, batch_tag)
+    compiled = compile_pipeline(pipeline)
+    assert isinstance(compiled[0], BatchStage)
+    assert all(ind.tagged for ind in compiled[0](_population(MaxOnes())))
+
+
+def test_compiled_generational_ea():
+    """A compiled pipeline can be passed straight to generational_ea."""
+    pop_size = 10
+    results = list(generational_ea(
+        generations=5, pop_size=pop_size,
+        problem=MaxOnes(),
+        representation=Representation(decoder=IdentityDecoder(),
+                                      initialize=create_binary_sequence(length=20)),
+        pipeline=compile_pipeline([
+            ops.tournament_selection,
+            ops.clone,
+            mutate_bitflip(expected_num_mutations=1),
+            ops.uniform_crossover,
+            ops.evaluate,
+            ops.pool(size=pop_size)
+        ])))
+    assert len(results) == 6
+    assert all(best.fitness is not None for _, best in results)
@@ -0,0 +1,93 @@
+"""
+    Unit tests for memoized decoding
+"""
+import pickle
+
+from leap_ec.decoder import Decoder, IdentityDecoder
+from leap_ec.individual import Individual
+
+
+class CountingDecoder(Decoder):
+    """ Counts how many times it has decoded a genome """
+    memoize = True
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def decode(self, genome, *args, **kwargs):
+        self.count += 1
+        return [2 * x for x in genome]
+
+
+def test_memoized_decode():
+    """Repeated decodes of the same genome should only decode once."""
+    decoder = CountingDecoder()
+    ind = Individual([1, 2, 3], decoder=decoder)
+
+    assert ind.decode() == [2, 4, 6]
+    assert ind.decode() is ind.decode()
+    assert decoder.count == 1
+
+
+def test_memoized_decode_invalidation():
+    """New genomes, in-place writes, and new decoders invalidate the cache."""
+    decoder = CountingDecoder()
+    ind = Individual([1, 2, 3], decoder=decoder)
+    ind.decode()
+
+    ind.genome = [1, 1, 1]
+    assert ind.decode() == [2, 2, 2]
+
+    ind.writable_genome()[0] = 5
+    assert ind.decode() == [10, 2, 2]
+    assert decoder.count == 3
+
+    other_decoder = CountingDecoder()
+    ind.decoder = other_decoder
+    ind.decode()
+    assert other_decoder.count == 1
+
+
+def test_memoized_decode_clone():
+    """Clones shouldn't inherit their parent's phenome."""
+    decoder = CountingDecoder()
+    ind = Individual([1, 2, 3], decoder=decoder)
+    ind.decode()
+
+    cloned = ind.clone(copy_on_write=True)
+    cloned.decode()
+    assert decoder.count == 2
+
+    # The parent's cache survives its clone being modified
+    cloned.writable_genome()[0] = 0
+    assert ind.decode() == [2, 4, 6]
+    assert decoder.count == 2
+
+
+def test_decode_not_memoized_by_default():
+    """Decoders that don't opt in are called every time."""
+    class CountingIdentityDecoder(IdentityDecoder):
+        count = 0
+
+        def decode(self, genome, *args, **kwargs):
+            self.count += 1
+            return genome
+
+    decoder = CountingIdentityDecoder()
+    ind = Individual([1, 2], decoder=decoder)
+    ind.decode()
+    ind.decode()
+
+    assert decoder.count == 2
+
+
+def test_pickle_drops_phenome():
+    """Cached phenomes aren't pickled."""
+    ind = Individual([1, 2, 3], decoder=CountingDecoder())
+    ind.decode()
+
+    unpickled = pickle.loads(pickle.dumps(ind))
+
+    assert '_phenome' not in vars(unpickled)
+    assert unpickled.decode() == [2, 4, 6]
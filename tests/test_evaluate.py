@@ -3,6 +3,8 @@
 """
 from math import nan
 
+import pytest
+
 from leap_ec.individual import Individual, RobustIndividual
 from leap_ec.decoder import IdentityDecoder
 
@@ -73,3 +75,138 @@ def test_multiple_evaluations():
 
     for individual, fitness in zip(evaluated_individuals, expected_fitnesses):
         assert individual.fitness == fitness
+
+
+##############################
+# Tests for batch evaluation
+##############################
+class BatchSumProblem(leap_ec.problem.ScalarProblem):
+    """ Records how many phenomes each batch call received """
+
+    def __init__(self, maximize=True):
+        super().__init__(maximize)
+        self.batch_sizes = []
+
+    def evaluate(self, phenome):
+        return sum(phenome)
+
+    def evaluate_batch(self, phenomes):
+        self.batch_sizes.append(len(phenomes))
+        return [sum(p) for p in phenomes]
+
+
+def test_batch_evaluate_chunks():
+    """batch_evaluate should make one call per chunk and preserve order."""
+    problem = BatchSumProblem()
+    pop = [Individual([i, 1], decoder=IdentityDecoder(), problem=problem)
+           for i in range(7)]
+
+    evaluated = list(ops.batch_evaluate(iter(pop), chunk_size=3))
+
+    assert evaluated == pop
+    assert [ind.fitness for ind in evaluated] == [i + 1 for i in range(7)]
+    assert problem.batch_sizes == [3, 3, 1]
+
+
+def test_batch_evaluate_fallback():
+    """Problems without evaluate_batch() are evaluated one at a time."""
+    pop = [Individual([1, 1, 0], decoder=IdentityDecoder(), problem=MaxOnes())
+           for _ in range(4)]
+
+    evaluated = list(ops.batch_evaluate(iter(pop), chunk_size=3))
+
+    assert [ind.fitness for ind in evaluated] == [2, 2, 2, 2]
+
+
+def test_batch_evaluate_groups():
+    """Individuals with different problems are batched separately."""
+    p1, p2 = BatchSumProblem(), BatchSumProblem()
+    pop = [Individual([i], decoder=IdentityDecoder(), problem=p)
+           for i, p in enumerate([p1, p2, p1, p2, p1])]
+
+    Individual.evaluate_batch(pop)
+
+    assert [ind.fitness for ind in pop] == [0, 1, 2, 3, 4]
+    assert p1.batch_sizes == [3]
+    assert p2.batch_sizes == [2]
+
+
+class BrokenBatchProblem(BatchSumProblem):
+    """ Fails on negative phenomes """
+
+    def evaluate(self, phenome):
+        if min(phenome) < 0:
+            raise RuntimeError('Simulated exception')
+        return super().evaluate(phenome)
+
+    def evaluate_batch(self, phenomes):
+        return [self.evaluate(p) for p in phenomes]
+
+
+def test_robust_batch_evaluate():
+    """Robust individuals should be viable after a batch evaluation, and a
+    failed batch should pin the exception on the individual that caused it."""
+    pop = [RobustIndividual([1, 2], decoder=IdentityDecoder(),
+                            problem=BatchSumProblem())]
+    Individual.evaluate_batch(pop)
+    assert pop[0].fitness == 3
+    assert pop[0].is_viable is True
+
+    problem = BrokenBatchProblem()
+    pop = [RobustIndividual(genome, decoder=IdentityDecoder(), problem=problem)
+           for genome in ([1, 2], [-1, 2])]
+    Individual.evaluate_batch(pop)
+
+    assert pop[0].fitness == 3
+    assert pop[0].is_viable is True
+    assert pop[1].fitness is nan
+    assert pop[1].is_viable is False
+    assert isinstance(pop[1].exception, RuntimeError)
+
+
+def test_batch_evaluate_exception():
+    """A failed batch should propagate its exception for plain individuals."""
+    pop = [Individual(genome, decoder=IdentityDecoder(),
+                      problem=BrokenBatchProblem())
+           for genome in ([1, 2], [-1, 2])]
+
+    with pytest.raises(RuntimeError):
+        Individual.evaluate_batch(pop)
+
+
+class ShortBatchProblem(BatchSumProblem):
+    """ Returns one fitness too few from evaluate_batch() """
+
+    def evaluate_batch(self, phenomes):
+        return super().evaluate_batch(phenomes)[:-1]
+
+
+def test_batch_evaluate_wrong_length():
+    """A batch that returns the wrong number of fitnesses is an error, even
+    for robust individuals."""
+    for ind_cls in (Individual, RobustIndividual):
+        pop = [ind_cls([i], decoder=IdentityDecoder(),
+                       problem=ShortBatchProblem())
+               for i in range(3)]
+
+        with pytest.raises(ValueError):
+            Individual.evaluate_batch(pop)
+
+
+class CustomEvaluateIndividual(Individual):
+    """ Passes extra information to the problem, so it can't be batched """
+
+    def evaluate_imp(self):
+        return self.problem.evaluate(self.decode()) + 100
+
+
+def test_batch_evaluate_custom_individual():
+    """Classes that over-ride evaluate_imp() skip the batch path."""
+    problem = BatchSumProblem()
+    pop = [CustomEvaluateIndividual([1, 2], decoder=IdentityDecoder(),
+                                    problem=problem)]
+
+    Individual.evaluate_batch(pop)
+
+    assert pop[0].fitness == 103
+    assert problem.batch_sizes == []
@@ -0,0 +1,156 @@
+"""
+    Unit tests for running multi_population_ea's islands in parallel.
+"""
+import itertools
+import multiprocessing
+import queue
+
+import networkx as nx
+import pytest
+
+from leap_ec import ops
+from leap_ec.algorithm import multi_population_ea
+from leap_ec.binary_rep.initializers import create_binary_sequence
+from leap_ec.binary_rep.ops import mutate_bitflip
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.context import context
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual
+from leap_ec.real_rep.initializers import create_real_vector
+from leap_ec.real_rep.ops import mutate_gaussian
+from leap_ec.real_rep.problems import SpheroidProblem
+from leap_ec.representation import Representation
+
+
+def _island_model(generations, num_islands=3, extra_operators=(), **kwargs):
+    topology = nx.complete_graph(num_islands)
+    pop_size = 6
+    return multi_population_ea(
+        generations=generations, num_populations=num_islands, pop_size=pop_size,
+        problem=MaxOnes(),
+        representation=Representation(decoder=IdentityDecoder(),
+                                      initialize=create_binary_sequence(length=10)),
+        shared_pipeline=[ops.tournament_selection,
+                         ops.clone,
+                         mutate_bitflip(expected_num_mutations=1),
+                         ops.evaluate,
+                         *extra_operators,
+                         ops.pool(size=pop_size),
+                         ops.migrate(context,
+                                     topology=topology,
+                                     emigrant_selector=ops.tournament_selection,
+                                     replacement_selector=ops.random_selection,
+                                     migration_gap=2)],
+        context=context,
+        **kwargs)
+
+
+def test_parallel_islands():
+    """Each generation should report a best-so-far individual per island."""
+    results = list(_island_model(generations=5, parallel=True))
+
+    assert [g for g, _ in results] == list(range(6))
+    for _, bsf in results:
+        assert len(bsf) == 3
+        assert all(isinstance(ind, Individual) and ind.fitness is not None for ind in bsf)
+
+    # Best-so-far fitness never decreases
+    for i in range(3):
+        fitnesses = [bsf[i].fitness for _, bsf in results]
+        assert fitnesses == sorted(fitnesses)
+
+
+def test_parallel_population_arrays():
+    """Array-backed islands should report and exchange stand-alone
+    individuals, which can cross process boundaries."""
+    pop_size = 6
+    representation = Representation(decoder=IdentityDecoder(),
+                                    initialize=create_real_vector([(-1, 1)] * 3),
+                                    population_array=True)
+    results = list(multi_population_ea(
+        generations=3, num_populations=2, pop_size=pop_size,
+        problem=SpheroidProblem(maximize=False),
+        representation=representation,
+        shared_pipeline=[ops.migrate(context,
+                                     topology=nx.complete_graph(2),
+                                     emigrant_selector=ops.tournament_selection,
+                                     replacement_selector=ops.random_selection,
+                                     migration_gap=1),
+                         ops.tournament_selection,
+                         ops.clone,
+                         mutate_gaussian(std=0.1, expected_num_mutations=1),
+                         ops.evaluate,
+                         ops.pool(size=pop_size)],
+        context=context,
+        parallel=True))
+
+    assert [g for g, _ in results] == list(range(4))
+    for _, bsf in results:
+        assert all(type(ind) is Individual and ind.fitness is not None
+                   for ind in bsf)
+
+
+def test_parallel_islands_early_exit():
+    """Closing the generator early should stop the worker processes."""
+    ea = _island_model(generations=1000, parallel=True)
+    assert len(list(itertools.islice(ea, 3))) == 3
+    ea.close()
+
+    assert multiprocessing.active_children() == []
+
+
+class Explode:
+    """An operator that fails after a few generations."""
+    def __call__(self, next_individual):
+        if context['leap']['generation'] >= 2:
+            raise ValueError("Boom")
+        return next_individual
+
+
+def test_parallel_islands_exception():
+    """An exception raised in a worker is re-raised by the driver."""
+    with pytest.raises(ValueError):
+        list(_island_model(generations=5, parallel=True, extra_operators=[Explode()]))
+
+    assert multiprocessing.active_children() == []
+
+
+def test_parallel_islands_require_fork():
+    """Start methods that would need to pickle the pipelines are rejected
+    before any worker is started."""
+    ea = _island_model(generations=5, parallel=True,
+                       mp_context=multiprocessing.get_context('spawn'))
+    with pytest.raises(ValueError, match="fork"):
+        next(ea)
+
+    assert multiprocessing.active_children() == []
+
+
+def test_migrate_through_mailboxes():
+    """With mailboxes in the context, migrate() sends emigrants through them."""
+    mailboxes = [queue.Queue(), queue.Queue()]
+    migrate_context = {'leap': {'generation': 0, 'current_subpopulation': 0,
+                                'mailboxes': mailboxes}}
+    migrate = ops.migrate(migrate_context,
+                          topology=nx.complete_graph(2),
+                          emigrant_selector=ops.tournament_selection,
+                          replacement_selector=ops.random_selection,
+                          migration_gap=1)
+
+    def population(bit):
+        pop = [Individual([bit] * 4, IdentityDecoder(), MaxOnes()) for _ in range(3)]
+        return Individual.evaluate_population(pop)
+
+    # Island 0 sends an emigrant to island 1
+    migrate(population(1))
+    assert mailboxes[1].qsize() == 1
+    assert mailboxes[0].qsize() == 0
+
+    # Island 1 takes it in, in place of one of its (worse) individuals
+    migrate_context['leap']['current_subpopulation'] = 1
+    migrate_context['leap']['generation'] = 1
+    island = migrate(population(0))
+    assert len(island) == 3
+    assert [ind.genome for ind in island].count([1, 1, 1, 1]) == 1
+    # And sends its own emigrant back
+    assert mailboxes[0].qsize() == 1
@@ -1,10 +1,18 @@
 """
     Unit tests for mutation-related functionality.
 """
+from collections import Counter
+from math import factorial
+
+import pytest
+
+from leap_ec import statistical_helpers as stat
 from leap_ec.individual import Individual
 from leap_ec.decoder import IdentityDecoder
 from leap_ec.binary_rep.problems import MaxOnes
 import leap_ec.binary_rep.ops as ops
+from leap_ec.ops import sample_mutation_positions
+from leap_ec.real_rep.ops import genome_mutate_gaussian
 
 
 def test_mutate_bitflip():
@@ -21,3 +29,118 @@ def test_mutate_bitflip():
     # zapped, too.
 
     assert ind[0].genome == [0, 0]
+
+
+##############################
+# Tests for sparse mutation
+##############################
+def _binomial_counts(n, p, samples, max_k):
+    """Expected number of samples with 0, 1, ..., max_k successes out of n
+    trials, with every count >= max_k lumped in with max_k."""
+    expected = {k: samples * factorial(n) // (factorial(k) * factorial(n - k))
+                   * p**k * (1 - p)**(n - k)
+                for k in range(max_k)}
+    expected[max_k] = samples - sum(expected.values())
+    return expected
+
+
+@pytest.mark.stochastic
+def test_sample_mutation_positions_count():
+    """The number of sampled positions should be binomially distributed,
+    just as if we had flipped a coin for each gene."""
+    N = 5000
+    L, p = 20, 0.1
+    counts = Counter(min(len(sample_mutation_positions(L, p)), 5)
+                     for _ in range(N))
+    expected = _binomial_counts(L, p, N, 5)
+    assert stat.stochastic_equals(expected, counts, p=0.001)
+
+
+@pytest.mark.stochastic
+def test_sample_mutation_positions_uniform():
+    """Every position should be equally likely to be chosen."""
+    N = 5000
+    counts = Counter(i for _ in range(N)
+                     for i in sample_mutation_positions(10, 0.2))
+    assert set(counts) <= set(range(10))
+    # Spell out the expected counts rather than using equals_uniform(), so
+    # that they sum to exactly the observed total despite rounding
+    n = sum(counts.values())
+    expected = {i: n / 10 for i in range(9)}
+    expected[9] = n - sum(expected.values())
+    assert stat.stochastic_equals(expected, counts, p=0.001)
+
+
+def test_sample_mutation_positions_edge_cases():
+    assert sample_mutation_positions(10, 0.0) == []
+    assert sample_mutation_positions(4, 1.0) == [0, 1, 2, 3]
+    assert sample_mutation_positions(0, 0.5) == []
+
+
+@pytest.mark.stochastic
+def test_sparse_bitflip_matches_dense():
+    """Sparse and dense bitflip should flip the same number of bits, in
+    distribution."""
+    N = 2000
+    L = 20
+    dense = Counter(min(sum(ops.genome_mutate_bitflip([0] * L, 2)), 5)
+                    for _ in range(N))
+    sparse = Counter(min(sum(ops.genome_mutate_bitflip([0] * L, 2,
+                                                       sparse=True)), 5)
+                     for _ in range(N))
+    expected = _binomial_counts(L, 0.1, N, 5)
+    assert stat.stochastic_equals(expected, dense, p=0.001)
+    assert stat.stochastic_equals(expected, sparse, p=0.001)
+
+
+def test_sparse_bitflip_does_not_modify_input():
+    genome = [0] * 10
+    mutated = ops.genome_mutate_bitflip(genome, 10, sparse=True)
+    assert genome == [0] * 10
+    assert mutated == [1] * 10
+
+
+def test_sparse_gaussian():
+    """Sparse gaussian mutation should respect per-gene std and, like dense
+    mutation, clip every gene."""
+    genome = [0.0, 5.0, 0.0]
+    mutated = genome_mutate_gaussian(genome, std=[0.0, 0.0, 0.0],
+                                     expected_num_mutations=3,
+                                     hard_bounds=(-1, 1), sparse=True)
+    assert mutated == [0.0, 1.0, 0.0]
+
+    for sparse in [False, True]:
+        mutated = genome_mutate_gaussian(genome, std=1.0,
+                                         expected_num_mutations=0,
+                                         hard_bounds=(-1, 1), sparse=sparse)
+        assert mutated == [0.0, 1.0, 0.0]
+    assert genome == [0.0, 5.0, 0.0]
+
+
+@pytest.mark.stochastic
+def test_sparse_gaussian_matches_dense():
+    """Sparse and dense gaussian mutation should change the same number of
+    genes, and clip them the same way, in distribution."""
+    N = 2000
+    L = 20
+    genome = [0.0] * (L - 1) + [2.0]
+
+    def summarize(mutated):
+        # How many genes moved, and whether the out-of-bounds gene was clipped
+        return (min(sum(x != 0.0 for x in mutated[:-1]), 5), mutated[-1] <= 1.0)
+
+    dense = Counter(summarize(genome_mutate_gaussian(genome, std=1.0,
+                                                     expected_num_mutations=2,
+                                                     hard_bounds=(-1, 1)))
+                    for _ in range(N))
+    sparse = Counter(summarize(genome_mutate_gaussian(genome, std=1.0,
+                                                      expected_num_mutations=2,
+                                                      hard_bounds=(-1, 1),
+                                                      sparse=True))
+                     for _ in range(N))
+    # The last gene is always clipped back into bounds, whether or not it was
+    # mutated, so only the number of other genes that moved varies
+    binomial = _binomial_counts(L - 1, 0.1, N, 5)
+    expected = {(k, True): count for k, count in binomial.items()}
+    assert stat.stochastic_equals(expected, dense, p=0.001)
+    assert stat.stochastic_equals(expected, sparse, p=0.001)
@@ -0,0 +1,87 @@
+"""
+    Unit tests for the process-pool parallel_evaluate operator
+"""
+from math import nan
+
+import pytest
+
+from leap_ec import ops
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual, RobustIndividual
+import leap_ec.problem
+
+
+class EvenOnlyProblem(leap_ec.problem.ScalarProblem):
+    """ Counts ones, but fails on genomes that have an odd number of them """
+
+    def __init__(self):
+        super().__init__(maximize=True)
+
+    def evaluate(self, phenome):
+        if sum(phenome) % 2 == 1:
+            raise RuntimeError('Simulated exception')
+        return sum(phenome)
+
+
+@pytest.fixture(scope='module')
+def maxones_pool():
+    with ops.evaluation_pool(MaxOnes(), IdentityDecoder(),
+                             max_workers=2) as pool:
+        yield pool
+
+
+def test_parallel_evaluate_order(maxones_pool):
+    """Fitnesses should come back in the same order as the individuals."""
+    genomes = [[1] * i + [0] * (10 - i) for i in range(10)]
+    pop = [Individual(g, decoder=IdentityDecoder(), problem=MaxOnes())
+           for g in genomes]
+
+    for chunksize in (1, 3, 20):
+        for ind in pop:
+            ind.fitness = None
+        evaluated = ops.parallel_evaluate(iter(pop), pool=maxones_pool,
+                                          size=10, chunksize=chunksize)
+
+        assert evaluated == pop
+        assert [ind.fitness for ind in evaluated] == list(range(10))
+
+
+def test_parallel_evaluate_robust():
+    """Robust individuals that fail are marked non-viable."""
+    problem = EvenOnlyProblem()
+    pop = [RobustIndividual(g, decoder=IdentityDecoder(), problem=problem)
+           for g in ([1, 1], [1, 0], [0, 0])]
+
+    with ops.evaluation_pool(problem, IdentityDecoder(), max_workers=2) as pool:
+        evaluated = ops.parallel_evaluate(iter(pop), pool=pool, size=3,
+                                          chunksize=2)
+
+    assert [ind.is_viable for ind in evaluated] == [True, False, True]
+    assert evaluated[0].fitness == 2
+    assert evaluated[1].fitness is nan
+    assert isinstance(evaluated[1].exception, RuntimeError)
+
+
+def test_parallel_evaluate_raises():
+    """Plain individuals that fail raise their exception."""
+    problem = EvenOnlyProblem()
+    pop = [Individual([1, 0], decoder=IdentityDecoder(), problem=problem)]
+
+    with ops.evaluation_pool(problem, IdentityDecoder(), max_workers=1) as pool:
+        with pytest.raises(RuntimeError):
+            ops.parallel_evaluate(iter(pop), pool=pool, size=1)
+
+
+def test_per_task_evaluation_pool():
+    """The Python 3.6 pool, which sends the problem and decoder with every
+    task, should evaluate just like the usual one."""
+    pop = [Individual([1] * i, decoder=IdentityDecoder(), problem=MaxOnes())
+           for i in range(5)]
+
+    with ops._PerTaskEvaluationPool(MaxOnes(), IdentityDecoder(),
+                                    max_workers=2) as pool:
+        evaluated = ops.parallel_evaluate(iter(pop), pool=pool, size=5,
+                                          chunksize=2)
+
+    assert [ind.fitness for ind in evaluated] == list(range(5))
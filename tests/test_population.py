@@ -0,0 +1,207 @@
+"""
+    Unit tests for the array-backed PopulationArray
+"""
+from math import nan, isnan
+import pickle
+
+import numpy as np
+import pytest
+from toolz import pipe
+
+from leap_ec import ops
+from leap_ec.algorithm import generational_ea
+from leap_ec.context import context
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual, RobustIndividual
+from leap_ec.population import PopulationArray
+from leap_ec.real_rep.initializers import create_real_vector
+from leap_ec.real_rep.ops import mutate_gaussian
+from leap_ec.real_rep.problems import SpheroidProblem
+from leap_ec.representation import Representation
+import leap_ec.problem
+
+
+def test_views_write_through():
+    """Setting a view's genome or fitness should update the arrays."""
+    pop = PopulationArray(np.zeros((3, 2)), IdentityDecoder(),
+                          SpheroidProblem())
+    ind = pop[1]
+    ind.genome = [1.0, 2.0]
+    ind.evaluate()
+
+    assert np.all(pop.genomes[1] == [1.0, 2.0])
+    assert pop.fitness[1] == 5.0
+    assert pop[0].fitness is None
+    assert ind.fitness == 5.0
+
+
+def test_slicing_returns_population():
+    pop = PopulationArray(np.arange(8.0).reshape(4, 2), IdentityDecoder(),
+                          SpheroidProblem())
+    sub = pop[1:3]
+
+    assert isinstance(sub, PopulationArray)
+    assert len(sub) == 2
+    assert np.all(sub.genomes == [[2.0, 3.0], [4.0, 5.0]])
+
+
+def test_roundtrip_individuals():
+    """Packing and unpacking should preserve genomes, fitness, and extras."""
+    inds = [Individual([float(i), 0.0], IdentityDecoder(), SpheroidProblem())
+            for i in range(4)]
+    for ind in inds[:2]:
+        ind.evaluate()
+    inds[0].birth = 7
+
+    pop = PopulationArray.from_individuals(inds)
+    assert pop[0].birth == 7
+
+    unpacked = pop.to_individuals()
+    assert [type(ind) for ind in unpacked] == [Individual] * 4
+    assert [ind.fitness for ind in unpacked] == [0.0, 1.0, None, None]
+    assert unpacked[0].birth == 7
+    assert not hasattr(unpacked[1], 'birth')
+
+
+def test_pickle_views():
+    """Views, such as the best individual of a population, pickle as
+    stand-alone individuals with their whole state."""
+    pop = PopulationArray([[0.0, 1.0], [2.0, 3.0]], IdentityDecoder(),
+                          SpheroidProblem(), individual_cls=RobustIndividual)
+    Individual.evaluate_population(pop)
+    pop[0].birth = 7
+
+    best = pickle.loads(pickle.dumps(max(pop)))
+
+    assert type(best) is RobustIndividual
+    assert list(best.genome) == [0.0, 1.0]
+    assert best.fitness == 1.0
+    assert best.is_viable is True
+    assert best.birth == 7
+
+
+def test_nan_fitness():
+    """NaN fitnesses should come back as math.nan, which ScalarProblem
+    relies on when comparing individuals."""
+    pop = PopulationArray(np.zeros((2, 1)), IdentityDecoder(),
+                          SpheroidProblem(maximize=True))
+    pop[0].fitness = nan
+    pop[1].fitness = 1.0
+
+    assert pop[0].fitness is nan
+    assert max(pop).fitness == 1.0
+
+
+class BrokenProblem(leap_ec.problem.ScalarProblem):
+    """ Simulates a problem that throws an exception """
+
+    def __init__(self, maximize):
+        super().__init__(maximize)
+
+    def evaluate(self, phenome):
+        raise RuntimeError('Simulated exception')
+
+
+def test_robust_views():
+    """Views should inherit the behavior of the emulated Individual class."""
+    pop = PopulationArray(np.zeros((2, 2)), IdentityDecoder(),
+                          BrokenProblem(True), individual_cls=RobustIndividual)
+    Individual.evaluate_population(pop)
+
+    assert isinstance(pop[0], RobustIndividual)
+    assert isnan(pop[0].fitness)
+    assert pop[0].is_viable is False
+    assert isinstance(pop[1].exception, RuntimeError)
+
+
+class BrokenBatchProblem(SpheroidProblem):
+    """ Simulates a vectorized problem that throws an exception """
+
+    def evaluate_batch(self, phenomes):
+        raise RuntimeError('Simulated exception')
+
+
+def test_batch_exceptions():
+    """A failed batch evaluation should propagate, unless the population
+    holds robust individuals, which record the exception instead."""
+    pop = PopulationArray(np.zeros((2, 2)), IdentityDecoder(),
+                          BrokenBatchProblem())
+    with pytest.raises(RuntimeError):
+        pop.evaluate()
+
+    pop = PopulationArray(np.zeros((2, 2)), IdentityDecoder(),
+                          BrokenBatchProblem(), individual_cls=RobustIndividual)
+    pop.evaluate()
+    assert all(ind.is_viable for ind in pop)
+    assert list(pop.fitness) == [0.0, 0.0]
+
+
+def test_pipeline():
+    """A standard pipeline should run over a PopulationArray unchanged."""
+    pop = PopulationArray.create(10, create_real_vector([(-1, 1)] * 3),
+                                 IdentityDecoder(), SpheroidProblem())
+    Individual.evaluate_population(pop)
+
+    offspring = pipe(pop,
+                     ops.tournament_selection,
+                     ops.clone,
+                     mutate_gaussian(std=0.1, expected_num_mutations=1),
+                     ops.evaluate,
+                     ops.pool(size=10))
+
+    assert len(offspring) == 10
+    assert all(ind.fitness is not None for ind in offspring)
+
+
+def test_survival_selection():
+    """Survival selection operators should accept a PopulationArray of
+    parents."""
+    parents = PopulationArray.create(10, create_real_vector([(-1, 1)] * 3),
+                                     IdentityDecoder(),
+                                     SpheroidProblem(maximize=False))
+    Individual.evaluate_population(parents)
+    worst = max(parents.fitness)
+
+    for survival in [ops.insertion_selection(parents=parents),
+                     ops.truncation_selection(size=10, parents=parents)]:
+        survivors = pipe(parents,
+                         ops.tournament_selection,
+                         ops.clone,
+                         mutate_gaussian(std=0.1, expected_num_mutations=1),
+                         ops.evaluate,
+                         ops.pool(size=10),
+                         survival)
+
+        assert len(survivors) == 10
+        assert all(ind.fitness <= worst for ind in survivors)
+
+
+def test_generational_ea():
+    """generational_ea should keep an array-backed population array-backed."""
+    context['leap']['generation'] = 0
+    representation = Representation(
+        decoder=IdentityDecoder(),
+        initialize=create_real_vector([(-1, 1)] * 4),
+        population_array=True)
+
+    class RecordPopulation:
+        populations = []
+
+        def __call__(self, population):
+            self.populations.append(population)
+            return population
+
+    record = RecordPopulation()
+    results = list(generational_ea(
+        generations=3, pop_size=8, problem=SpheroidProblem(maximize=False),
+        representation=representation,
+        pipeline=[record,
+                  ops.tournament_selection,
+                  ops.clone,
+                  mutate_gaussian(std=0.1, expected_num_mutations=1),
+                  ops.evaluate,
+                  ops.pool(size=8)]))
+
+    assert len(results) == 4
+    assert all(isinstance(p, PopulationArray) for p in record.populations)
+    assert all(p.genomes.shape == (8, 4) for p in record.populations)
@@ -1,11 +1,18 @@
 """
     Unit test for selection operators.
 """
+import math
 import random
 
+import numpy as np
+import pytest
+
 from leap_ec.individual import Individual
 from leap_ec.decoder import IdentityDecoder
 from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.population import PopulationArray
+from leap_ec.real_rep.problems import SpheroidProblem
+from leap_ec.statistical_helpers import collect_distribution, stochastic_equals
 import leap_ec.ops as ops
 
 # Set seed so that we get consistent test results.  I.e., it is possible by
@@ -121,3 +128,141 @@ def test_tournament_selection():
 
 
 
+
+
+##############################
+# Tests for the index-based selection operators
+##############################
+def _scored_population(fitnesses, problem):
+    """Make a population with the given fitnesses."""
+    pop = []
+    for i, f in enumerate(fitnesses):
+        ind = Individual([i], decoder=IdentityDecoder(), problem=problem)
+        ind.fitness = f
+        pop.append(ind)
+    return pop
+
+
+def _expected_counts(probabilities, samples):
+    """Turn selection probabilities into expected counts that sum exactly
+    to `samples`."""
+    expected = {i: int(round(p * samples)) for i, p in enumerate(probabilities[:-1])}
+    expected[len(probabilities) - 1] = samples - sum(expected.values())
+    return expected
+
+
+def test_fitness_keys_minimize_and_nan():
+    """Keys are larger-is-better, with NaN ranked below everything."""
+    pop = _scored_population([2.0, math.nan, -5.0, None], SpheroidProblem(maximize=False))
+    keys = ops._fitness_keys(pop)
+    assert keys.tolist() == [-2.0, -np.inf, 5.0, -np.inf]
+
+
+def test_fitness_keys_population_array():
+    """A PopulationArray's fitness array is used directly."""
+    pop = PopulationArray([[0.0], [1.0], [2.0]], IdentityDecoder(), SpheroidProblem(),
+                          fitness=[4.0, None, 1.0])
+    assert ops._fitness_keys(pop).tolist() == [-4.0, -np.inf, -1.0]
+
+
+def test_fitness_keys_mixed_directions():
+    """Problems that don't agree on a direction can't be reduced to keys."""
+    pop = _scored_population([1.0], MaxOnes()) + _scored_population([1.0], SpheroidProblem())
+    with pytest.raises(ValueError):
+        ops._fitness_keys(pop)
+
+
+def test_vectorized_tournament_selection_distribution():
+    """In a binary tournament with distinct fitnesses, the individual of rank
+    i (counting the worst as rank 0) wins with probability ((i+1)^2 - i^2)/n^2."""
+    n = 4
+    pop = _scored_population([3.0, 1.0, 0.0, 2.0], SpheroidProblem())  # Minimizing
+    selector = ops.vectorized_tournament_selection(pop, k=2)
+
+    samples = 4000
+    observed = collect_distribution(lambda: next(selector).genome[0], samples)
+    rank_of = {0: 0, 3: 1, 1: 2, 2: 3}
+    probabilities = [((rank_of[i] + 1)**2 - rank_of[i]**2)/n**2 for i in range(n)]
+    assert stochastic_equals(_expected_counts(probabilities, samples), observed, p=0.001)
+
+
+def test_vectorized_tournament_selection_nan():
+    """A non-viable individual never wins a tournament against a viable one."""
+    pop = _scored_population([math.nan, 0.0], MaxOnes())
+    selector = ops.vectorized_tournament_selection(pop, k=2)
+    for _ in range(100):
+        ind = next(selector)
+        # It can only win if it was drawn twice
+        assert ind.genome == [1] or ind.fitness is math.nan
+
+
+@pytest.mark.parametrize('maximize', [True, False])
+def test_vectorized_truncation_selection_matches(maximize):
+    """The vectorized version should pick the same survivors as
+    truncation_selection()."""
+    problem = SpheroidProblem(maximize=maximize)
+    fitnesses = np.random.permutation(20).astype(float).tolist()
+    fitnesses[3] = math.nan
+    offspring = _scored_population(fitnesses[:12], problem)
+    parents = _scored_population(fitnesses[12:], problem)
+
+    expected = ops.truncation_selection(offspring, 5, parents=parents)
+    result = ops.vectorized_truncation_selection(offspring, 5, parents=parents)
+    assert [ind.fitness for ind in result] == [ind.fitness for ind in expected]
+
+
+def test_vectorized_truncation_selection_population_array():
+    """Truncating a PopulationArray returns views of its best rows."""
+    pop = PopulationArray([[0.0], [1.0], [2.0], [3.0]], IdentityDecoder(), SpheroidProblem(),
+                          fitness=[9.0, 1.0, 4.0, 0.0])
+    result = ops.vectorized_truncation_selection(pop, 2)
+    assert [ind.genome[0] for ind in result] == [3.0, 1.0]
+
+
+def test_alias_table():
+    """An alias table should reproduce the original distribution exactly."""
+    weights = np.array([0.1, 5.0, 0.0, 2.5, 1.4])
+    prob, alias = ops._alias_table(weights)
+
+    n = len(weights)
+    mass = prob / n
+    np.add.at(mass, alias, (1 - prob) / n)
+    assert np.allclose(mass, weights / weights.sum())
+
+
+def test_proportional_selection_distribution():
+    """Individuals are selected in proportion to their fitness."""
+    pop = _scored_population([1.0, 2.0, 0.0, 5.0, math.nan], MaxOnes())
+    selector = ops.proportional_selection(pop)
+
+    samples = 4000
+    observed = collect_distribution(lambda: next(selector).genome[0], samples)
+    expected = _expected_counts([1/8, 2/8, 0.0, 5/8], samples)
+    del expected[2]  # Zero counts on both sides would break the chi-squared test
+    assert 2 not in observed and 4 not in observed
+    assert stochastic_equals(expected, observed, p=0.001)
+
+
+def test_proportional_selection_negative():
+    """Negative keys (such as for minimization) need windowing."""
+    pop = _scored_population([1.0, 3.0], SpheroidProblem())
+    with pytest.raises(ValueError):
+        next(ops.proportional_selection(pop))
+
+    # With windowing, the worst individual gets no share of the wheel
+    selector = ops.proportional_selection(pop, windowing=True)
+    assert all(next(selector).genome == [0] for _ in range(20))
+
+
+def test_rank_selection_distribution():
+    """Linear ranking assigns probabilities by rank, not by fitness."""
+    pressure = 1.5
+    pop = _scored_population([100.0, 1.0, 2.0], MaxOnes())
+    selector = ops.rank_selection(pop, pressure=pressure)
+
+    samples = 3000
+    observed = collect_distribution(lambda: next(selector).genome[0], samples)
+    n = 3
+    ranks = [2, 0, 1]
+    probabilities = [(2 - pressure)/n + 2*r*(pressure - 1)/(n*(n - 1)) for r in ranks]
+    assert stochastic_equals(_expected_counts(probabilities, samples), observed, p=0.001)
@@ -0,0 +1,150 @@
+"""
+    Unit tests for the scalar sort-key protocol.
+"""
+import functools
+import math
+import random
+
+import numpy as np
+
+from leap_ec.binary_rep.problems import MaxOnes
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual
+from leap_ec.population import PopulationArray
+from leap_ec.problem import AlternatingProblem
+from leap_ec.real_rep.problems import SpheroidProblem
+import leap_ec.ops as ops
+
+
+def _scored_population(fitnesses, problem):
+    """Make a population with the given fitnesses."""
+    pop = []
+    for i, f in enumerate(fitnesses):
+        ind = Individual([i], decoder=IdentityDecoder(), problem=problem)
+        ind.fitness = f
+        pop.append(ind)
+    return pop
+
+
+def test_sort_key_matches_comparisons():
+    """Sorting by key gives the same order as sorting by comparisons."""
+    for maximize in [True, False]:
+        problem = SpheroidProblem(maximize=maximize)
+        fitnesses = [random.uniform(-10, 10) for _ in range(30)] + [math.nan]
+        pop = _scored_population(fitnesses, problem)
+
+        key = Individual.sort_key_for(pop)
+        assert key is not None
+        assert [ind.genome for ind in sorted(pop, key=key)] == \
+               [ind.genome for ind in sorted(pop)]
+
+
+def test_sort_key_separate_problem_instances():
+    """Individuals with separate but equivalent problems share a key."""
+    pop = [Individual([0, 1], IdentityDecoder(), problem=MaxOnes()),
+           Individual([1, 1], IdentityDecoder(), problem=MaxOnes())]
+    pop = Individual.evaluate_population(pop)
+
+    key = Individual.sort_key_for(pop)
+    assert max(pop, key=key).genome == [1, 1]
+
+
+def test_sort_key_population_array():
+    """A PopulationArray's views have a sort key."""
+    pop = PopulationArray([[0.0], [2.0], [1.0]], IdentityDecoder(), SpheroidProblem())
+    pop = Individual.evaluate_population(pop)
+
+    key = Individual.sort_key_for(pop)
+    assert key is not None
+    assert max(pop, key=key).genome[0] == 0.0
+
+
+def test_no_sort_key_mixed_directions():
+    """Problems that order fitnesses differently don't give a key."""
+    pop = _scored_population([1.0], MaxOnes()) + _scored_population([1.0], SpheroidProblem())
+    assert Individual.sort_key_for(pop) is None
+
+
+def test_no_sort_key_without_total_order():
+    """Problems without a sort_key() fall back on comparisons."""
+    problem = AlternatingProblem([MaxOnes(), MaxOnes(maximize=False)], modulo=1)
+    pop = _scored_population([1.0, 2.0], problem)
+    assert Individual.sort_key_for(pop) is None
+
+
+class ClosestToTenProblem(MaxOnes):
+    """ Prefers fitnesses near 10, but inherits MaxOnes' sort_key() """
+
+    def worse_than(self, first_fitness, second_fitness):
+        return abs(first_fitness - 10) > abs(second_fitness - 10)
+
+
+class RoundedProblem(MaxOnes):
+    """ Treats fitnesses that round to the same integer as equivalent """
+
+    def equivalent(self, first_fitness, second_fitness):
+        return round(first_fitness) == round(second_fitness)
+
+
+class DocumentedProblem(SpheroidProblem):
+    """ Over-rides worse_than() only to document it """
+
+    def worse_than(self, first_fitness, second_fitness):
+        """Just like SpheroidProblem's."""
+        return super().worse_than(first_fitness, second_fitness)
+
+
+class SwappedProblem(SpheroidProblem):
+    """ Over-rides worse_than() with a call to super() that reverses it """
+
+    def worse_than(self, first_fitness, second_fitness):
+        return super().worse_than(second_fitness, first_fitness)
+
+
+def test_sort_key_delegating_comparison():
+    """Over-riding worse_than() with a plain call to the superclass's keeps
+    the key, but changing its arguments doesn't."""
+    pop = _scored_population([1.0, 2.0], DocumentedProblem())
+    assert Individual.sort_key_for(pop) is not None
+
+    pop = _scored_population([1.0, 2.0], SwappedProblem())
+    assert Individual.sort_key_for(pop) is None
+
+
+def test_no_sort_key_overridden_problem_comparison():
+    """A problem that over-rides worse_than() or equivalent() below its
+    sort_key() falls back on comparisons, and the library's max/sort sites
+    respect its ordering."""
+    pop = _scored_population([9.0, 30.0, 2.0], ClosestToTenProblem())
+    assert Individual.sort_key_for(pop) is None
+    survivors = ops.truncation_selection(pop, 1)
+    assert survivors[0].fitness == 9.0
+
+    pop = _scored_population([1.0, 2.0], RoundedProblem())
+    assert Individual.sort_key_for(pop) is None
+
+
+def test_no_sort_key_custom_comparison():
+    """An Individual subclass with its own ordering falls back on comparisons,
+    and the library's max/sort sites respect that ordering."""
+
+    @functools.total_ordering
+    class ReversedIndividual(Individual):
+        def __lt__(self, other):
+            return self.fitness > other.fitness
+
+    pop = [ReversedIndividual([i], decoder=IdentityDecoder(), problem=MaxOnes())
+           for i in range(3)]
+    for ind, f in zip(pop, [1.0, 0.0, 2.0]):
+        ind.fitness = f
+
+    assert Individual.sort_key_for(pop) is None
+    survivors = ops.truncation_selection(pop, 1)
+    assert survivors[0].fitness == 0.0
+
+
+def test_truncation_selection_nan():
+    """Non-viable individuals are truncated first."""
+    pop = _scored_population([math.nan, 3.0, 1.0, math.nan], SpheroidProblem())
+    survivors = ops.truncation_selection(pop, 2)
+    assert [ind.fitness for ind in survivors] == [1.0, 3.0]
@@ -0,0 +1,145 @@
+"""
+    Unit tests for the prefetch and threaded_evaluate operators.
+"""
+from math import nan
+import threading
+import time
+
+import pytest
+
+from leap_ec import ops
+from leap_ec.decoder import IdentityDecoder
+from leap_ec.individual import Individual, RobustIndividual
+import leap_ec.problem
+
+
+class SleepyProblem(leap_ec.problem.ScalarProblem):
+    """ Sums the phenome after sleeping (which releases the GIL), failing on
+    negative sums.  It also tracks the maximum number of evaluations that
+    were running at once. """
+
+    def __init__(self, delay=0.02):
+        super().__init__(maximize=True)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def evaluate(self, phenome):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            total = sum(phenome)
+            if total < 0:
+                raise ValueError(f"Negative sum: {total}")
+            return total
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _population(values, problem, individual_cls=Individual):
+    return [individual_cls([v], IdentityDecoder(), problem) for v in values]
+
+
+##############################
+# Tests for threaded_evaluate
+##############################
+def test_threaded_evaluate_order():
+    """Individuals come out in order, with the evaluations overlapping."""
+    problem = SleepyProblem()
+    pop = _population(range(8), problem)
+
+    evaluated = list(ops.threaded_evaluate(iter(pop), workers=4))
+
+    assert [ind.fitness for ind in evaluated] == list(range(8))
+    assert problem.max_active == 4
+
+
+def test_threaded_evaluate_exception():
+    """Exceptions are re-raised in order for plain individuals."""
+    pop = _population([1, -1, 2], SleepyProblem(delay=0.0))
+    evaluator = ops.threaded_evaluate(iter(pop), workers=2)
+
+    assert next(evaluator).fitness == 1
+    with pytest.raises(ValueError):
+        next(evaluator)
+
+
+def test_threaded_evaluate_robust():
+    """A RobustIndividual records the exception and is marked non-viable."""
+    pop = _population([1, -1, 2], SleepyProblem(delay=0.0), RobustIndividual)
+    evaluated = list(ops.threaded_evaluate(iter(pop), workers=2))
+
+    assert [ind.is_viable for ind in evaluated] == [True, False, True]
+    assert evaluated[1].fitness is nan
+    assert isinstance(evaluated[1].exception, ValueError)
+
+
+##############################
+# Tests for prefetch
+##############################
+def test_prefetch_order():
+    """Prefetching passes individuals on in order."""
+    pop = _population(range(10), SleepyProblem(delay=0.0))
+    assert list(ops.prefetch(iter(pop), size=3)) == pop
+
+
+def test_prefetch_exception():
+    """An exception upstream is re-raised downstream, after the individuals
+    that came before it."""
+    def upstream():
+        yield Individual([0])
+        yield Individual([1])
+        raise RuntimeError("upstream failure")
+
+    prefetched = ops.prefetch(upstream(), size=4)
+    assert next(prefetched).genome == [0]
+    assert next(prefetched).genome == [1]
+    with pytest.raises(RuntimeError):
+        next(prefetched)
+
+
+def test_prefetch_stops_producer():
+    """Closing the operator stops its background thread, even if the
+    buffer is full."""
+    produced = []
+
+    def upstream():
+        while True:
+            produced.append(len(produced))
+            yield Individual([len(produced)])
+
+    before = threading.active_count()
+    offspring = ops.pool(ops.prefetch(upstream(), size=2), size=3)
+
+    assert len(offspring) == 3
+    assert threading.active_count() == before
+    # It works ahead by at most size + 1 individuals
+    assert len(produced) <= 3 + 2 + 1
+
+
+def test_prefetch_overlaps_evaluation():
+    """With a slow producer and a slow evaluator, prefetching lets them run
+    at the same time."""
+    delay = 0.02
+    n = 10
+
+    def slow_upstream(pop):
+        for ind in pop:
+            time.sleep(delay)
+            yield ind
+
+    problem = SleepyProblem(delay=delay)
+    pop = _population(range(n), problem)
+
+    start = time.perf_counter()
+    evaluated = list(ops.threaded_evaluate(ops.prefetch(slow_upstream(pop), size=4),
+                                           workers=1))
+    elapsed = time.perf_counter() - start
+
+    assert [ind.fitness for ind in evaluated] == list(range(n))
+    # Run back to back, this would take 2 * n * delay
+    assert elapsed < 1.75 * n * delay